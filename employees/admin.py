@@ -1,12 +1,13 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group, User
 from django.contrib.auth.admin import UserAdmin as DefaultUserAdmin
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from .models import (
     Department, Designation, EmergencyContact, Employee, EmployeeDocument, 
     UserProfile, PublicHoliday,
     SystemDetail, SystemRequirement,
-    CPUDevice, ScreenDevice, KeyboardDevice, MouseDevice, HeadphoneDevice, ExtenderDevice
+    CPUDevice, ScreenDevice, KeyboardDevice, MouseDevice, HeadphoneDevice, ExtenderDevice,
+    ProfileCapture,
 )
 from .decorators import role_required
 
@@ -346,3 +347,73 @@ class SystemRequirementAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(ProfileCapture)
+class ProfileCaptureAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'sql_ms',
+                    'query_count', 'profiler', 'user']
+    list_filter = ['profiler', 'method', 'created_at']
+    search_fields = ['path', 'view_name', 'user__username']
+    ordering = ['-created_at']
+    date_hierarchy = 'created_at'
+
+    fields = ['created_at', 'user', 'method', 'path', 'view_name', 'status_code', 'profiler',
+              'duration_ms', 'sql_ms', 'query_count', 'download_link',
+              'top_functions_table', 'top_queries_table', 'repeated_queries_table']
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        from django.urls import path
+        urls = super().get_urls()
+        return [
+            path('<int:pk>/download/', self.admin_site.admin_view(self.download_view),
+                 name='employees_profilecapture_download'),
+        ] + urls
+
+    def download_view(self, request, pk):
+        import os
+        from django.http import FileResponse, Http404
+        capture = self.get_object(request, pk)
+        if capture is None or not capture.profile_file or not os.path.exists(capture.profile_file):
+            raise Http404("Profile file not found")
+        return FileResponse(open(capture.profile_file, 'rb'), as_attachment=True,
+                            filename=os.path.basename(capture.profile_file))
+
+    def download_link(self, obj):
+        from django.urls import reverse
+        if not obj.profile_file:
+            return '-'
+        return format_html('<a href="{}">Download raw profile</a> ({})',
+                           reverse('admin:employees_profilecapture_download', args=[obj.pk]), obj.profiler)
+    download_link.short_description = 'Profile'
+
+    def _table(self, headers, rows):
+        rows = list(rows)
+        if not rows:
+            return '-'
+        return format_html(
+            '<table><thead><tr>{}</tr></thead><tbody>{}</tbody></table>',
+            format_html_join('', '<th>{}</th>', ((h,) for h in headers)),
+            format_html_join('', '<tr>' + '<td>{}</td>' * len(headers) + '</tr>', rows),
+        )
+
+    def top_functions_table(self, obj):
+        return self._table(['Function', 'Calls', 'Self ms', 'Total ms'], (
+            (row['function'], row['calls'], row['self_ms'], row['total_ms']) for row in obj.top_functions
+        ))
+    top_functions_table.short_description = 'Top functions'
+
+    def top_queries_table(self, obj):
+        return self._table(['ms', 'SQL'], ((row['ms'], row['sql']) for row in obj.top_queries))
+    top_queries_table.short_description = 'Slowest queries'
+
+    def repeated_queries_table(self, obj):
+        return self._table(['Count', 'Statement'], ((row['count'], row['sql']) for row in obj.repeated_queries))
+    repeated_queries_table.short_description = 'Repeated queries'
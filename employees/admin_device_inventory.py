@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CPUDevice, ScreenDevice, KeyboardDevice, MouseDevice, HeadphoneDevice, ExtenderDevice
+from .models import CPUDevice, ScreenDevice, KeyboardDevice, MouseDevice, HeadphoneDevice, ExtenderDevice, InventoryAsset
 
 
 @admin.register(CPUDevice)
@@ -64,3 +64,11 @@ class ExtenderDeviceAdmin(admin.ModelAdmin):
     list_filter = ['status', 'company_name', 'created_at']
     search_fields = ['company_name', 'label_no', 'model', 'allocated_to__full_name']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(InventoryAsset)
+class InventoryAssetAdmin(admin.ModelAdmin):
+    list_display = ['asset_type', 'label_no', 'company_name', 'size_inches', 'status', 'holder', 'system', 'source']
+    list_filter = ['asset_type', 'status', 'source']
+    search_fields = ['label_no', 'company_name', 'holder__full_name', 'system__employee__full_name']
+    readonly_fields = ['updated_at']
@@ -0,0 +1,269 @@
+# Device Allocation Service
+# Concurrency-safe allocation of devices, peripherals and systems.
+#
+# Every claim is an atomic conditional UPDATE (... WHERE status='available'),
+# so two IT admins racing for the same device cannot both win: the loser's
+# UPDATE matches zero rows and the claim is reported as a conflict. Picking
+# "any free device" for a batch of joiners uses SELECT ... FOR UPDATE SKIP LOCKED
+# where the database supports it, so concurrent batches take disjoint rows.
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Device, DeviceAllocation, DeviceRequest, Employee, SystemDetail, InventoryAsset
+from .inventory_index import InventoryIndexService
+from .inventory_stats import InventoryStatsService
+
+
+class AllocationResult:
+    """
+    Result object for allocation operations
+    Contains success status, message and the allocation rows created
+    """
+    def __init__(self, success: bool, message: str = "", allocations: Optional[List] = None,
+                 conflicts: Optional[List] = None):
+        self.success = success
+        self.message = message
+        self.allocations = allocations or []
+        self.conflicts = conflicts or []
+
+
+class AllocationConflict(Exception):
+    """Raised inside a transaction to roll back a batch when a claim loses a race"""
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        super().__init__(f"{len(conflicts)} item(s) are no longer available")
+
+
+class DeviceAllocationService:
+    """
+    Service class for race-free device, peripheral and system allocation
+    """
+
+    # ========================================================================
+    # CLAIM PRIMITIVES
+    # ========================================================================
+
+    @staticmethod
+    def _claim_devices(device_ids: Sequence[int]) -> List[int]:
+        """
+        Atomically flip available devices to in_use. Must run inside a transaction.
+
+        Returns:
+            The subset of device_ids that could NOT be claimed
+        """
+        available = set(
+            Device.objects.select_for_update()
+            .filter(pk__in=device_ids, status='available')
+            .values_list('pk', flat=True)
+        )
+        conflicts = [device_id for device_id in device_ids if device_id not in available]
+        if conflicts:
+            return conflicts
+
+        claimed = Device.objects.filter(pk__in=device_ids, status='available').update(
+            status='in_use', updated_at=timezone.now()
+        )
+        # Backends without row locks can still lose the race between SELECT and UPDATE
+        return [] if claimed == len(device_ids) else list(device_ids)
+
+    @staticmethod
+    def _record_allocations(pairs: Sequence[Tuple[int, int]], user) -> List[DeviceAllocation]:
+        """Insert allocation rows for already-claimed devices and refresh the index"""
+        allocations = DeviceAllocation.objects.bulk_create([
+            DeviceAllocation(device_id=device_id, assigned_to_id=employee_id, assigned_by=user)
+            for device_id, employee_id in pairs
+        ])
+        for device_id, employee_id in pairs:
+            InventoryAsset.objects.filter(source='device', source_id=device_id).update(
+                status='allocated', holder_id=employee_id
+            )
+        return allocations
+
+    # ========================================================================
+    # DEVICE ALLOCATION
+    # ========================================================================
+
+    @staticmethod
+    def allocate_device(device: Device, employee: Employee, user) -> AllocationResult:
+        """Allocate one device to one employee"""
+        return DeviceAllocationService.allocate_batch([(device.pk, employee.pk)], user)
+
+    @staticmethod
+    def allocate_batch(assignments: Sequence[Tuple[int, int]], user) -> AllocationResult:
+        """
+        Allocate specific devices to employees in one transaction.
+
+        Args:
+            assignments: (device_id, employee_id) pairs
+            user: IT admin performing the allocation
+
+        Returns:
+            AllocationResult; on any conflict nothing is allocated and
+            result.conflicts lists the device ids that were already taken
+        """
+        if not assignments:
+            return AllocationResult(False, "Nothing to allocate")
+
+        device_ids = [device_id for device_id, _ in assignments]
+        if len(set(device_ids)) != len(device_ids):
+            return AllocationResult(False, "The same device appears more than once in the batch")
+
+        try:
+            with transaction.atomic():
+                conflicts = DeviceAllocationService._claim_devices(device_ids)
+                if conflicts:
+                    raise AllocationConflict(conflicts)
+                allocations = DeviceAllocationService._record_allocations(assignments, user)
+        except AllocationConflict as e:
+            return AllocationResult(False, str(e), conflicts=e.conflicts)
+
+        InventoryStatsService.invalidate()
+        return AllocationResult(True, f"Allocated {len(allocations)} device(s)", allocations=allocations)
+
+    @staticmethod
+    def allocate_next_available(device_type: str, employee_ids: Sequence[int], user) -> AllocationResult:
+        """
+        Give each employee any free device of a type, in one transaction.
+
+        Candidate rows are locked with SKIP LOCKED (when supported) so
+        concurrent batches pick disjoint devices instead of queueing on the
+        same rows; the conditional UPDATE still guards backends without row locks.
+        """
+        if not employee_ids:
+            return AllocationResult(False, "Nothing to allocate")
+
+        lock_kwargs = {'skip_locked': True} if connection.features.has_select_for_update_skip_locked else {}
+
+        try:
+            with transaction.atomic():
+                device_ids = list(
+                    Device.objects.select_for_update(**lock_kwargs)
+                    .filter(device_type=device_type, status='available')
+                    .order_by('pk')
+                    .values_list('pk', flat=True)[:len(employee_ids)]
+                )
+                if len(device_ids) < len(employee_ids):
+                    return AllocationResult(
+                        False,
+                        f"Only {len(device_ids)} {device_type} device(s) available for {len(employee_ids)} employee(s)"
+                    )
+                conflicts = DeviceAllocationService._claim_devices(device_ids)
+                if conflicts:
+                    raise AllocationConflict(conflicts)
+                allocations = DeviceAllocationService._record_allocations(list(zip(device_ids, employee_ids)), user)
+        except AllocationConflict as e:
+            return AllocationResult(False, str(e), conflicts=e.conflicts)
+
+        InventoryStatsService.invalidate()
+        return AllocationResult(True, f"Allocated {len(allocations)} {device_type} device(s)", allocations=allocations)
+
+    @staticmethod
+    def allocate_to_request(device_request: DeviceRequest, device: Device, user) -> AllocationResult:
+        """
+        Claim a device for an approved DeviceRequest.
+
+        The request is moved to allocated with a conditional UPDATE; when
+        another admin fulfilled it first, the device claim is rolled back.
+        """
+        try:
+            with transaction.atomic():
+                result = DeviceAllocationService.allocate_batch([(device.pk, device_request.employee_id)], user)
+                if not result.success:
+                    return AllocationResult(False, "Device is not available", conflicts=result.conflicts)
+
+                fulfilled = DeviceRequest.objects.filter(pk=device_request.pk, status='approved').update(
+                    status='allocated',
+                    device=device,
+                    allocated_by=user,
+                    allocated_date=timezone.now(),
+                    updated_at=timezone.now(),
+                )
+                if not fulfilled:
+                    raise AllocationConflict([('DeviceRequest', device_request.pk)])
+        except AllocationConflict as e:
+            InventoryStatsService.invalidate()
+            return AllocationResult(False, "Request is no longer awaiting allocation", conflicts=e.conflicts)
+        return result
+
+    # ========================================================================
+    # PERIPHERAL INVENTORY
+    # ========================================================================
+
+    @staticmethod
+    def allocate_peripherals(claims: Sequence[Tuple[type, int, int]]) -> AllocationResult:
+        """
+        Claim peripheral inventory rows (CPUDevice, ScreenDevice, ...) in one transaction.
+
+        Args:
+            claims: (model, device_id, employee_id) triples
+        """
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                conflicts = []
+                for model, device_id, employee_id in claims:
+                    claimed = model.objects.filter(pk=device_id, status='available').update(
+                        status='allocated', allocated_to_id=employee_id, allocated_date=now, updated_at=now
+                    )
+                    if not claimed:
+                        conflicts.append((model.__name__, device_id))
+                if conflicts:
+                    raise AllocationConflict(conflicts)
+
+                for model, device_id, employee_id in claims:
+                    InventoryAsset.objects.filter(
+                        asset_type=InventoryIndexService.PERIPHERAL_TYPES[model], source='inventory', source_id=device_id
+                    ).update(status='allocated', holder_id=employee_id)
+        except AllocationConflict as e:
+            return AllocationResult(False, str(e), conflicts=e.conflicts)
+
+        InventoryStatsService.invalidate()
+        return AllocationResult(True, f"Allocated {len(claims)} peripheral(s)")
+
+    # ========================================================================
+    # SYSTEM ASSIGNMENT
+    # ========================================================================
+
+    @staticmethod
+    def assign_system(system_id: int, employee: Employee, user, reassign: bool = False) -> AllocationResult:
+        """
+        Assign a SystemDetail bundle to an employee.
+
+        The UPDATE only matches when the system is not actively held by a
+        different employee, unless reassign is explicitly requested.
+        """
+        queryset = SystemDetail.objects.filter(pk=system_id)
+        if not reassign:
+            queryset = queryset.filter(Q(is_active=False) | Q(employee=employee))
+
+        with transaction.atomic():
+            updated = queryset.update(
+                employee=employee, is_active=True, allocated_by=user, updated_at=timezone.now()
+            )
+            if not updated:
+                if not SystemDetail.objects.filter(pk=system_id).exists():
+                    return AllocationResult(False, "System not found")
+                return AllocationResult(False, "System is already assigned to another employee")
+            InventoryIndexService.sync_system(SystemDetail.objects.get(pk=system_id))
+
+        InventoryStatsService.invalidate()
+        return AllocationResult(True, f"System successfully assigned to {employee.full_name}")
+
+    # ========================================================================
+    # HELPERS
+    # ========================================================================
+
+    @staticmethod
+    def summarize(result: AllocationResult) -> Dict:
+        """JSON-friendly representation of a result"""
+        return {
+            'success': result.success,
+            'message': result.message,
+            'allocations': [
+                {'id': a.pk, 'device_id': a.device_id, 'employee_id': a.assigned_to_id}
+                for a in result.allocations
+            ],
+            'conflicts': [list(c) if isinstance(c, tuple) else c for c in result.conflicts],
+        }
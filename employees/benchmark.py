@@ -0,0 +1,540 @@
+# HRMS Benchmark Suite
+# Deterministic synthetic dataset plus timed runs over the hot paths.
+#
+# BenchmarkDataset generates a large-company dataset (employees, leave
+# applications, public holidays, salary slips, devices and peripherals) from
+# a fixed seed and fixed dates, so two runs with the same options produce the
+# same rows on SQLite and MySQL alike. Every generated row is tagged (BENCH
+# employee codes, "[bench]" holidays, BENCH- serials) so the dataset can be
+# dropped without touching real data.
+#
+# BenchmarkSuite times each hot path for a number of iterations and reports
+# p50/p95 latency and query counts, so runs can be diffed as JSON.
+
+import csv
+import io
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    Department, Designation, Employee, LeaveType, LeaveApplication, PublicHoliday,
+    Device, DeviceAllocation, CPUDevice, ScreenDevice, UserProfile, BackgroundJob,
+)
+from .job_queue import JobContext, JobQueueService, job_storage
+from .jobs import import_employees_csv
+from .leave_service import LeaveManagementService
+from .payslip_service import PayslipService
+from .query_budget import record_queries
+
+
+class BenchmarkDataset:
+    """
+    Generator for the synthetic benchmark dataset
+    """
+
+    CODE_PREFIX = 'BENCH'
+    HOLIDAY_TAG = '[bench]'
+    SERIAL_PREFIX = 'BENCH-'
+    DEPARTMENTS = 20
+    DESIGNATIONS_PER_DEPARTMENT = 5
+    HOLIDAYS_PER_YEAR = 15
+
+    FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Kavya', 'Rohan', 'Sneha', 'Vikram', 'Ananya', 'Arjun', 'Meera',
+                   'Nikhil', 'Pooja', 'Rahul', 'Riya', 'Sanjay', 'Tanvi', 'Uday', 'Varsha', 'Yash', 'Zara']
+    LAST_NAMES = ['Patel', 'Shah', 'Mehta', 'Desai', 'Joshi', 'Iyer', 'Reddy', 'Nair', 'Gupta', 'Sharma',
+                  'Verma', 'Kapoor', 'Rao', 'Pillai', 'Bose', 'Das', 'Khan', 'Singh', 'Trivedi', 'Modi']
+    PERIOD_WEIGHTS = [('confirmed', 80), ('probation', 8), ('trainee', 6), ('intern', 4), ('notice_period', 2)]
+    STATUS_WEIGHTS = [('approved', 70), ('pending', 10), ('rejected', 12), ('cancelled', 8)]
+
+    def __init__(self, seed: int = 42, employees: int = 20000, leaves: int = 1000000, years: int = 5,
+                 end_year: int = 2025, batch_size: int = 5000, log: Callable[[str], None] = None):
+        self.seed = seed
+        self.employees = employees
+        self.leaves = leaves
+        self.years = years
+        self.end_year = end_year
+        self.start_year = end_year - years + 1
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.rng = random.Random(seed)
+
+    # ========================================================================
+    # LIFECYCLE
+    # ========================================================================
+
+    @classmethod
+    def exists(cls) -> bool:
+        return Employee.objects.filter(employee_code__startswith=cls.CODE_PREFIX).exists()
+
+    @classmethod
+    def clear(cls) -> None:
+        """Delete every generated row (cascades to leaves, allocations and slips)"""
+        from salary.models import SalarySlip, SalaryStructure
+
+        employees = Employee.objects.filter(employee_code__startswith=cls.CODE_PREFIX)
+        SalarySlip.objects.filter(employee__in=employees).delete()
+        Department.objects.filter(name__startswith=cls.CODE_PREFIX).update(head=None)
+        employees.delete()
+        Designation.objects.filter(department__name__startswith=cls.CODE_PREFIX).delete()
+        Department.objects.filter(name__startswith=cls.CODE_PREFIX).delete()
+        PublicHoliday.objects.filter(description=cls.HOLIDAY_TAG).delete()
+        Device.objects.filter(serial_number__startswith=cls.SERIAL_PREFIX).delete()
+        CPUDevice.objects.filter(label_no__startswith=cls.SERIAL_PREFIX).delete()
+        ScreenDevice.objects.filter(label_no__startswith=cls.SERIAL_PREFIX).delete()
+        SalaryStructure.objects.filter(name__startswith=cls.CODE_PREFIX).delete()
+
+    def generate(self) -> Dict[str, int]:
+        """Create the whole dataset and rebuild the derived indexes"""
+        counts = {}
+        with transaction.atomic():
+            designations = self._generate_org()
+        counts['employees'] = self._generate_employees(designations)
+        employee_ids = list(
+            Employee.objects.filter(employee_code__startswith=self.CODE_PREFIX).order_by('pk').values_list('pk', flat=True)
+        )
+        self._assign_department_heads()
+        self._ensure_leave_types()
+        counts['holidays'] = self._generate_holidays()
+        counts['leave_applications'] = self._generate_leaves(employee_ids)
+        counts['salary_slips'] = self._generate_slips(employee_ids)
+        counts['devices'] = self._generate_devices(employee_ids)
+        self._rebuild_indexes()
+        return counts
+
+    def _bulk_insert(self, model, rows, label: str) -> int:
+        """Insert a lazily generated stream of unsaved instances in batches"""
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                with transaction.atomic():
+                    model.objects.bulk_create(batch, batch_size=self.batch_size)
+                count += len(batch)
+                batch = []
+                if count % (self.batch_size * 20) == 0:
+                    self.log(f'  {label}: {count}')
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            count += len(batch)
+        self.log(f'  {label}: {count} done')
+        return count
+
+    # ========================================================================
+    # GENERATORS
+    # ========================================================================
+
+    def _generate_org(self) -> List[Designation]:
+        designations = []
+        for d in range(1, self.DEPARTMENTS + 1):
+            department = Department.objects.create(
+                name=f'{self.CODE_PREFIX} Department {d:02d}', description='Synthetic benchmark department'
+            )
+            for g in range(1, self.DESIGNATIONS_PER_DEPARTMENT + 1):
+                designations.append(Designation.objects.create(
+                    name=f'{self.CODE_PREFIX} Grade {g} / D{d:02d}', department=department
+                ))
+        return designations
+
+    def _pan(self, i: int) -> str:
+        letters = ''
+        n = i // 10000
+        for _ in range(3):
+            letters = chr(ord('A') + n % 26) + letters
+            n //= 26
+        return f'BZ{letters}{i % 10000:04d}Z'
+
+    def _generate_employees(self, designations: List[Designation]) -> int:
+        rng = self.rng
+        start = date(self.start_year - 3, 1, 1)
+        span = (date(self.end_year, 12, 31) - start).days
+        periods = [p for p, _ in self.PERIOD_WEIGHTS]
+        period_weights = [w for _, w in self.PERIOD_WEIGHTS]
+        qualifications = [q for q, _ in Employee.QUALIFICATION_CHOICES]
+
+        def rows():
+            for i in range(1, self.employees + 1):
+                designation = designations[rng.randrange(len(designations))]
+                name = f'{rng.choice(self.FIRST_NAMES)} {rng.choice(self.LAST_NAMES)}'
+                yield Employee(
+                    employee_code=f'{self.CODE_PREFIX}{i:06d}',
+                    full_name=name,
+                    department_id=designation.department_id,
+                    designation=designation,
+                    joining_date=start + timedelta(days=rng.randrange(span)),
+                    employment_status='active' if rng.random() < 0.92 else 'inactive',
+                    current_ctc=Decimal(rng.randrange(300, 3000) * 1000),
+                    mobile_number=f'9{rng.randrange(10 ** 9):09d}',
+                    official_email=f'bench{i:06d}@bench.example.com',
+                    date_of_birth=date(1965, 1, 1) + timedelta(days=rng.randrange(365 * 38)),
+                    marital_status=rng.choice(['single', 'married']),
+                    highest_qualification=rng.choice(qualifications),
+                    total_experience_years=rng.randrange(20),
+                    period_type=rng.choices(periods, period_weights)[0],
+                    aadhar_card_number=f'{900000000000 + i}',
+                    pan_card_number=self._pan(i),
+                )
+
+        return self._bulk_insert(Employee, rows(), 'employees')
+
+    def _assign_department_heads(self) -> None:
+        for department in Department.objects.filter(name__startswith=self.CODE_PREFIX):
+            head_id = department.employees.order_by('pk').values_list('pk', flat=True).first()
+            Department.objects.filter(pk=department.pk).update(head_id=head_id)
+
+    def _ensure_leave_types(self) -> None:
+        for code, allocation in LeaveManagementService.ANNUAL_ALLOCATIONS.items():
+            LeaveType.objects.get_or_create(
+                name=LeaveManagementService.get_leave_type_name(code),
+                defaults={'max_days_per_year': allocation},
+            )
+
+    def _generate_holidays(self) -> int:
+        rng = self.rng
+
+        def rows():
+            for year in range(self.start_year, self.end_year + 1):
+                days = sorted(rng.sample(range(365), self.HOLIDAYS_PER_YEAR))
+                for n, offset in enumerate(days, start=1):
+                    holiday = date(year, 1, 1) + timedelta(days=offset)
+                    yield PublicHoliday(
+                        name=f'Bench Holiday {n}', date=holiday, day=holiday.strftime('%A'),
+                        year=year, country='IN', description=self.HOLIDAY_TAG,
+                    )
+
+        return self._bulk_insert(PublicHoliday, rows(), 'holidays')
+
+    def _generate_leaves(self, employee_ids: List[int]) -> int:
+        rng = self.rng
+        leave_type_ids = list(LeaveType.objects.filter(
+            name__in=[LeaveManagementService.get_leave_type_name(code) for code in ('casual', 'emergency', 'birthday')]
+        ).values_list('pk', flat=True))
+        statuses = [s for s, _ in self.STATUS_WEIGHTS]
+        status_weights = [w for _, w in self.STATUS_WEIGHTS]
+        start = date(self.start_year, 1, 1)
+        span = (date(self.end_year, 12, 31) - start).days
+
+        def rows():
+            for _ in range(self.leaves):
+                first = start + timedelta(days=rng.randrange(span))
+                half_day = rng.random() < 0.15
+                length = 1 if half_day else rng.choice([1, 1, 1, 2, 2, 3, 5])
+                yield LeaveApplication(
+                    employee_id=rng.choice(employee_ids),
+                    leave_type_id=rng.choice(leave_type_ids),
+                    start_date=first,
+                    end_date=first + timedelta(days=length - 1),
+                    total_days=Decimal('0.5') if half_day else Decimal(length),
+                    is_half_day=half_day,
+                    reason='Synthetic benchmark leave',
+                    status=rng.choices(statuses, status_weights)[0],
+                )
+
+        return self._bulk_insert(LeaveApplication, rows(), 'leave applications')
+
+    def _generate_slips(self, employee_ids: List[int]) -> int:
+        from salary.models import SalarySlip, SalaryStructure
+
+        structure = SalaryStructure.objects.create(name=f'{self.CODE_PREFIX} Standard Structure')
+        # create() leaves the float field defaults in memory; calculate_components needs Decimals
+        structure.refresh_from_db()
+        ctcs = dict(Employee.objects.filter(pk__in=employee_ids).values_list('pk', 'current_ctc'))
+
+        def rows():
+            for employee_id in employee_ids:
+                monthly = (ctcs[employee_id] / 12).quantize(Decimal('0.01'))
+                c = structure.calculate_components(monthly)
+                for year in range(self.start_year, self.end_year + 1):
+                    for month in range(1, 13):
+                        yield SalarySlip(
+                            employee_id=employee_id, month=month, year=year,
+                            basic_salary=c['earnings']['basic'], hra=c['earnings']['hra'],
+                            medical_allowance=c['earnings']['medical_allowance'],
+                            conveyance_allowance=c['earnings']['conveyance_allowance'],
+                            special_allowance=c['earnings']['special_allowance'],
+                            gross_salary=c['gross_salary'],
+                            employee_pf=c['employee_deductions']['pf'],
+                            employee_esic=c['employee_deductions']['esic'],
+                            professional_tax=c['employee_deductions']['professional_tax'],
+                            total_deductions=c['total_deductions'], net_salary=c['net_salary'],
+                            employer_pf=c['employer_contributions']['pf'],
+                            employer_esic=c['employer_contributions']['esic'],
+                            status='paid',
+                        )
+
+        return self._bulk_insert(SalarySlip, rows(), 'salary slips')
+
+    def _generate_devices(self, employee_ids: List[int]) -> int:
+        rng = self.rng
+        count = max(len(employee_ids) // 2, 1)
+        purchase = date(self.start_year, 1, 1)
+
+        count = self._bulk_insert(Device, (
+            Device(
+                device_type=rng.choice(['laptop', 'laptop', 'mobile', 'tablet']),
+                device_name=f'Bench Device {i}',
+                serial_number=f'{self.SERIAL_PREFIX}{i:07d}',
+                purchase_date=purchase + timedelta(days=rng.randrange(365 * self.years)),
+                status='available',
+            ) for i in range(1, count + 1)
+        ), 'devices')
+
+        device_ids = list(
+            Device.objects.filter(serial_number__startswith=self.SERIAL_PREFIX).order_by('pk').values_list('pk', flat=True)
+        )
+        allocated = device_ids[:int(len(device_ids) * 0.7)]
+        holders = rng.sample(employee_ids, min(len(allocated), len(employee_ids)))
+        self._bulk_insert(DeviceAllocation, (
+            DeviceAllocation(device_id=device_id, assigned_to_id=employee_id)
+            for device_id, employee_id in zip(allocated, holders)
+        ), 'device allocations')
+        Device.objects.filter(pk__in=allocated).update(status='in_use')
+
+        peripherals = max(len(employee_ids) // 4, 1)
+        self._bulk_insert(CPUDevice, (
+            CPUDevice(
+                company_name=rng.choice(['Dell', 'HP', 'Lenovo']), processor='Intel i5', ram='16GB', storage='512GB SSD',
+                label_no=f'{self.SERIAL_PREFIX}CPU{i:06d}',
+                mac_address=':'.join(f'{(i >> shift) & 0xFF:02X}' for shift in (40, 32, 24, 16, 8, 0)),
+            ) for i in range(1, peripherals + 1)
+        ), 'cpus')
+        self._bulk_insert(ScreenDevice, (
+            ScreenDevice(
+                company_name=rng.choice(['Dell', 'LG', 'Samsung']), size=rng.choice(['22 inch', '24 inch', '27 inch']),
+                label_no=f'{self.SERIAL_PREFIX}SCR{i:06d}',
+            ) for i in range(1, peripherals + 1)
+        ), 'screens')
+        return count + 2 * peripherals
+
+    def _rebuild_indexes(self) -> None:
+        """bulk_create sends no signals, so rebuild what the signals would maintain"""
+        from .search_service import EmployeeSearchService
+        from .inventory_index import InventoryIndexService
+        from .inventory_stats import InventoryStatsService
+        from .org_hierarchy import OrgHierarchyService
+        from .stats_service import EmployeeStatsService
+
+        self.log('  rebuilding search, inventory and hierarchy indexes')
+        EmployeeSearchService.rebuild()
+        InventoryIndexService.rebuild()
+        OrgHierarchyService.rebuild()
+        InventoryStatsService.invalidate()
+        EmployeeStatsService.invalidate_headcount()
+
+
+class BenchmarkSuite:
+    """
+    Timed runs over the HRMS hot paths against the benchmark dataset
+    """
+
+    USERNAME = 'bench_admin'
+
+    def __init__(self, iterations: int = 20, seed: int = 42, end_year: int = 2025,
+                 only: Optional[List[str]] = None, log: Callable[[str], None] = None):
+        self.iterations = iterations
+        self.end_year = end_year
+        self.only = set(only or [])
+        self.log = log or (lambda message: None)
+        self.rng = random.Random(seed)
+        self.employee_ids = list(
+            Employee.objects.filter(employee_code__startswith=BenchmarkDataset.CODE_PREFIX, period_type='confirmed')
+            .order_by('pk').values_list('pk', flat=True)[:5000]
+        )
+        if not self.employee_ids:
+            raise ValueError('No benchmark dataset found; run with --generate first')
+
+    # ========================================================================
+    # RUNNER
+    # ========================================================================
+
+    def run(self) -> Dict:
+        host = 'testserver'
+        with override_settings(ALLOWED_HOSTS=list(settings.ALLOWED_HOSTS) + [host]):
+            self.client = Client()
+            self.client.force_login(self._bench_user())
+            results = {}
+            for name, func in self.benchmarks():
+                if self.only and name not in self.only:
+                    continue
+                self.log(f'  {name}')
+                results[name] = self._measure(func)
+        return {
+            'meta': {
+                'vendor': connection.vendor,
+                'iterations': self.iterations,
+                'employees': Employee.objects.filter(employee_code__startswith=BenchmarkDataset.CODE_PREFIX).count(),
+                'leave_applications': LeaveApplication.objects.count(),
+            },
+            'results': results,
+        }
+
+    def _measure(self, func: Callable[[], None]) -> Dict:
+        try:
+            func()  # Warm-up: import paths, template loading, caches
+        except ImportError as e:
+            return {'skipped': str(e)}
+        except Exception as e:
+            # One broken benchmark must not lose the results of the others
+            self.log(f'    failed: {type(e).__name__}: {e}')
+            return {'error': f'{type(e).__name__}: {e}'}
+
+        timings = []
+        queries = []
+        for _ in range(self.iterations):
+            with record_queries() as recorder:
+                start = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(recorder.count)
+        return {
+            'p50_ms': round(self._percentile(timings, 50), 3),
+            'p95_ms': round(self._percentile(timings, 95), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries_p50': self._percentile(queries, 50),
+            'queries_max': max(queries),
+        }
+
+    @staticmethod
+    def _percentile(values, percent):
+        ordered = sorted(values)
+        index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered) + 0.5)) - 1))
+        return ordered[index]
+
+    def _bench_user(self) -> User:
+        user, created = User.objects.get_or_create(
+            username=self.USERNAME, defaults={'is_staff': True, 'is_superuser': True, 'email': 'bench_admin@bench.example.com'}
+        )
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=['password'])
+        UserProfile.objects.update_or_create(user=user, defaults={'role': 'admin'})
+        return user
+
+    def _employee(self) -> Employee:
+        return Employee.objects.get(pk=self.rng.choice(self.employee_ids))
+
+    def _get(self, url, data=None):
+        response = self.client.get(url, data or {})
+        if getattr(response, 'streaming', False):
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    # ========================================================================
+    # BENCHMARKS
+    # ========================================================================
+
+    def benchmarks(self):
+        return [
+            ('leave_validation', self.bench_leave_validation),
+            ('leave_balance', self.bench_leave_balance),
+            ('calendar_feed', self.bench_calendar_feed),
+            ('csv_export', self.bench_csv_export),
+            ('csv_import', self.bench_csv_import),
+            ('payroll_calc', self.bench_payroll_calc),
+            ('payslip_pdf', self.bench_payslip_pdf),
+            ('api_employees_list', self.bench_api_employees_list),
+            ('api_employee_detail', self.bench_api_employee_detail),
+            ('api_org_chart', self.bench_api_org_chart),
+            ('api_inventory_search', self.bench_api_inventory_search),
+        ]
+
+    def _next_weekday(self) -> date:
+        day = date(self.end_year, 1, 1) + timedelta(days=self.rng.randrange(300))
+        while day.weekday() >= 5:
+            day += timedelta(days=1)
+        return day
+
+    def bench_leave_validation(self):
+        employee = self._employee()
+        day = self._next_weekday()
+        with transaction.atomic():
+            LeaveManagementService.process_leave_request(employee, {
+                'leave_type_code': 'casual', 'start_date': day, 'end_date': day,
+                'is_half_day': False, 'is_wfh': False, 'is_office': False,
+            })
+            transaction.set_rollback(True)
+
+    def bench_leave_balance(self):
+        LeaveManagementService.get_leave_balance(self._employee(), 'casual', self.end_year)
+
+    def bench_calendar_feed(self):
+        month = self.rng.randrange(1, 13)
+        start = date(self.end_year, month, 1)
+        self._get(reverse('employees:calendar_events'), {
+            'start': start.isoformat(), 'end': (start + timedelta(days=42)).isoformat(),
+        })
+
+    def bench_csv_export(self):
+        self._get(reverse('employees:export_employees_csv'))
+
+    def bench_csv_import(self, rows: int = 200):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow([
+            'Employee Code', 'Full Name', 'Department', 'Designation', 'Joining Date', 'Employment Status',
+            'Mobile Number', 'Official Email', 'Date of Birth', 'Marital Status', 'Highest Qualification',
+            'Period Type', 'Aadhar Card Number', 'PAN Card Number',
+        ])
+        base = self.rng.randrange(10 ** 6)
+        for i in range(rows):
+            n = base + i
+            writer.writerow([
+                f'BIMP{n:07d}', 'Import Bench', f'{BenchmarkDataset.CODE_PREFIX} Department 01',
+                f'{BenchmarkDataset.CODE_PREFIX} Grade 1 / D01', '2024-01-15', 'active', f'8{n:09d}',
+                f'import{n}@bench.example.com', '1990-05-20', 'single', 'BCA', 'confirmed',
+                f'{800000000000 + n}', f'BY{chr(65 + n % 26)}{chr(65 + n // 26 % 26)}{chr(65 + n // 676 % 26)}{n % 10000:04d}Y',
+            ])
+        # The view only enqueues; time the job handler on a stored upload instead
+        name = JobQueueService.store_upload(ContentFile(out.getvalue().encode('utf-8'), name='bench_import.csv'))
+        try:
+            with transaction.atomic():
+                job = BackgroundJob.objects.create(
+                    kind='import_employees_csv', status='running', run_after=timezone.now(),
+                    payload={'upload': name, 'filename': 'bench_import.csv'},
+                )
+                import_employees_csv(job, JobContext(job))
+                transaction.set_rollback(True)
+        finally:
+            job_storage().delete(name)
+
+    def bench_payroll_calc(self, employees: int = 500):
+        from salary.models import SalaryStructure
+
+        structure = SalaryStructure.objects.filter(name__startswith=BenchmarkDataset.CODE_PREFIX).first()
+        ids = self.rng.sample(self.employee_ids, min(employees, len(self.employee_ids)))
+        for ctc in Employee.objects.filter(pk__in=ids).values_list('current_ctc', flat=True):
+            structure.calculate_components((ctc / 12).quantize(Decimal('0.01')))
+
+    def bench_payslip_pdf(self):
+        import xhtml2pdf  # noqa: F401 - skip the benchmark when the PDF engine is missing
+
+        employee = Employee.objects.select_related('department', 'designation').get(
+            pk=self.rng.choice(self.employee_ids)
+        )
+        PayslipService.render_pdf(employee, 'March', self.end_year)
+
+    def bench_api_employees_list(self):
+        self._get(reverse('employees:api_employees_list'), {'search': self.rng.choice(BenchmarkDataset.FIRST_NAMES)})
+
+    def bench_api_employee_detail(self):
+        self._get(reverse('employees:api_employee_detail', args=[self.rng.choice(self.employee_ids)]))
+
+    def bench_api_org_chart(self):
+        self._get(reverse('employees:api_org_chart'))
+
+    def bench_api_inventory_search(self):
+        self._get(reverse('employees:api_inventory_search'), {'q': f'{BenchmarkDataset.SERIAL_PREFIX}CPU00'})
@@ -0,0 +1,513 @@
+"""
+Streaming bulk-import engine shared by the CSV/XLSX importers.
+
+An ImportSchema declares the columns of a file, how each cell is parsed and
+validated, and which model fields identify an existing record. BulkImporter
+streams the upload row by row (csv.reader, or openpyxl in read-only mode for
+.xlsx) and works in chunks: the keys of a chunk are looked up with one
+``key__in`` query, new rows are written with bulk_create and matched rows
+with bulk_update. Rejected rows are copied, with the reason, to an error CSV
+that can be downloaded and re-imported once fixed.
+"""
+import csv
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from io import TextIOWrapper
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+MAX_REPORTED_ERRORS = 50
+DEFAULT_CHUNK_SIZE = 500
+XLSX_EXTENSIONS = ('.xlsx', '.xlsm')
+IMPORT_EXTENSIONS = ('.csv',) + XLSX_EXTENSIONS
+
+
+class ImportRowError(ValueError):
+    """A row failed validation; the message is reported against the row"""
+
+
+# ============================================================================
+# CELL PARSERS
+# ============================================================================
+
+def parse_text(value: str):
+    return value
+
+
+def parse_upper(value: str):
+    return value.upper()
+
+
+def parse_date(value: str):
+    """ISO dates (YYYY-MM-DD); spreadsheet date cells arrive already formatted"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ImportRowError(f"'{value}' is not a date in YYYY-MM-DD format")
+
+
+def parse_int(value: str):
+    try:
+        return int(Decimal(value))
+    except (InvalidOperation, ValueError):
+        raise ImportRowError(f"'{value}' is not a whole number")
+
+
+def parse_decimal(value: str):
+    try:
+        return Decimal(value.replace(',', ''))
+    except InvalidOperation:
+        raise ImportRowError(f"'{value}' is not a number")
+
+
+def parse_bool(value: str):
+    return value.lower() in ('yes', 'true', '1', 'active', 'y')
+
+
+class Column:
+    """
+    One column of an import file.
+
+    Args:
+        header: Column title in the file (matched case-insensitively)
+        field: Model field the parsed value is stored in (None for helper columns)
+        parser: Callable turning the stripped cell text into a value
+        required: Reject rows where the cell is empty
+        default: Value used when the cell is empty
+        secret: Blank the cell in the error file of rejected rows (passwords)
+    """
+
+    def __init__(self, header: str, field: Optional[str] = None, parser: Callable = parse_text,
+                 required: bool = False, default=None, secret: bool = False):
+        self.header = header
+        self.field = field
+        self.parser = parser
+        self.required = required
+        self.default = default
+        self.secret = secret
+
+    def parse(self, raw: str):
+        if raw == '':
+            if self.required:
+                raise ImportRowError(f'{self.header} is required')
+            return self.default
+        return self.parser(raw)
+
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+class ImportSchema:
+    """
+    Declarative description of an importer; subclass per model.
+
+    Attributes:
+        model: Model the rows are written to
+        columns: Column declarations, in file order
+        key: Model fields identifying an existing record (empty for none)
+        on_existing: 'update' or 'skip' rows whose key already exists,
+            or 'create' to insert every row without looking keys up
+        update_fields: Fields written to matched records (defaults to
+            every column field that is not part of the key)
+        positional: Read columns by position instead of by header title
+        noun: Used in the result message
+    """
+
+    model = None
+    columns: List[Column] = []
+    key: Tuple[str, ...] = ()
+    on_existing = 'update'
+    update_fields: Optional[List[str]] = None
+    positional = False
+    noun = 'record'
+
+    def __init__(self, user=None, **options):
+        self.user = user
+        self.options = options
+
+    def get_on_existing(self) -> str:
+        return self.on_existing
+
+    def get_update_fields(self) -> List[str]:
+        if self.update_fields is not None:
+            return list(self.update_fields)
+        return [c.field for c in self.columns if c.field and c.field not in self.key]
+
+    def clean(self, values: Dict, row: Dict) -> Dict:
+        """
+        Row-level validation and derived values after each cell was parsed.
+
+        Args:
+            values: Parsed values keyed by column field (or header for helper columns)
+            row: Raw cell text keyed by column header
+        """
+        return values
+
+    def prepare_chunk(self, rows: List[Dict]) -> None:
+        """Resolve lookups for a whole chunk at once (e.g. foreign keys by name)"""
+
+    def build(self, values: Dict):
+        """Model instance for a cleaned row"""
+        fields = {name: value for name, value in values.items() if name in self._model_fields()}
+        return self.model(**fields)
+
+    def finish(self, report: 'ImportReport') -> None:
+        """Called after the last chunk, e.g. to invalidate caches skipped by bulk writes"""
+
+    def _model_fields(self):
+        if not hasattr(self, '_field_names'):
+            self._field_names = {f.name for f in self.model._meta.concrete_fields}
+        return self._field_names
+
+    def field_validators(self) -> Dict[str, Callable]:
+        """max_length and choices checks derived from the model fields"""
+        checks = {}
+        for column in self.columns:
+            if not column.field or column.field not in self._model_fields():
+                continue
+            model_field = self.model._meta.get_field(column.field)
+            checks[column.field] = _field_check(column.header, model_field)
+        return checks
+
+
+def _field_check(header, model_field):
+    max_length = model_field.max_length if isinstance(model_field.max_length, int) else None
+    choices = {str(value) for value, _ in model_field.flatchoices} if model_field.choices else None
+
+    def check(value):
+        if value is None or value == '':
+            return
+        if max_length and isinstance(value, str) and len(value) > max_length:
+            raise ImportRowError(f'{header} must be at most {max_length} characters')
+        if choices and str(value) not in choices:
+            raise ImportRowError(f"{header} '{value}' is not one of: {', '.join(sorted(choices))}")
+    return check
+
+
+# ============================================================================
+# READERS
+# ============================================================================
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        value = value.date() if not (value.hour or value.minute or value.second) else value
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def is_spreadsheet(filename: str) -> bool:
+    return os.path.splitext(filename or '')[1].lower() in XLSX_EXTENSIONS
+
+
+def iter_table(fileobj, filename: str) -> Iterator[List[str]]:
+    """
+    Rows of an uploaded CSV or XLSX file as lists of stripped cell text,
+    header row first. Only the current row is held in memory.
+    """
+    if is_spreadsheet(filename):
+        import openpyxl
+
+        wb = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+        try:
+            for cells in wb.worksheets[0].iter_rows(values_only=True):
+                yield [_cell_text(cell) for cell in cells]
+        finally:
+            wb.close()
+    else:
+        for cells in csv.reader(TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')):
+            yield [cell.strip() for cell in cells]
+
+
+def count_rows(fileobj, filename: str) -> int:
+    """Data rows in the file (minus the header), for progress reporting"""
+    if is_spreadsheet(filename):
+        import openpyxl
+
+        wb = openpyxl.load_workbook(fileobj, read_only=True)
+        try:
+            return max((wb.worksheets[0].max_row or 1) - 1, 0)
+        finally:
+            wb.close()
+    return max(sum(1 for _ in fileobj) - 1, 0)
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+class ImportReport:
+    """Per-row outcomes of an import, plus the error file of rejected rows"""
+
+    def __init__(self, noun: str, header: Sequence[str] = (), secret_positions: Iterable[int] = ()):
+        self.noun = noun
+        self.success = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors: List[str] = []
+        self.header = list(header)
+        # Cells never copied into the error file
+        self.secret_positions = set(secret_positions)
+        self.error_file = None
+        self._error_writer = None
+
+    def error(self, row_num: int, exc, cells: Sequence[str] = None) -> None:
+        self.errors.append(f"Row {row_num}: {exc}")
+        if cells is None:
+            return
+        if self._error_writer is None:
+            self.error_file = tempfile.TemporaryFile(mode='w+', encoding='utf-8', newline='')
+            self._error_writer = csv.writer(self.error_file)
+            self._error_writer.writerow(['Row', *self.header, 'Error'])
+        cells = ['' if i in self.secret_positions else cell for i, cell in enumerate(cells)]
+        self._error_writer.writerow([row_num, *cells, str(exc)])
+
+    def error_file_bytes(self) -> Optional[bytes]:
+        if self.error_file is None:
+            return None
+        self.error_file.seek(0)
+        return self.error_file.read().encode('utf-8')
+
+    def close(self) -> None:
+        if self.error_file is not None:
+            self.error_file.close()
+            self.error_file = None
+
+    def result(self) -> Dict:
+        message = f'Successfully imported {self.success} {self.noun}(s).'
+        if self.updated:
+            message += f' {self.created} created, {self.updated} updated.'
+        if self.skipped:
+            message += f' {self.skipped} {self.noun}(s) were skipped.'
+        if self.errors:
+            message += f' Failed to import {len(self.errors)} {self.noun}(s).'
+        return {
+            'message': message,
+            'imported': self.success,
+            'created': self.created,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'error_count': len(self.errors),
+            'errors': self.errors[:MAX_REPORTED_ERRORS],
+        }
+
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+class BulkImporter:
+    """
+    Run an ImportSchema over an uploaded file.
+
+    Usage:
+        importer = BulkImporter(PublicHolidayImportSchema(user=request.user))
+        with open(path, 'rb') as f:
+            report = importer.run(f, 'holidays.xlsx')
+    """
+
+    def __init__(self, schema: ImportSchema, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.schema = schema
+        self.chunk_size = chunk_size
+        self.checks = schema.field_validators()
+        self.key_fields = [schema.model._meta.get_field(name) for name in schema.key]
+        self.update_fields = schema.get_update_fields()
+        # bulk_update() does not run pre_save(), so touch auto_now fields explicitly
+        self.auto_now_fields = [
+            f.name for f in schema.model._meta.concrete_fields if getattr(f, 'auto_now', False)
+        ]
+
+    def run(self, fileobj, filename: str, progress: Callable = None, total: int = None) -> ImportReport:
+        """
+        Import every row of the file.
+
+        Args:
+            fileobj: Binary file object positioned at the start
+            filename: Original name; '.xlsx' selects the spreadsheet reader
+            progress: Optional callable(done, total, message) called per chunk
+            total: Row count for progress messages
+
+        Returns:
+            ImportReport; its error file must be closed by the caller
+        """
+        rows = iter_table(fileobj, filename)
+        header = next(rows, None)
+        if header is None:
+            raise ImportRowError('The file is empty')
+        positions = self._column_positions(header)
+        secret_positions = [
+            positions[column.header] for column in self.schema.columns
+            if column.secret and column.header in positions
+        ]
+        report = ImportReport(self.schema.noun, header, secret_positions)
+
+        chunk = []
+        done = 0
+        for row_num, cells in enumerate(rows, start=2):
+            if not any(cells):
+                continue
+            chunk.append((row_num, cells))
+            if len(chunk) >= self.chunk_size:
+                self._process_chunk(chunk, positions, report)
+                done += len(chunk)
+                chunk = []
+                if progress:
+                    progress(done, total, f'Row {done} of {total}' if total else f'Row {done}')
+        if chunk:
+            self._process_chunk(chunk, positions, report)
+
+        self.schema.finish(report)
+        return report
+
+    def _column_positions(self, header: List[str]) -> Dict[str, int]:
+        columns = self.schema.columns
+        if self.schema.positional:
+            return {column.header: index for index, column in enumerate(columns)}
+
+        index = {title.strip().lower(): i for i, title in enumerate(header)}
+        positions = {}
+        missing = []
+        for column in columns:
+            position = index.get(column.header.lower())
+            if position is None:
+                if column.required:
+                    missing.append(column.header)
+                continue
+            positions[column.header] = position
+        if missing:
+            raise ImportRowError(f"Missing required column(s): {', '.join(missing)}")
+        return positions
+
+    def _parse(self, cells: List[str], positions: Dict[str, int]) -> Dict:
+        if self.schema.positional and len(cells) < len(self.schema.columns):
+            raise ImportRowError(f'Expected {len(self.schema.columns)} columns, found {len(cells)}')
+
+        raw = {}
+        values = {}
+        for column in self.schema.columns:
+            position = positions.get(column.header)
+            text = cells[position] if position is not None and position < len(cells) else ''
+            raw[column.header] = text
+            value = column.parse(text)
+            name = column.field or column.header
+            if name in self.checks:
+                self.checks[name](value)
+            values[name] = value
+        return self.schema.clean(values, raw)
+
+    def _process_chunk(self, chunk, positions, report: ImportReport) -> None:
+        parsed = []
+        for row_num, cells in chunk:
+            try:
+                parsed.append((row_num, cells, self._parse(cells, positions)))
+            except (ImportRowError, ValueError) as e:
+                report.error(row_num, e, cells)
+
+        if not parsed:
+            return
+        try:
+            self.schema.prepare_chunk([values for _, _, values in parsed])
+        except DatabaseError as e:
+            for row_num, cells, _ in parsed:
+                report.error(row_num, e, cells)
+            return
+
+        instances = []
+        for row_num, cells, values in parsed:
+            try:
+                instances.append((row_num, cells, self.schema.build(values)))
+            except (ImportRowError, ValueError) as e:
+                report.error(row_num, e, cells)
+
+        creates, updates = self._match_existing(instances, report)
+        try:
+            with transaction.atomic():
+                self._write(creates, updates)
+        except DatabaseError:
+            # Isolate the offending rows; everything else in the chunk still lands
+            for entry in creates:
+                entry[2].pk = None
+                self._write_one(entry, report, update=False)
+            for entry in updates:
+                self._write_one(entry, report, update=True)
+            return
+        report.created += len(creates)
+        report.updated += len(updates)
+        report.success += len(creates) + len(updates)
+
+    def _key_of(self, instance) -> tuple:
+        return tuple(getattr(instance, field.attname) for field in self.key_fields)
+
+    def _match_existing(self, instances, report: ImportReport):
+        """Split a chunk into inserts and updates with one key__in lookup"""
+        mode = self.schema.get_on_existing()
+        if mode == 'create' or not self.key_fields:
+            return instances, []
+
+        # A key repeated within the chunk: the last row wins, or the repeat is
+        # skipped; either way the row not written counts as skipped
+        by_key = {}
+        for entry in instances:
+            key = self._key_of(entry[2])
+            if key in by_key:
+                report.skipped += 1
+                if mode == 'skip':
+                    continue
+            by_key[key] = entry
+
+        first = self.key_fields[0]
+        existing = {}
+        lookup = {f'{first.attname}__in': {key[0] for key in by_key}}
+        names = [field.attname for field in self.key_fields]
+        for row in self.schema.model.objects.filter(**lookup).values_list(*names, 'pk'):
+            existing.setdefault(tuple(row[:-1]), row[-1])
+
+        creates, updates = [], []
+        for key, entry in by_key.items():
+            pk = existing.get(key)
+            if pk is None:
+                creates.append(entry)
+            elif mode == 'skip':
+                report.skipped += 1
+            else:
+                entry[2].pk = pk
+                updates.append(entry)
+        return creates, updates
+
+    def _write(self, creates, updates) -> None:
+        model = self.schema.model
+        if creates:
+            model.objects.bulk_create([instance for _, _, instance in creates], batch_size=self.chunk_size)
+        if updates:
+            fields = list(self.update_fields)
+            if self.auto_now_fields:
+                now = timezone.now()
+                for _, _, instance in updates:
+                    for name in self.auto_now_fields:
+                        setattr(instance, name, now)
+                fields += [name for name in self.auto_now_fields if name not in fields]
+            model.objects.bulk_update([instance for _, _, instance in updates], fields, batch_size=self.chunk_size)
+
+    def _write_one(self, entry, report: ImportReport, update: bool) -> None:
+        row_num, cells, instance = entry
+        try:
+            with transaction.atomic():
+                self._write([] if update else [entry], [entry] if update else [])
+        except DatabaseError as e:
+            report.error(row_num, e, cells)
+            return
+        report.success += 1
+        if update:
+            report.updated += 1
+        else:
+            report.created += 1
@@ -0,0 +1,130 @@
+"""
+Hi-lo allocation of employee codes.
+
+Codes come from the "employee_code" CodeSequence row. A reservation bumps
+the counter by a block size with a single UPDATE, which also locks the row
+until the reservation commits, and hands the block out without further
+queries. Single saves draw from a per-process block; bulk callers reserve
+exactly what they need with reserve(). Codes that were typed in by hand are
+skipped with one ``__in`` check per block, so a reserved code never hits the
+unique constraint. Codes of a block that a process never used are simply not
+issued, leaving gaps in the numbering.
+"""
+import re
+import threading
+from typing import List
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Length
+
+from .models import CodeSequence
+
+SEQUENCE_NAME = 'employee_code'
+CODE_PREFIX = 'EM'
+CODE_PATTERN = re.compile(rf'^{CODE_PREFIX}(\d+)$')
+DEFAULT_BLOCK_SIZE = 20
+
+
+def format_code(value: int) -> str:
+    """EM0001, EM0002, ... (more digits once past 9999)"""
+    return f'{CODE_PREFIX}{value:04d}'
+
+
+class EmployeeCodeAllocator:
+    """
+    Service class handing out unique employee codes
+    """
+
+    _lock = threading.Lock()
+    _block: List[str] = []
+
+    # ========================================================================
+    # RESERVATION
+    # ========================================================================
+
+    @staticmethod
+    def _reserve_values(count: int) -> range:
+        """Advance the sequence by `count` and return the reserved values"""
+        with transaction.atomic():
+            updated = CodeSequence.objects.filter(name=SEQUENCE_NAME).update(
+                next_value=F('next_value') + count
+            )
+            if not updated:
+                EmployeeCodeAllocator._create_sequence()
+                CodeSequence.objects.filter(name=SEQUENCE_NAME).update(next_value=F('next_value') + count)
+            # The UPDATE holds the row lock, so this read sees our own increment
+            end = CodeSequence.objects.filter(name=SEQUENCE_NAME).values_list('next_value', flat=True).get()
+        return range(end - count, end)
+
+    @staticmethod
+    def _create_sequence() -> None:
+        """Start the sequence after the highest EM code already in use"""
+        from .models import Employee
+
+        latest = (
+            Employee.objects.filter(employee_code__regex=rf'^{CODE_PREFIX}[0-9]+$')
+            .order_by(Length('employee_code').desc(), '-employee_code')
+            .values_list('employee_code', flat=True)
+            .first()
+        )
+        start = int(CODE_PATTERN.match(latest).group(1)) + 1 if latest else 1
+        try:
+            with transaction.atomic():
+                CodeSequence.objects.create(name=SEQUENCE_NAME, next_value=start)
+        except IntegrityError:
+            pass  # Another process created it first
+
+    @staticmethod
+    def reserve(count: int) -> List[str]:
+        """
+        Reserve `count` unused codes, e.g. for Employee.objects.bulk_create().
+
+        Returns:
+            Codes in ascending order
+        """
+        from .models import Employee
+
+        codes: List[str] = []
+        while len(codes) < count:
+            candidates = [format_code(value) for value in EmployeeCodeAllocator._reserve_values(count - len(codes))]
+            taken = set(Employee.objects.filter(employee_code__in=candidates).values_list('employee_code', flat=True))
+            codes.extend(code for code in candidates if code not in taken)
+        return codes
+
+    @staticmethod
+    def assign(employees) -> None:
+        """Fill in the missing codes of unsaved employees with one reservation"""
+        pending = [employee for employee in employees if not employee.employee_code]
+        for employee, code in zip(pending, EmployeeCodeAllocator.reserve(len(pending))):
+            employee.employee_code = code
+
+    # ========================================================================
+    # SINGLE CODES
+    # ========================================================================
+
+    @staticmethod
+    def next_code() -> str:
+        """
+        One code for Employee.save().
+
+        Outside a transaction the code comes from this process's block. Inside
+        one, the reservation could still be rolled back and its values reissued
+        by another process, so exactly one code is reserved and nothing is
+        cached.
+        """
+        if connection.in_atomic_block:
+            return EmployeeCodeAllocator.reserve(1)[0]
+
+        with EmployeeCodeAllocator._lock:
+            if not EmployeeCodeAllocator._block:
+                size = getattr(settings, 'EMPLOYEE_CODE_BLOCK_SIZE', DEFAULT_BLOCK_SIZE)
+                EmployeeCodeAllocator._block = list(reversed(EmployeeCodeAllocator.reserve(size)))
+            return EmployeeCodeAllocator._block.pop()
+
+    @staticmethod
+    def reset_block() -> None:
+        """Forget the cached block (tests, or after the sequence was changed by hand)"""
+        with EmployeeCodeAllocator._lock:
+            EmployeeCodeAllocator._block = []
@@ -2,6 +2,7 @@ from functools import wraps
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.http import HttpResponseForbidden
+from .identity import get_identity
 
 def role_required(allowed_roles=[]):
     """
@@ -14,16 +15,14 @@ def role_required(allowed_roles=[]):
                 messages.error(request, 'You must be logged in to access this page.')
                 return redirect('login')
 
-            try:
-                user_profile = request.user.profile
-                if user_profile.role in allowed_roles:
-                    return view_func(request, *args, **kwargs)
-                else:
-                    messages.error(request, 'You do not have permission to access this page.')
-                    return redirect('employees:employee_list')
-            except AttributeError:
+            identity = get_identity(request)
+            if not identity.has_profile:
                 messages.error(request, 'User profile not found. Please contact administrator.')
                 return redirect('employees:employee_list')
+            if identity.role in allowed_roles:
+                return view_func(request, *args, **kwargs)
+            messages.error(request, 'You do not have permission to access this page.')
+            return redirect('employees:employee_list')
 
         return wrapper
     return decorator
@@ -87,16 +86,14 @@ def can_manage_employees(view_func):
             messages.error(request, 'You must be logged in to access this page.')
             return redirect('login')
 
-        try:
-            user_profile = request.user.profile
-            if user_profile.can_manage_employees:
-                return view_func(request, *args, **kwargs)
-            else:
-                messages.error(request, 'You do not have permission to manage employees.')
-                return redirect('employees:employee_list')
-        except AttributeError:
+        identity = get_identity(request)
+        if not identity.has_profile:
             messages.error(request, 'User profile not found. Please contact administrator.')
             return redirect('employees:employee_list')
+        if identity.can_manage_employees:
+            return view_func(request, *args, **kwargs)
+        messages.error(request, 'You do not have permission to manage employees.')
+        return redirect('employees:employee_list')
 
     return wrapper
 
@@ -110,16 +107,14 @@ def can_view_all_employees(view_func):
             messages.error(request, 'You must be logged in to access this page.')
             return redirect('login')
 
-        try:
-            user_profile = request.user.profile
-            if user_profile.can_view_all_employees:
-                return view_func(request, *args, **kwargs)
-            else:
-                messages.error(request, 'You do not have permission to view all employees.')
-                return redirect('employees:employee_list')
-        except AttributeError:
+        identity = get_identity(request)
+        if not identity.has_profile:
             messages.error(request, 'User profile not found. Please contact administrator.')
             return redirect('employees:employee_list')
+        if identity.can_view_all_employees:
+            return view_func(request, *args, **kwargs)
+        messages.error(request, 'You do not have permission to view all employees.')
+        return redirect('employees:employee_list')
 
     return wrapper
 
@@ -133,15 +128,13 @@ def can_manage_system(view_func):
             messages.error(request, 'You must be logged in to access this page.')
             return redirect('login')
 
-        try:
-            user_profile = request.user.profile
-            if user_profile.can_manage_system:
-                return view_func(request, *args, **kwargs)
-            else:
-                messages.error(request, 'You do not have permission to access system settings.')
-                return redirect('employees:employee_list')
-        except AttributeError:
+        identity = get_identity(request)
+        if not identity.has_profile:
             messages.error(request, 'User profile not found. Please contact administrator.')
             return redirect('employees:employee_list')
+        if identity.can_manage_system:
+            return view_func(request, *args, **kwargs)
+        messages.error(request, 'You do not have permission to access system settings.')
+        return redirect('employees:employee_list')
 
     return wrapper
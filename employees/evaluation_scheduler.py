@@ -0,0 +1,257 @@
+# Evaluation Scheduler Service
+# Maintains the per-manager overdue / due-soon buckets read by the evaluation
+# dashboards and sends batched reminder emails to assigned managers.
+#
+# The pending queue is served by the (status, due_date, assigned_manager)
+# index on PerformanceEvaluation. refresh_buckets() folds it into
+# EvaluationDueBucket rows (per manager and evaluation category) with one
+# grouped query; it runs from the run_evaluation_scheduler command (daily, or
+# in a loop), for the affected managers only from the PerformanceEvaluation
+# signals, and from the first dashboard read of a new day, since evaluations
+# move between buckets when the date rolls over without any row changing.
+
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .models_performance import PerformanceEvaluation, EvaluationDueBucket
+
+
+class EvaluationSchedulerService:
+    """
+    Service class for evaluation due-date buckets and reminders
+    """
+
+    UPCOMING_DAYS = 7            # Pending evaluations due within this many days are "due soon"
+    REMINDER_INTERVAL_DAYS = 3   # Minimum gap between reminders for the same evaluation
+    EMAIL_BATCH_SIZE = 50        # Messages sent per SMTP connection
+
+    # Day of the last full bucket refresh
+    REFRESHED_FOR_CACHE_KEY = 'evaluation_buckets:refreshed_for'
+    REFRESH_LOCK_CACHE_KEY = 'evaluation_buckets:refresh_lock'
+
+    # ========================================================================
+    # QUEUE
+    # ========================================================================
+
+    @staticmethod
+    def due_queue(today: Optional[date] = None):
+        """Pending evaluations that are overdue or due soon (index range scan)"""
+        today = today or timezone.localdate()
+        return PerformanceEvaluation.objects.filter(
+            status='pending',
+            due_date__lte=today + timedelta(days=EvaluationSchedulerService.UPCOMING_DAYS),
+        )
+
+    # ========================================================================
+    # BUCKETS
+    # ========================================================================
+
+    @staticmethod
+    @transaction.atomic
+    def refresh_buckets(today: Optional[date] = None, manager_ids: Optional[Iterable] = None) -> int:
+        """
+        Recompute due buckets from one grouped query.
+
+        Args:
+            today: Day bucket boundaries are computed for
+            manager_ids: Only refresh these managers (None means unassigned);
+                         all managers when omitted
+
+        Returns:
+            Number of bucket rows written
+        """
+        today = today or timezone.localdate()
+        queue = EvaluationSchedulerService.due_queue(today)
+        buckets = EvaluationDueBucket.objects.all()
+
+        if manager_ids is not None:
+            manager_ids = set(manager_ids)
+            scope = Q(pk__in=[])
+            bucket_scope = Q(pk__in=[])
+            if None in manager_ids:
+                scope |= Q(assigned_manager__isnull=True)
+                bucket_scope |= Q(manager__isnull=True)
+            ids = [pk for pk in manager_ids if pk is not None]
+            if ids:
+                scope |= Q(assigned_manager_id__in=ids)
+                bucket_scope |= Q(manager_id__in=ids)
+            queue = queue.filter(scope)
+            buckets = buckets.filter(bucket_scope)
+
+        overdue = Q(due_date__lt=today)
+        rows = queue.order_by().values('assigned_manager_id', 'category').annotate(
+            overdue_count=Count('id', filter=overdue),
+            overdue_oldest=Min('due_date', filter=overdue),
+            due_soon_count=Count('id', filter=~overdue),
+            due_soon_oldest=Min('due_date', filter=~overdue),
+        )
+
+        new_buckets = []
+        for row in rows:
+            for bucket in ('overdue', 'due_soon'):
+                if row[f'{bucket}_count']:
+                    new_buckets.append(EvaluationDueBucket(
+                        manager_id=row['assigned_manager_id'],
+                        category=row['category'],
+                        bucket=bucket,
+                        evaluation_count=row[f'{bucket}_count'],
+                        oldest_due_date=row[f'{bucket}_oldest'],
+                        computed_for=today,
+                    ))
+
+        buckets.delete()
+        EvaluationDueBucket.objects.bulk_create(new_buckets)
+        if manager_ids is None:
+            transaction.on_commit(
+                lambda: cache.set(EvaluationSchedulerService.REFRESHED_FOR_CACHE_KEY, today, 2 * 24 * 60 * 60)
+            )
+        return len(new_buckets)
+
+    @staticmethod
+    def ensure_current(today: Optional[date] = None) -> None:
+        """Rebuild all buckets if they were last fully computed before today"""
+        today = today or timezone.localdate()
+        if cache.get(EvaluationSchedulerService.REFRESHED_FOR_CACHE_KEY) == today:
+            return
+        # One request rebuilds; the others read yesterday's buckets meanwhile
+        if not cache.add(EvaluationSchedulerService.REFRESH_LOCK_CACHE_KEY, True, 60):
+            return
+        try:
+            EvaluationSchedulerService.refresh_buckets(today)
+        finally:
+            cache.delete(EvaluationSchedulerService.REFRESH_LOCK_CACHE_KEY)
+
+    @staticmethod
+    def get_buckets(category: Optional[str] = None, scope: Optional[Q] = None) -> Dict:
+        """
+        Bucket summary for a dashboard.
+
+        Without a scope (admin, HR, director) the totals come from the bucket
+        rows of all managers. Dashboards restricted to a subset of
+        evaluations (a manager's assigned and team evaluations, an employee's
+        own) pass the same scope as their list; those counts are grouped
+        straight from the pending queue, since buckets are kept per assigned
+        manager only.
+
+        Args:
+            category: Only count this evaluation category (all when omitted)
+            scope: Q over PerformanceEvaluation matching the dashboard's list
+
+        Returns:
+            {'overdue': n, 'due_soon': n, 'overdue_oldest': date|None, 'computed_for': date|None}
+        """
+        today = timezone.localdate()
+        summary = {'overdue': 0, 'due_soon': 0, 'overdue_oldest': None, 'computed_for': None}
+
+        if scope is not None:
+            queue = EvaluationSchedulerService.due_queue(today).filter(scope)
+            if category:
+                queue = queue.filter(category=category)
+            overdue = Q(due_date__lt=today)
+            row = queue.order_by().aggregate(
+                overdue=Count('id', filter=overdue),
+                overdue_oldest=Min('due_date', filter=overdue),
+                due_soon=Count('id', filter=~overdue),
+            )
+            summary.update(row, computed_for=today)
+            return summary
+
+        EvaluationSchedulerService.ensure_current(today)
+        buckets = EvaluationDueBucket.objects.all()
+        if category:
+            buckets = buckets.filter(category=category)
+        rows = buckets.order_by().values('bucket').annotate(
+            total=Sum('evaluation_count'), oldest=Min('oldest_due_date'), computed_for=Min('computed_for')
+        )
+        for row in rows:
+            summary[row['bucket']] = row['total'] or 0
+            if row['bucket'] == 'overdue':
+                summary['overdue_oldest'] = row['oldest']
+            summary['computed_for'] = row['computed_for']
+        return summary
+
+    @staticmethod
+    def overdue_filter(today: Optional[date] = None) -> Q:
+        """Filter for the dashboards' "overdue" status; the same predicate the buckets count"""
+        today = today or timezone.localdate()
+        return Q(status='pending', due_date__lt=today)
+
+    # ========================================================================
+    # REMINDERS
+    # ========================================================================
+
+    @staticmethod
+    def send_reminders(today: Optional[date] = None, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Email each assigned manager one digest of their overdue and due-soon evaluations.
+
+        Evaluations reminded within REMINDER_INTERVAL_DAYS are skipped, so the
+        job can run several times a day. Messages are sent over shared SMTP
+        connections in batches of EMAIL_BATCH_SIZE, and last_reminded_at is
+        stamped with one UPDATE.
+
+        Returns:
+            {'managers': n, 'evaluations': n, 'sent': n}
+        """
+        today = today or timezone.localdate()
+        now = timezone.now()
+        cutoff = now - timedelta(days=EvaluationSchedulerService.REMINDER_INTERVAL_DAYS)
+
+        evaluations = EvaluationSchedulerService.due_queue(today).filter(
+            assigned_manager__isnull=False,
+        ).filter(
+            Q(last_reminded_at__isnull=True) | Q(last_reminded_at__lt=cutoff)
+        ).exclude(assigned_manager__email='').select_related(
+            'employee', 'assigned_manager'
+        ).order_by('assigned_manager_id', 'due_date')
+
+        by_manager = defaultdict(list)
+        for evaluation in evaluations:
+            by_manager[evaluation.assigned_manager].append(evaluation)
+
+        messages = []
+        reminded_ids = []
+        for manager, items in by_manager.items():
+            context = {
+                'manager_name': manager.get_full_name() or manager.username,
+                'overdue': [e for e in items if e.due_date < today],
+                'due_soon': [e for e in items if e.due_date >= today],
+            }
+            subject = f"Pending performance evaluations: {len(context['overdue'])} overdue, {len(context['due_soon'])} due soon"
+            messages.append(EmailMessage(
+                subject,
+                render_to_string('emails/evaluation_reminder.txt', context),
+                settings.DEFAULT_FROM_EMAIL,
+                [manager.email],
+            ))
+            reminded_ids.extend(e.pk for e in items)
+
+        sent = 0
+        if not dry_run and messages:
+            batch_size = EvaluationSchedulerService.EMAIL_BATCH_SIZE
+            for start in range(0, len(messages), batch_size):
+                with get_connection() as mail_connection:
+                    sent += mail_connection.send_messages(messages[start:start + batch_size]) or 0
+            PerformanceEvaluation.objects.filter(pk__in=reminded_ids).update(last_reminded_at=now)
+
+        return {'managers': len(messages), 'evaluations': len(reminded_ids), 'sent': sent}
+
+    # ========================================================================
+    # SCHEDULED RUN
+    # ========================================================================
+
+    @staticmethod
+    def run(today: Optional[date] = None, send_reminders: bool = True, dry_run: bool = False) -> Dict[str, int]:
+        """Daily job: rebuild all buckets, then send reminders"""
+        today = today or timezone.localdate()
+        result = {'buckets': EvaluationSchedulerService.refresh_buckets(today)}
+        if send_reminders:
+            result.update(EvaluationSchedulerService.send_reminders(today, dry_run=dry_run))
+        return result
@@ -0,0 +1,209 @@
+# Evaluation Cycle Service
+# Creates the PerformanceEvaluation cycles implied by an employee's period
+# type and joining date, for one employee (from the post_save signal) or for
+# many at once (CSV imports, the backfill_evaluation_cycles command).
+#
+# Existing cycles are read in one query per batch; missing cycles and their
+# EvaluationAuditLog rows are inserted with bulk_create, and pending cycles
+# whose dates no longer match the joining date are rescheduled with bulk_update.
+# Bulk writes send no post_save, so the due buckets of the affected managers
+# are refreshed here once the transaction commits.
+
+from datetime import date, timedelta
+import calendar
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from django.db import connection, transaction
+from .models_performance import PerformanceEvaluation, EvaluationAuditLog
+
+
+class CycleSubject(NamedTuple):
+    """The employee fields that determine evaluation cycles"""
+    employee_id: int
+    period_type: str
+    joining_date: Optional[date]
+
+
+class EvaluationCycleService:
+    """
+    Service class for automatic performance evaluation cycles
+
+    Trainee/Intern: 3 cycles after every 2 months.
+    Probation: 3 cycles, every month for 3 months.
+    """
+
+    # period_type -> (evaluation category, months per cycle)
+    CYCLE_RULES = {
+        'trainee': ('trainee_intern', 2),
+        'intern': ('trainee_intern', 2),
+        'probation': ('probation', 1),
+    }
+    CYCLE_COUNT = 3
+    DUE_AFTER_DAYS = 7  # Due date logic: 1 week after period ends
+
+    # Employee fields whose change requires recomputing cycles
+    TRACKED_FIELDS = ('period_type', 'joining_date')
+
+    # ========================================================================
+    # PLANNING
+    # ========================================================================
+
+    @staticmethod
+    def add_months(sourcedate: date, months: int) -> date:
+        month = sourcedate.month - 1 + months
+        year = sourcedate.year + month // 12
+        month = month % 12 + 1
+        day = min(sourcedate.day, calendar.monthrange(year, month)[1])
+        return date(year, month, day)
+
+    @staticmethod
+    def plan(subject: CycleSubject) -> List[Dict]:
+        """Expected cycles for an employee; empty when no evaluations apply"""
+        rule = EvaluationCycleService.CYCLE_RULES.get(subject.period_type)
+        if not rule or not subject.joining_date:
+            return []
+        category, interval_months = rule
+        add_months = EvaluationCycleService.add_months
+        cycles = []
+        for i in range(1, EvaluationCycleService.CYCLE_COUNT + 1):
+            period_end = add_months(subject.joining_date, interval_months * i)
+            cycles.append({
+                'category': category,
+                'cycle_number': i,
+                'period_start': add_months(subject.joining_date, interval_months * (i - 1)),
+                'period_end': period_end,
+                'due_date': period_end + timedelta(days=EvaluationCycleService.DUE_AFTER_DAYS),
+            })
+        return cycles
+
+    # ========================================================================
+    # SYNC
+    # ========================================================================
+
+    @staticmethod
+    def subject_for(employee) -> CycleSubject:
+        return CycleSubject(employee.pk, employee.period_type, employee.joining_date)
+
+    @staticmethod
+    def snapshot(employee) -> Tuple:
+        """Tracked field values, compared by the signal to detect relevant changes"""
+        return tuple(getattr(employee, name) for name in EvaluationCycleService.TRACKED_FIELDS)
+
+    @staticmethod
+    @transaction.atomic
+    def sync(subjects: Iterable[CycleSubject]) -> Dict[str, int]:
+        """
+        Create missing cycles and reschedule pending ones for many employees.
+
+        Returns:
+            {'created': n, 'rescheduled': n}
+        """
+        plans = {subject.employee_id: (subject, EvaluationCycleService.plan(subject)) for subject in subjects}
+        plans = {employee_id: entry for employee_id, entry in plans.items() if entry[1]}
+        if not plans:
+            return {'created': 0, 'rescheduled': 0}
+
+        existing = {
+            (evaluation.employee_id, evaluation.category, evaluation.cycle_number): evaluation
+            for evaluation in PerformanceEvaluation.objects.filter(employee_id__in=list(plans)).only(
+                'id', 'employee_id', 'category', 'cycle_number', 'status', 'period_start', 'period_end', 'due_date',
+                'assigned_manager_id',
+            )
+        }
+
+        to_create = []
+        to_reschedule = []
+        for employee_id, (subject, cycles) in plans.items():
+            for cycle in cycles:
+                evaluation = existing.get((employee_id, cycle['category'], cycle['cycle_number']))
+                if evaluation is None:
+                    to_create.append(PerformanceEvaluation(employee_id=employee_id, status='pending', **cycle))
+                elif evaluation.status == 'pending' and (
+                    evaluation.period_start, evaluation.period_end, evaluation.due_date
+                ) != (cycle['period_start'], cycle['period_end'], cycle['due_date']):
+                    evaluation.period_start = cycle['period_start']
+                    evaluation.period_end = cycle['period_end']
+                    evaluation.due_date = cycle['due_date']
+                    to_reschedule.append(evaluation)
+
+        created = EvaluationCycleService._bulk_create(to_create)
+        if to_reschedule:
+            PerformanceEvaluation.objects.bulk_update(
+                to_reschedule, ['period_start', 'period_end', 'due_date'], batch_size=500
+            )
+
+        labels = dict(PerformanceEvaluation.CATEGORY_CHOICES)
+        EvaluationAuditLog.objects.bulk_create([
+            EvaluationAuditLog(
+                evaluation=evaluation,
+                action='Created',
+                details=f'Auto-created evaluation for cycle {evaluation.cycle_number} based on {labels[evaluation.category]}.',
+            )
+            for evaluation in created
+        ] + [
+            EvaluationAuditLog(
+                evaluation=evaluation,
+                action='Rescheduled',
+                details=f'Cycle {evaluation.cycle_number} moved to {evaluation.period_start} - {evaluation.period_end} '
+                        f'after joining date change.',
+            )
+            for evaluation in to_reschedule
+        ], batch_size=500)
+
+        manager_ids = {evaluation.assigned_manager_id for evaluation in created + to_reschedule}
+        if manager_ids:
+            from .evaluation_scheduler import EvaluationSchedulerService
+            transaction.on_commit(lambda: EvaluationSchedulerService.refresh_buckets(manager_ids=manager_ids))
+
+        return {'created': len(created), 'rescheduled': len(to_reschedule)}
+
+    @staticmethod
+    def _bulk_create(evaluations: List[PerformanceEvaluation]) -> List[PerformanceEvaluation]:
+        """bulk_create that always returns saved rows with primary keys"""
+        if not evaluations:
+            return []
+        if connection.features.can_return_rows_from_bulk_insert:
+            return PerformanceEvaluation.objects.bulk_create(evaluations, batch_size=500)
+
+        # MySQL does not return ids from bulk inserts: read them back by natural key
+        PerformanceEvaluation.objects.bulk_create(evaluations, batch_size=500)
+        keys = {(e.employee_id, e.category, e.cycle_number) for e in evaluations}
+        saved = PerformanceEvaluation.objects.filter(
+            employee_id__in={employee_id for employee_id, _, _ in keys}
+        ).only('id', 'employee_id', 'category', 'cycle_number', 'assigned_manager_id')
+        return [e for e in saved if (e.employee_id, e.category, e.cycle_number) in keys]
+
+    # ========================================================================
+    # BACKFILL
+    # ========================================================================
+
+    @staticmethod
+    def backfill(batch_size: int = 500):
+        """
+        Sync cycles for every employee with an evaluated period type.
+
+        Yields:
+            (employees_processed, cycles_created, cycles_rescheduled) after each batch
+        """
+        from .models import Employee
+
+        employees = Employee.objects.filter(
+            period_type__in=list(EvaluationCycleService.CYCLE_RULES), joining_date__isnull=False
+        ).order_by('pk').values_list('pk', 'period_type', 'joining_date')
+
+        processed = created = rescheduled = 0
+        batch = []
+        for row in employees.iterator(chunk_size=batch_size):
+            batch.append(CycleSubject(*row))
+            if len(batch) >= batch_size:
+                result = EvaluationCycleService.sync(batch)
+                processed += len(batch)
+                created += result['created']
+                rescheduled += result['rescheduled']
+                batch = []
+                yield processed, created, rescheduled
+        if batch:
+            result = EvaluationCycleService.sync(batch)
+            processed += len(batch)
+            created += result['created']
+            rescheduled += result['rescheduled']
+            yield processed, created, rescheduled
@@ -0,0 +1,183 @@
+"""
+Spreadsheet exports shared by the export views and background jobs.
+
+Workbooks are built in openpyxl's write-only mode: rows are appended from
+lazy querysets and flushed to temporary files as they are written, so
+memory use does not grow with the export. Column widths are decided before
+the first row (write-only sheets cannot be revisited) and the finished
+file is streamed to the client from a temporary file.
+"""
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+
+import openpyxl
+from django.db.models import Case, Count, IntegerField, Max, Min, Value, When
+from django.db.models.functions import Length
+from django.http import FileResponse
+from django.utils import timezone
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
+
+from .models import PublicHoliday
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+MAX_COLUMN_WIDTH = 50
+
+HEADER_FONT = Font(bold=True, color='FFFFFF')
+HEADER_FILL = PatternFill(start_color='332666', end_color='332666', fill_type='solid')
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+
+
+def wants_xlsx(request):
+    """True when an export view was asked for Excel (?format=xlsx)"""
+    return request.GET.get('format', '').lower() == 'xlsx'
+
+
+def header_widths(header, minimum=12):
+    """Column widths sized to the header titles, for sheets without better hints"""
+    return [min(max(len(title) + 2, minimum), MAX_COLUMN_WIDTH) for title in header]
+
+
+def write_sheet(wb, title, header, rows, widths=None, banner=()):
+    """
+    Append a styled sheet to a write-only workbook.
+
+    Args:
+        wb: openpyxl.Workbook(write_only=True)
+        title: Sheet title (truncated to Excel's 31 characters)
+        header: Column titles
+        rows: Iterable of row sequences (consumed lazily)
+        widths: Column widths; defaults to header_widths(header)
+        banner: (text, font) lines written above the header, merged across it
+    """
+    ws = wb.create_sheet(title=title[:31])
+    for index, width in enumerate(widths or header_widths(header), 1):
+        ws.column_dimensions[get_column_letter(index)].width = width
+
+    last_column = get_column_letter(len(header))
+    for row_num, (text, font) in enumerate(banner, 1):
+        cell = WriteOnlyCell(ws, value=text)
+        cell.font = font
+        cell.alignment = Alignment(horizontal='center') if row_num == 1 else Alignment()
+        ws.append([cell])
+        ws.merged_cells.add(f'A{row_num}:{last_column}{row_num}')
+
+    header_cells = []
+    for title_text in header:
+        cell = WriteOnlyCell(ws, value=title_text)
+        cell.font = HEADER_FONT
+        cell.fill = HEADER_FILL
+        cell.alignment = HEADER_ALIGNMENT
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    for row in rows:
+        ws.append(list(row))
+    return ws
+
+
+def xlsx_response(wb, filename):
+    """Save a workbook to a temporary file and stream it as an attachment"""
+    f = tempfile.TemporaryFile()
+    wb.save(f)
+    f.seek(0)
+    # FileResponse streams in blocks and closes the file when done
+    return FileResponse(f, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def stream_xlsx(filename, header, rows, sheet_title='Export', widths=None):
+    """
+    Single-sheet counterpart of streaming.stream_csv().
+
+    Args:
+        filename: Download filename
+        header: List of column titles
+        rows: Iterable of row sequences (consumed lazily)
+        sheet_title: Worksheet name
+        widths: Optional column widths
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    write_sheet(wb, sheet_title, header, rows, widths=widths)
+    return xlsx_response(wb, filename)
+
+
+# ============================================================================
+# PUBLIC HOLIDAYS
+# ============================================================================
+
+HOLIDAY_HEADERS = ['Holiday Name', 'Date', 'Day', 'Year', 'Description', 'Is Optional', 'Is Active']
+HOLIDAY_COLUMNS = ('country', 'name', 'date', 'day', 'year', 'description', 'is_optional', 'is_active')
+
+
+def _year_range(first, last):
+    return f"{first}-{last}" if first != last else str(first)
+
+
+def build_public_holidays_workbook():
+    """
+    Build the public holiday workbook, one sheet per country.
+
+    One grouped query gives each country's count, year range and longest
+    texts (for the column widths); one query ordered by country then
+    streams every holiday, split into sheets as it is read.
+
+    Returns:
+        (workbook, filename)
+    """
+    wb = openpyxl.Workbook(write_only=True)
+
+    stats = {
+        row['country']: row
+        for row in PublicHoliday.objects.values('country').annotate(
+            total=Count('id'), first_year=Min('year'), last_year=Max('year'),
+            name_len=Max(Length('name')), description_len=Max(Length('description')),
+        ).order_by()
+    }
+    if stats:
+        year_range = _year_range(
+            min(row['first_year'] for row in stats.values()), max(row['last_year'] for row in stats.values())
+        )
+    else:
+        year_range = str(timezone.now().year)
+
+    # Ordered like COUNTRY_CHOICES so each sheet reads the next run of rows
+    country_order = Case(
+        *[When(country=code, then=Value(index)) for index, (code, _) in enumerate(PublicHoliday.COUNTRY_CHOICES)],
+        default=Value(len(PublicHoliday.COUNTRY_CHOICES)), output_field=IntegerField(),
+    )
+    holidays = PublicHoliday.objects.order_by(country_order, 'date').values_list(*HOLIDAY_COLUMNS)
+    groups = groupby(holidays.iterator(chunk_size=2000), key=itemgetter(0))
+    current = next(groups, None)
+
+    for country_code, country_name in PublicHoliday.COUNTRY_CHOICES:
+        country_rows = ()
+        if current is not None and current[0] == country_code:
+            country_rows = current[1]
+        country = stats.get(country_code)
+        banner = ()
+        widths = header_widths(HOLIDAY_HEADERS)
+        if country:
+            banner = (
+                (f"{country_name} Public Holidays - {_year_range(country['first_year'], country['last_year'])}",
+                 Font(bold=True, size=14)),
+                (f"Total Holidays: {country['total']}", Font(bold=True)),
+            )
+            widths[0] = min(max(widths[0], (country['name_len'] or 0) + 2), MAX_COLUMN_WIDTH)
+            widths[4] = min(max(widths[4], (country['description_len'] or 0) + 2), MAX_COLUMN_WIDTH)
+
+        rows = (
+            [
+                name, holiday_date.strftime('%Y-%m-%d'), day, year, description or '',
+                'Yes' if is_optional else 'No', 'Yes' if is_active else 'No',
+            ]
+            for _, name, holiday_date, day, year, description, is_optional, is_active
+            in country_rows
+        )
+        write_sheet(wb, f"{country_name} Holidays", HOLIDAY_HEADERS, rows, widths=widths, banner=banner)
+        if country_rows:
+            current = next(groups, None)
+
+    return wb, f'public_holidays_all_countries_{year_range}.xlsx'
+
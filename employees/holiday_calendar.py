@@ -0,0 +1,310 @@
+"""
+Public holiday calendar generation.
+
+Holidays on the Gregorian calendar are described by rules (fixed dates,
+"n-th weekday of a month" and Easter-relative days) and can be generated for
+any year. Holidays that follow lunar or regional calendars (Diwali, Eid,
+Holi, ...) cannot be derived; their announced dates are kept in
+PUBLISHED_HOLIDAYS, and a year listed there is used exactly as published.
+
+HolidayCalendarService.sync() upserts the generated rows keyed on
+(country, date, name) in one transaction. Nothing is deleted, and re-running
+it for the same years changes nothing.
+"""
+import calendar
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PublicHoliday
+
+
+class HolidaySpec(NamedTuple):
+    """One generated holiday, before it is written"""
+    country: str
+    name: str
+    date: date
+    is_optional: bool = False
+    description: str = ''
+
+    @property
+    def key(self) -> Tuple[str, date, str]:
+        return (self.country, self.date, self.name)
+
+
+def easter_sunday(year: int) -> date:
+    """Western Easter (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+# ============================================================================
+# RULES
+# ============================================================================
+
+class HolidayRule:
+    """Base rule: a named holiday whose date can be computed for a year"""
+
+    def __init__(self, name: str, is_optional: bool = False, description: str = ''):
+        self.name = name
+        self.is_optional = is_optional
+        self.description = description
+
+    def date_for(self, year: int) -> Optional[date]:
+        raise NotImplementedError
+
+
+class FixedDate(HolidayRule):
+    """Same day every year, e.g. 26 January"""
+
+    def __init__(self, name: str, month: int, day: int, **kwargs):
+        super().__init__(name, **kwargs)
+        self.month = month
+        self.day = day
+
+    def date_for(self, year):
+        return date(year, self.month, self.day)
+
+
+class NthWeekday(HolidayRule):
+    """
+    The n-th weekday of a month, e.g. the first Tuesday of November.
+    n = -1 selects the last one.
+    """
+
+    def __init__(self, name: str, month: int, weekday: int, n: int, **kwargs):
+        super().__init__(name, **kwargs)
+        self.month = month
+        self.weekday = weekday
+        self.n = n
+
+    def date_for(self, year):
+        days = [
+            week[self.weekday] for week in calendar.monthcalendar(year, self.month) if week[self.weekday]
+        ]
+        return date(year, self.month, days[self.n - 1 if self.n > 0 else self.n])
+
+
+class EasterOffset(HolidayRule):
+    """A day relative to Easter Sunday, e.g. Good Friday is -2"""
+
+    def __init__(self, name: str, days: int, **kwargs):
+        super().__init__(name, **kwargs)
+        self.days = days
+
+    def date_for(self, year):
+        return easter_sunday(year) + timedelta(days=self.days)
+
+
+HOLIDAY_RULES: Dict[str, List[HolidayRule]] = {
+    'IN': [
+        FixedDate('New Year', 1, 1),
+        FixedDate('Makar Sankranti', 1, 14, is_optional=True),
+        FixedDate('Republic Day', 1, 26),
+        EasterOffset('Good Friday', -2, is_optional=True),
+        FixedDate('Independence Day', 8, 15),
+        FixedDate('Gandhi Jayanti', 10, 2),
+        FixedDate('Christmas', 12, 25),
+    ],
+    'AU': [
+        FixedDate("New Year's Day", 1, 1),
+        FixedDate('Australia Day', 1, 26),
+        EasterOffset('Good Friday', -2),
+        EasterOffset('Easter Saturday', -1),
+        EasterOffset('Easter Monday', 1),
+        FixedDate('Anzac Day', 4, 25),
+        NthWeekday('Labour Day (QLD)', 5, calendar.MONDAY, 1, description='Queensland'),
+        NthWeekday('Western Australia Day', 6, calendar.MONDAY, 1, description='WA only'),
+        NthWeekday("Queen's Birthday", 6, calendar.MONDAY, 2, description='Except WA & QLD'),
+        NthWeekday('Labour Day (NSW, ACT, SA)', 10, calendar.MONDAY, 1, description='NSW, ACT, SA'),
+        NthWeekday('Melbourne Cup Day', 11, calendar.TUESDAY, 1, description='Victoria'),
+        FixedDate('Christmas Day', 12, 25),
+        FixedDate('Boxing Day', 12, 26),
+    ],
+}
+
+# Announced calendars, (country, year) -> [(name, 'YYYY-MM-DD', is_optional)].
+# A listed year replaces the rules for that country.
+PUBLISHED_HOLIDAYS: Dict[Tuple[str, int], List[Tuple[str, str, bool]]] = {
+    ('IN', 2024): [
+        ('Uttarayan', '2024-01-15', False),
+        ('Vasi Uttarayan', '2024-01-16', False),
+        ('Republic Day', '2024-01-26', False),
+        ('Dhuleti (Holi)', '2024-03-25', False),
+        ('Eid al-Fitr', '2024-04-10', False),
+        ('Eid al-Adha', '2024-06-17', False),
+        ('Raksha Bandhan', '2024-08-19', False),
+        ('Independence Day', '2024-08-15', False),
+        ('Janmashtami', '2024-08-26', False),
+        ('Ganesh Chaturthi / Samvatsari', '2024-09-07', False),
+        ('Dussehra', '2024-10-12', False),
+        ('Diwali', '2024-11-01', False),
+        ('Gujarati New Year', '2024-11-02', False),
+        ('Bhai Dooj', '2024-11-03', False),
+        ('Christmas', '2024-12-25', False),
+    ],
+    ('IN', 2025): [
+        ('New Year', '2025-01-01', False),
+        ('Makar Sankranti', '2025-01-14', True),
+        ('Republic Day', '2025-01-26', False),
+        ('Maha Shivaratri', '2025-02-26', True),
+        ('Holi', '2025-03-14', False),
+        ('Good Friday', '2025-04-18', True),
+        ('Ram Navami', '2025-04-06', True),
+        ('Mahavir Jayanti', '2025-04-10', True),
+        ('Eid ul-Fitr', '2025-03-31', False),
+        ('Buddha Purnima', '2025-05-12', True),
+        ('Eid ul-Adha', '2025-06-07', False),
+        ('Muharram', '2025-07-06', True),
+        ('Independence Day', '2025-08-15', False),
+        ('Janmashtami', '2025-08-16', True),
+        ('Ganesh Chaturthi', '2025-08-27', True),
+        ('Milad un-Nabi', '2025-09-05', True),
+        ('Gandhi Jayanti', '2025-10-02', False),
+        ('Dussehra', '2025-10-02', False),
+        ('Diwali', '2025-10-20', False),
+        ('Guru Nanak Jayanti', '2025-11-05', True),
+        ('Christmas', '2025-12-25', False),
+    ],
+    ('IN', 2026): [
+        ('New Year', '2026-01-01', False),
+        ('Makar Sankranti', '2026-01-14', True),
+        ('Republic Day', '2026-01-26', False),
+        ('Maha Shivaratri', '2026-03-17', True),
+        ('Holi', '2026-03-04', False),
+        ('Good Friday', '2026-04-03', True),
+        ('Ram Navami', '2026-03-26', True),
+        ('Mahavir Jayanti', '2026-03-30', True),
+        ('Eid ul-Fitr', '2026-03-20', False),
+        ('Buddha Purnima', '2026-05-01', True),
+        ('Eid ul-Adha', '2026-05-27', False),
+        ('Muharram', '2026-06-25', True),
+        ('Independence Day', '2026-08-15', False),
+        ('Janmashtami', '2026-09-04', True),
+        ('Ganesh Chaturthi', '2026-09-15', True),
+        ('Milad un-Nabi', '2026-08-25', True),
+        ('Gandhi Jayanti', '2026-10-02', False),
+        ('Dussehra', '2026-10-21', False),
+        ('Diwali', '2026-11-08', False),
+        ('Guru Nanak Jayanti', '2026-11-24', True),
+        ('Christmas', '2026-12-25', False),
+    ],
+}
+
+
+class HolidayCalendarService:
+    """
+    Service class for generating and upserting public holidays
+    """
+
+    # ========================================================================
+    # GENERATION
+    # ========================================================================
+
+    @staticmethod
+    def countries() -> List[str]:
+        return [code for code, _ in PublicHoliday.COUNTRY_CHOICES]
+
+    @staticmethod
+    def generate(year: int, country: str) -> List[HolidaySpec]:
+        """Holidays of one country and year: the published list if there is one, else the rules"""
+        published = PUBLISHED_HOLIDAYS.get((country, year))
+        if published is not None:
+            specs = [
+                HolidaySpec(country, name, date.fromisoformat(day), is_optional)
+                for name, day, is_optional in published
+            ]
+        else:
+            specs = [
+                HolidaySpec(country, rule.name, rule.date_for(year), rule.is_optional, rule.description)
+                for rule in HOLIDAY_RULES.get(country, [])
+            ]
+        return sorted(specs, key=lambda spec: spec.date)
+
+    @staticmethod
+    def generate_many(years: Iterable[int], countries: Iterable[str] = None) -> List[HolidaySpec]:
+        countries = list(countries or HolidayCalendarService.countries())
+        return [
+            spec
+            for year in years
+            for country in countries
+            for spec in HolidayCalendarService.generate(year, country)
+        ]
+
+    # ========================================================================
+    # UPSERT
+    # ========================================================================
+
+    @staticmethod
+    def sync(specs: List[HolidaySpec], batch_size: int = 500) -> Dict[str, int]:
+        """
+        Insert missing holidays and refresh the generated fields of existing
+        ones, keyed on (country, date, name). The is_active flag of existing
+        rows is left as the administrators set it; no row is deleted. The
+        read and the writes share one transaction, and a row inserted by a
+        concurrent sync is skipped by the unique (country, date, name)
+        constraint.
+
+        Returns:
+            {'created': n, 'updated': n, 'unchanged': n}
+        """
+        if not specs:
+            return {'created': 0, 'updated': 0, 'unchanged': 0}
+
+        specs = list({spec.key: spec for spec in specs}.values())
+        with transaction.atomic():
+            dates = [spec.date for spec in specs]
+            existing = {}
+            # One query for the whole range; rows outside the generated keys are ignored
+            for holiday in PublicHoliday.objects.filter(
+                country__in={spec.country for spec in specs}, date__range=(min(dates), max(dates))
+            ):
+                existing.setdefault((holiday.country, holiday.date, holiday.name), holiday)
+
+            to_create, to_update = [], []
+            for spec in specs:
+                holiday = existing.get(spec.key)
+                values = {
+                    'day': spec.date.strftime('%A'),
+                    'year': spec.date.year,
+                    'is_optional': spec.is_optional,
+                    'description': spec.description,
+                }
+                if holiday is None:
+                    to_create.append(PublicHoliday(
+                        country=spec.country, name=spec.name, date=spec.date, is_active=True, **values
+                    ))
+                elif any(getattr(holiday, field) != value for field, value in values.items()):
+                    for field, value in values.items():
+                        setattr(holiday, field, value)
+                    to_update.append(holiday)
+
+            PublicHoliday.objects.bulk_create(to_create, batch_size=batch_size, ignore_conflicts=True)
+            if to_update:
+                fields = ['day', 'year', 'is_optional', 'description', 'updated_at']
+                now = timezone.now()
+                for holiday in to_update:
+                    holiday.updated_at = now
+                PublicHoliday.objects.bulk_update(to_update, fields, batch_size=batch_size)
+
+        if to_create or to_update:
+            # Bulk writes send no post_save, which is what normally clears this
+            from .stats_service import EmployeeStatsService
+            EmployeeStatsService.invalidate_dashboard()
+
+        return {
+            'created': len(to_create),
+            'updated': len(to_update),
+            'unchanged': len(specs) - len(to_create) - len(to_update),
+        }
@@ -0,0 +1,208 @@
+"""
+Per-request identity context.
+
+Resolves the user's profile, role and linked employee once per request and
+exposes them as ``request.identity``. Role and ids are kept in a short-lived
+session entry, so permission checks on most requests run no queries at all;
+the profile and employee objects are loaded on first use with a single
+select_related query, which also primes ``request.user.profile`` for any
+code (and template) that still goes through the user.
+
+Enable by adding ``employees.identity.IdentityMiddleware`` to MIDDLEWARE after
+``AuthenticationMiddleware``. Without it, ``get_identity(request)`` builds the
+context lazily on first use.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils.functional import SimpleLazyObject
+
+SESSION_KEY = '_identity'
+SESSION_TTL = 300  # seconds
+VERSION_CACHE_KEY = 'employees:identity:version:{user_id}'
+
+
+class RequestIdentity:
+    """
+    Who is making the request: role, profile and employee.
+
+    ``is_*`` and ``can_*`` mirror the UserProfile properties of the same name
+    and only need the role, so they never trigger a query.
+    """
+
+    def __init__(self, request, profile_id=None, role=None, employee_id=None, profile=None):
+        self._request = request
+        self.profile_id = profile_id
+        self.role = role
+        self.employee_id = employee_id
+        self._profile = profile
+        self._loaded = profile is not None
+        self._employee = None
+
+    @property
+    def user(self):
+        return self._request.user
+
+    @property
+    def is_authenticated(self):
+        return self._request.user.is_authenticated
+
+    @property
+    def has_profile(self):
+        return self.profile_id is not None
+
+    @property
+    def profile(self):
+        """The UserProfile, with employee, department and designation joined"""
+        if not self._loaded:
+            self._profile = _load_profile(self._request.user) if self.profile_id else None
+            self._loaded = True
+        return self._profile
+
+    @property
+    def employee(self):
+        if not self.employee_id:
+            return None
+        profile = self.profile
+        if profile is not None and profile.employee_id == self.employee_id:
+            return profile.employee
+        # Matched by email but not linked yet (see link_employee_by_email)
+        if self._employee is None:
+            from .models import Employee
+            self._employee = Employee.objects.select_related('department', 'designation').filter(
+                pk=self.employee_id
+            ).first()
+        return self._employee
+
+    def has_role(self, roles):
+        return self.role in roles
+
+    def __getattr__(self, name):
+        # Delegate is_admin, can_manage_employees, ... to the UserProfile property
+        if name.startswith(('is_', 'can_')):
+            from .models import UserProfile
+            prop = getattr(UserProfile, name, None)
+            if isinstance(prop, property):
+                return bool(self.role) and prop.fget(self)
+        raise AttributeError(name)
+
+
+def _load_profile(user):
+    """Load a user's profile in one query and cache it on the user object"""
+    from .models import UserProfile
+
+    profile = UserProfile.objects.select_related(
+        'employee', 'employee__department', 'employee__designation'
+    ).filter(user_id=user.pk).first()
+    if profile is not None:
+        user.profile = profile  # Primes the reverse one-to-one cache; no query, no save
+    return profile
+
+
+def _employee_by_email(user):
+    """The employee whose official email matches the user, unless another profile owns it"""
+    from .models import Employee
+
+    if not user.email:
+        return None
+    return Employee.objects.select_related('department', 'designation').filter(
+        official_email=user.email, user_profile__isnull=True
+    ).first()
+
+
+def link_employee_by_email(user):
+    """
+    Link the user's profile to the employee matching their email.
+
+    Called on login (see signals.py), never while resolving a request's
+    identity, so permission checks stay read-only. A concurrent link of the
+    same employee leaves the profile unlinked.
+    """
+    from .models import UserProfile
+
+    profile = UserProfile.objects.filter(user_id=user.pk, employee__isnull=True).first()
+    if profile is None:
+        return None
+    employee = _employee_by_email(user)
+    if employee is None:
+        return None
+    profile.employee = employee
+    try:
+        with transaction.atomic():
+            profile.save(update_fields=['employee', 'updated_at'])
+    except IntegrityError:
+        return None
+    return employee
+
+
+def _version(user_id):
+    return cache.get(VERSION_CACHE_KEY.format(user_id=user_id), 0)
+
+
+def invalidate_identity(user_id):
+    """Force every session of a user to re-resolve its identity"""
+    key = VERSION_CACHE_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def resolve_identity(request):
+    """Build the RequestIdentity, from the session entry when it is still fresh"""
+    user = request.user
+    if not user.is_authenticated:
+        return RequestIdentity(request)
+
+    session = getattr(request, 'session', None)
+    version = _version(user.pk)
+    cached = session.get(SESSION_KEY) if session is not None else None
+    if cached and cached.get('user_id') == user.pk and cached.get('version') == version \
+            and cached.get('expires', 0) > time.time():
+        return RequestIdentity(request, cached['profile_id'], cached['role'], cached['employee_id'])
+
+    profile = _load_profile(user)
+    employee_id = profile.employee_id if profile else None
+    fallback = None
+    if profile is not None and employee_id is None:
+        fallback = _employee_by_email(user)
+        employee_id = fallback.pk if fallback else None
+
+    identity = RequestIdentity(
+        request,
+        profile_id=profile.pk if profile else None,
+        role=profile.role if profile else None,
+        employee_id=employee_id,
+        profile=profile,
+    )
+    identity._employee = fallback
+    if session is not None:
+        session[SESSION_KEY] = {
+            'user_id': user.pk,
+            'version': version,
+            'expires': time.time() + SESSION_TTL,
+            'profile_id': identity.profile_id,
+            'role': identity.role,
+            'employee_id': identity.employee_id,
+        }
+    return identity
+
+
+def get_identity(request):
+    """The request's identity context, created on first use"""
+    identity = getattr(request, 'identity', None)
+    if identity is None:
+        identity = request.identity = resolve_identity(request)
+    return identity
+
+
+class IdentityMiddleware:
+    """Attach a lazily resolved ``request.identity`` to every request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.identity = SimpleLazyObject(lambda: resolve_identity(request))
+        return self.get_response(request)
@@ -0,0 +1,64 @@
+"""
+Profile picture thumbnail worker functions.
+
+Like pdf_text.py, this module imports nothing from Django so process-pool
+workers started with the 'spawn' method can load it without settings.
+Workers receive a file path (or raw bytes) and return JPEG bytes; storing
+them is left to the calling process.
+"""
+import io
+
+JPEG_QUALITY = 85
+
+
+def _to_rgb(image):
+    """Flatten transparency onto white; JPEG has no alpha channel"""
+    from PIL import Image
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    if image.mode != 'RGB':
+        return image.convert('RGB')
+    return image
+
+
+def render_thumbnails(source, sizes):
+    """
+    Render square, centre-cropped JPEG thumbnails of an image.
+
+    Args:
+        source: Filesystem path or raw image bytes
+        sizes: {label: edge length in pixels}
+
+    Returns:
+        ({label: jpeg_bytes}, error) tuple; error is an empty string on success
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as image:
+            # JPEGs decode at a reduced scale that still covers the largest
+            # thumbnail, which is most of the cost for phone-camera photos
+            largest = max(sizes.values())
+            image.draft('RGB', (largest, largest))
+            image = _to_rgb(ImageOps.exif_transpose(image))
+
+            thumbnails = {}
+            for label, edge in sorted(sizes.items(), key=lambda item: -item[1]):
+                thumbnail = ImageOps.fit(image, (edge, edge), method=Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                thumbnail.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+                thumbnails[label] = buffer.getvalue()
+            return thumbnails, ''
+    except Exception as e:
+        return {}, f'{type(e).__name__}: {e}'[:500]
+
+
+def thumbnail_job(job):
+    """Pool entry point: ((employee_id, name, source, sizes)) -> (employee_id, name, thumbnails, error)"""
+    employee_id, name, source, sizes = job
+    thumbnails, error = render_thumbnails(source, sizes)
+    return employee_id, name, thumbnails, error
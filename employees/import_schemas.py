@@ -0,0 +1,153 @@
+"""
+Import schemas for the bulk-import engine (see bulk_import.py).
+
+Column titles match the sample templates offered on each import page.
+"""
+from .bulk_import import (
+    Column, ImportRowError, ImportSchema, parse_bool, parse_date, parse_decimal, parse_int, parse_upper,
+)
+from .models import AccountManagement, Department, Designation, PublicHoliday
+from .models_job import JobDescription
+
+
+# ============================================================================
+# ACCOUNTS
+# ============================================================================
+
+class AccountImportSchema(ImportSchema):
+    """
+    Accounts, keyed by e-mail. Read by position like the original importer,
+    so exports from older templates with different titles still load.
+    """
+
+    model = AccountManagement
+    noun = 'account'
+    positional = True
+    key = ('email',)
+    columns = [
+        Column('Name', 'name', required=True),
+        Column('Email', 'email', required=True),
+        Column('Email Password', 'email_password', default='', secret=True),
+        Column('Teams', 'teams', default=''),
+        Column('Teams Password', 'teams_password', default='', secret=True),
+        Column('Basecamp Password', 'basecamp_password', default='', secret=True),
+        Column('System Password', 'system_password', default='', secret=True),
+        Column('GitHub', 'github', default=''),
+        Column('GitHub Password', 'github_password', default='', secret=True),
+        Column('Apple Store ID', 'apple_store_id', default=''),
+        Column('Apple Password', 'apple_password', default='', secret=True),
+    ]
+
+    def get_on_existing(self):
+        # Without "skip duplicates" every row is added, as before
+        return 'skip' if self.options.get('skip_duplicates') else 'create'
+
+    def clean(self, values, row):
+        values['is_active'] = True
+        return values
+
+
+# ============================================================================
+# PUBLIC HOLIDAYS
+# ============================================================================
+
+class PublicHolidayImportSchema(ImportSchema):
+    """Public holidays, keyed by date; re-importing a date updates it"""
+
+    model = PublicHoliday
+    noun = 'public holiday'
+    key = ('date',)
+    columns = [
+        Column('Name', 'name', required=True),
+        Column('Date', 'date', parser=parse_date, required=True),
+        Column('Year', 'year', parser=parse_int),
+        Column('Is Active', 'is_active', parser=parse_bool, default=True),
+    ]
+    update_fields = ['name', 'day', 'year', 'is_active']
+
+    def clean(self, values, row):
+        holiday_date = values['date']
+        values['day'] = holiday_date.strftime('%A')
+        if values['year'] is None:
+            values['year'] = holiday_date.year
+        return values
+
+    def finish(self, report):
+        # Bulk writes send no post_save, which is what normally clears this
+        from .stats_service import EmployeeStatsService
+        if report.success:
+            EmployeeStatsService.invalidate_dashboard()
+
+
+# ============================================================================
+# JOB DESCRIPTIONS
+# ============================================================================
+
+class JobDescriptionImportSchema(ImportSchema):
+    """
+    Job descriptions, keyed by title, department and designation.
+    Departments and designations are looked up by name for each chunk and
+    created when missing.
+    """
+
+    model = JobDescription
+    noun = 'job description'
+    key = ('title', 'department', 'designation')
+    columns = [
+        Column('Title', 'title', required=True),
+        Column('Department', required=True),
+        Column('Designation', required=True),
+        Column('Employment Type', 'employment_type', default='full_time'),
+        Column('Experience Level', 'experience_level', default='fresher'),
+        Column('Required Qualifications', 'required_qualifications', default=''),
+        Column('Skills & Requirements', 'skills_requirements', default=''),
+        Column('Min Salary', 'min_salary', parser=parse_decimal),
+        Column('Max Salary', 'max_salary', parser=parse_decimal),
+        Column('Currency', 'currency', parser=parse_upper, default='INR'),
+        Column('Location', 'location', default=''),
+        Column('Work Mode', 'work_mode', default='Office'),
+        Column('Number of Vacancies', 'number_of_vacancies', parser=parse_int, default=1),
+        Column('Application Deadline', 'application_deadline', parser=parse_date),
+        Column('Status', 'status', default='draft'),
+    ]
+
+    def __init__(self, user=None, **options):
+        super().__init__(user, **options)
+        self.departments = {}
+        self.designations = {}
+
+    def clean(self, values, row):
+        if values['min_salary'] is not None and values['max_salary'] is not None \
+                and values['min_salary'] > values['max_salary']:
+            raise ImportRowError('Min Salary is greater than Max Salary')
+        return values
+
+    def prepare_chunk(self, rows):
+        dept_names = {row['Department'] for row in rows} - set(self.departments)
+        if dept_names:
+            for department in Department.objects.filter(name__in=dept_names).order_by('pk'):
+                self.departments.setdefault(department.name, department)
+            for name in dept_names - set(self.departments):
+                self.departments[name], _ = Department.objects.get_or_create(
+                    name=name, defaults={'description': f'{name} Department'}
+                )
+
+        wanted = {(row['Designation'], self.departments[row['Department']].pk) for row in rows}
+        wanted -= set(self.designations)
+        if wanted:
+            for designation in Designation.objects.filter(
+                name__in={name for name, _ in wanted},
+                department_id__in={dept_id for _, dept_id in wanted},
+            ).order_by('pk'):
+                self.designations.setdefault((designation.name, designation.department_id), designation)
+            for name, dept_id in wanted - set(self.designations):
+                self.designations[(name, dept_id)], _ = Designation.objects.get_or_create(
+                    name=name, department_id=dept_id, defaults={'description': f'{name} Position'}
+                )
+
+    def build(self, values):
+        instance = super().build(values)
+        instance.department = self.departments[values['Department']]
+        instance.designation = self.designations[(values['Designation'], instance.department.pk)]
+        instance.posted_by = self.user
+        return instance
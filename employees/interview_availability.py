@@ -0,0 +1,230 @@
+# Interview Availability Service
+# Per-interviewer busy intervals built from InterviewSchedule and approved
+# LeaveApplication rows, used to reject double bookings and to offer free slots.
+#
+# The index is built for a set of interviewers and a date range with two
+# indexed queries (interviews by taken_by/date, leaves overlapping the range)
+# and held in memory as {employee_id: {date: [(start_minute, end_minute, reason)]}}.
+# Interviews are stored as date + time + duration, so overlap checks happen
+# here in minutes rather than in SQL.
+
+from collections import defaultdict
+from datetime import date, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.db import transaction
+from django.utils import timezone
+from .models import Employee, LeaveApplication
+from .models_job import InterviewSchedule
+
+
+class InterviewConflict(Exception):
+    """Raised when an interview overlaps the interviewer's existing commitments"""
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        super().__init__('; '.join(conflicts))
+
+
+class InterviewAvailabilityService:
+    """
+    Service class for interviewer conflict checks and free-slot search
+    """
+
+    # Interviews in these statuses do not occupy the interviewer
+    INACTIVE_STATUSES = ('cancelled', 'rescheduled')
+
+    # Bookable window for free-slot search (minutes from midnight)
+    DAY_START = 10 * 60
+    DAY_END = 19 * 60
+
+    MAX_RANGE_DAYS = 31
+    DEFAULT_DURATION = 60
+
+    # ========================================================================
+    # INDEX
+    # ========================================================================
+
+    @staticmethod
+    def _minutes(value: time) -> int:
+        return value.hour * 60 + value.minute
+
+    @staticmethod
+    def build_index(employee_ids: Iterable[int], start_date: date, end_date: date,
+                    exclude_interview_id: Optional[int] = None) -> Dict[int, Dict[date, List[Tuple[int, int, str]]]]:
+        """
+        Busy intervals of each interviewer per day, sorted by start.
+
+        Approved leave blocks the whole day (half-day leave does not record
+        which half is taken, so it is treated as unavailable too).
+        """
+        employee_ids = list(employee_ids)
+        index = defaultdict(lambda: defaultdict(list))
+        if not employee_ids:
+            return index
+
+        interviews = InterviewSchedule.objects.filter(
+            taken_by_id__in=employee_ids,
+            scheduled_date__range=(start_date, end_date),
+        ).exclude(status__in=InterviewAvailabilityService.INACTIVE_STATUSES)
+        if exclude_interview_id:
+            interviews = interviews.exclude(pk=exclude_interview_id)
+
+        rows = interviews.order_by().values_list(
+            'taken_by_id', 'scheduled_date', 'scheduled_time', 'duration_minutes', 'application__candidate_name'
+        )
+        for employee_id, day, start, duration, candidate in rows:
+            start_minute = InterviewAvailabilityService._minutes(start)
+            end_minute = start_minute + (duration or InterviewAvailabilityService.DEFAULT_DURATION)
+            index[employee_id][day].append((start_minute, end_minute, f'interview with {candidate} at {start:%H:%M}'))
+
+        leaves = LeaveApplication.objects.filter(
+            employee_id__in=employee_ids,
+            status='approved',
+            start_date__lte=end_date,
+            end_date__gte=start_date,
+        ).order_by().values_list('employee_id', 'start_date', 'end_date', 'is_half_day')
+        for employee_id, leave_start, leave_end, is_half_day in leaves:
+            reason = 'on approved half-day leave' if is_half_day else 'on approved leave'
+            day = max(leave_start, start_date)
+            while day <= min(leave_end, end_date):
+                index[employee_id][day].append((0, 24 * 60, reason))
+                day += timedelta(days=1)
+
+        for days in index.values():
+            for intervals in days.values():
+                intervals.sort()
+        return index
+
+    # ========================================================================
+    # CONFLICT CHECKS
+    # ========================================================================
+
+    @staticmethod
+    def find_conflicts(employee_id: int, day: date, start: time, duration_minutes: int = None,
+                       exclude_interview_id: Optional[int] = None) -> List[str]:
+        """Reasons the interviewer cannot take a slot; empty when free"""
+        start_minute = InterviewAvailabilityService._minutes(start)
+        end_minute = start_minute + (duration_minutes or InterviewAvailabilityService.DEFAULT_DURATION)
+        index = InterviewAvailabilityService.build_index([employee_id], day, day, exclude_interview_id)
+        return [
+            reason for busy_start, busy_end, reason in index[employee_id][day]
+            if busy_start < end_minute and start_minute < busy_end
+        ]
+
+    @staticmethod
+    def needs_check(interview: InterviewSchedule) -> bool:
+        """
+        Whether saving books a slot: a new active interview, or an active one
+        whose date, time, duration or interviewer changed or that was
+        cancelled or rescheduled before. Edits to remarks, feedback or a
+        status like completed keep the slot and are not re-checked.
+        """
+        inactive = InterviewAvailabilityService.INACTIVE_STATUSES
+        if not interview.taken_by_id or interview.status in inactive:
+            return False
+        loaded_slot = getattr(interview, '_loaded_slot', None)
+        if interview.pk is None or loaded_slot is None:
+            return True
+        slot = tuple(getattr(interview, name) for name in InterviewSchedule.SLOT_FIELDS)
+        return slot != loaded_slot or interview._loaded_status in inactive
+
+    @staticmethod
+    def save_interview(interview: InterviewSchedule) -> InterviewSchedule:
+        """
+        Save an interview unless its interviewer is already busy.
+
+        The interviewer's Employee row is locked for the check-and-save, so
+        two recruiters booking the same person cannot both succeed. Only
+        saves that book a slot are checked (see needs_check).
+
+        Raises:
+            InterviewConflict: if the slot overlaps an interview or approved leave
+        """
+        with transaction.atomic():
+            if InterviewAvailabilityService.needs_check(interview):
+                Employee.objects.select_for_update().filter(pk=interview.taken_by_id).values_list('pk').first()
+                conflicts = InterviewAvailabilityService.find_conflicts(
+                    interview.taken_by_id, interview.scheduled_date, interview.scheduled_time,
+                    interview.duration_minutes, exclude_interview_id=interview.pk,
+                )
+                if conflicts:
+                    name = interview.taken_by.full_name if interview.taken_by else 'Interviewer'
+                    raise InterviewConflict([f'{name} is {reason}' for reason in conflicts])
+            interview.save()
+        return interview
+
+    # ========================================================================
+    # FREE SLOTS
+    # ========================================================================
+
+    @staticmethod
+    def _free_intervals(busy: List[Tuple[int, int, str]], day_start: int, day_end: int) -> List[Tuple[int, int]]:
+        free = []
+        cursor = day_start
+        for busy_start, busy_end, _ in busy:
+            if busy_start > cursor:
+                free.append((cursor, min(busy_start, day_end)))
+            cursor = max(cursor, busy_end)
+            if cursor >= day_end:
+                break
+        if cursor < day_end:
+            free.append((cursor, day_end))
+        return [(start, end) for start, end in free if end > start]
+
+    @staticmethod
+    def _slots(intervals: List[Tuple[int, int]], duration: int, step: int) -> List[str]:
+        slots = []
+        for start, end in intervals:
+            # Align to the step grid so offered slots start on round times
+            minute = -(-start // step) * step
+            while minute + duration <= end:
+                slots.append(f'{minute // 60:02d}:{minute % 60:02d}')
+                minute += step
+        return slots
+
+    @staticmethod
+    def free_slots(employee_ids: Iterable[int], start_date: date, end_date: date,
+                   duration_minutes: int = None, step_minutes: int = 30,
+                   include_weekends: bool = False) -> Dict:
+        """
+        Free interview slots for several interviewers over a date range.
+
+        Args:
+            employee_ids: Interviewers to check
+            start_date, end_date: Inclusive range (at most MAX_RANGE_DAYS days)
+            duration_minutes: Length of the interview to fit
+            step_minutes: Granularity of offered start times
+            include_weekends: Also offer Saturdays and Sundays
+
+        Returns:
+            {'interviewers': {employee_id: {iso_date: [HH:MM, ...]}},
+             'common': {iso_date: [HH:MM, ...]}}  (slots every interviewer can take)
+        """
+        employee_ids = list(dict.fromkeys(employee_ids))
+        duration = duration_minutes or InterviewAvailabilityService.DEFAULT_DURATION
+        end_date = min(end_date, start_date + timedelta(days=InterviewAvailabilityService.MAX_RANGE_DAYS - 1))
+        index = InterviewAvailabilityService.build_index(employee_ids, start_date, end_date)
+
+        now = timezone.localtime()
+        per_interviewer = {employee_id: {} for employee_id in employee_ids}
+        common = {}
+        day = start_date
+        while day <= end_date:
+            if day >= now.date() and (include_weekends or day.weekday() < 5):
+                day_start = InterviewAvailabilityService.DAY_START
+                if day == now.date():
+                    day_start = max(day_start, now.hour * 60 + now.minute)
+                shared = None
+                for employee_id in employee_ids:
+                    slots = InterviewAvailabilityService._slots(
+                        InterviewAvailabilityService._free_intervals(
+                            index[employee_id][day], day_start, InterviewAvailabilityService.DAY_END
+                        ),
+                        duration, step_minutes,
+                    )
+                    per_interviewer[employee_id][day.isoformat()] = slots
+                    shared = set(slots) if shared is None else shared & set(slots)
+                if shared:
+                    common[day.isoformat()] = sorted(shared)
+            day += timedelta(days=1)
+
+        return {'interviewers': per_interviewer, 'common': common}
@@ -0,0 +1,373 @@
+# Inventory Index Service
+# Keeps the InventoryAsset table in step with Device, SystemDetail and the six
+# peripheral inventory models, and answers availability / holder lookups from it.
+#
+# Source tables stay authoritative. Rows are keyed by source, asset type and
+# label, so a Device serial never overwrites a peripheral label. Each sync_*
+# function rebuilds the index rows for one source instance and is called from
+# signals.py; rebuild() recreates the whole index (used by the
+# rebuild_inventory_index management command).
+
+import re
+from typing import Dict, List, Optional
+from django.db import transaction
+from django.db.models import F, Q
+from .models import (
+    Device, DeviceAllocation, SystemDetail, InventoryAsset,
+    CPUDevice, ScreenDevice, KeyboardDevice, MouseDevice, HeadphoneDevice, ExtenderDevice,
+)
+
+
+class InventoryIndexService:
+    """
+    Service class maintaining and querying the unified inventory index
+    """
+
+    # Peripheral inventory model -> asset_type
+    PERIPHERAL_TYPES = {
+        CPUDevice: 'cpu',
+        ScreenDevice: 'screen',
+        KeyboardDevice: 'keyboard',
+        MouseDevice: 'mouse',
+        HeadphoneDevice: 'headphone',
+        ExtenderDevice: 'extender',
+    }
+
+    # Device.status -> InventoryAsset.status
+    DEVICE_STATUS_MAP = {
+        'available': 'available',
+        'in_use': 'allocated',
+        'retired': 'retired',
+    }
+
+    SIZE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)')
+
+    # ========================================================================
+    # ROW BUILDERS
+    # ========================================================================
+
+    @staticmethod
+    def parse_size(size: Optional[str]) -> Optional[int]:
+        """Parse '27 inch', '23.8"' etc. into whole inches"""
+        if not size:
+            return None
+        match = InventoryIndexService.SIZE_PATTERN.search(size)
+        return int(round(float(match.group(1)))) if match else None
+
+    @staticmethod
+    def _peripheral_fields(instance) -> Dict:
+        """Index field values for a peripheral inventory row"""
+        asset_type = InventoryIndexService.PERIPHERAL_TYPES[type(instance)]
+        description = ''
+        size_inches = None
+        if asset_type == 'cpu':
+            description = ', '.join(filter(None, [instance.processor, instance.ram, instance.storage]))
+        elif asset_type == 'screen':
+            description = instance.size
+            size_inches = InventoryIndexService.parse_size(instance.size)
+        elif asset_type == 'extender':
+            description = instance.model or ''
+
+        return {
+            'asset_type': asset_type,
+            'label_no': instance.label_no,
+            'company_name': instance.company_name or '',
+            'description': description or '',
+            'size_inches': size_inches,
+            'status': instance.status,
+            'holder_id': instance.allocated_to_id,
+            'source': 'inventory',
+            'source_id': instance.pk,
+        }
+
+    @staticmethod
+    def _device_fields(device: Device, holder_id: Optional[int]) -> Dict:
+        """Index field values for a Device row"""
+        return {
+            'asset_type': device.device_type,
+            'label_no': device.serial_number,
+            'company_name': '',
+            'description': device.device_name,
+            'size_inches': None,
+            'status': InventoryIndexService.DEVICE_STATUS_MAP.get(device.status, device.status),
+            'holder_id': holder_id,
+            'source': 'device',
+            'source_id': device.pk,
+        }
+
+    @staticmethod
+    def _system_labels(system: SystemDetail) -> List[Dict]:
+        """Labels referenced by a SystemDetail's denormalized *_label_no columns"""
+        labels = [
+            {'asset_type': 'cpu', 'label_no': system.cpu_label_no, 'company_name': system.cpu_company_name,
+             'description': ', '.join(filter(None, [system.cpu_processor, system.cpu_ram, system.cpu_storage]))},
+            {'asset_type': 'screen', 'label_no': system.screen_label_no, 'company_name': system.screen_company_name,
+             'description': system.screen_size, 'size_inches': InventoryIndexService.parse_size(system.screen_size)},
+            {'asset_type': 'keyboard', 'label_no': system.keyboard_label_no, 'company_name': system.keyboard_company_name},
+            {'asset_type': 'mouse', 'label_no': system.mouse_label_no, 'company_name': system.mouse_company_name},
+        ]
+        if system.has_headphone:
+            labels.append({'asset_type': 'headphone', 'label_no': system.headphone_label_no,
+                           'company_name': system.headphone_company_name})
+        if system.has_extender:
+            labels.append({'asset_type': 'extender', 'label_no': system.extender_label,
+                           'company_name': system.extender_name})
+        return [label for label in labels if label['label_no']]
+
+    # ========================================================================
+    # SYNC (called from signals)
+    # ========================================================================
+
+    @staticmethod
+    @transaction.atomic
+    def sync_peripheral(instance) -> None:
+        """
+        Upsert the index row for a peripheral inventory instance. A system
+        that already referenced the label keeps its link: the system-sourced
+        row standing in for the label is folded into the inventory row.
+        """
+        fields = InventoryIndexService._peripheral_fields(instance)
+        # Label may have been edited: release any stale row for this source first
+        InventoryIndexService._release_peripheral_rows(InventoryAsset.objects.filter(
+            source='inventory', source_id=instance.pk, asset_type=fields['asset_type']
+        ).exclude(label_no=fields['label_no']))
+
+        placeholder = InventoryAsset.objects.filter(
+            source='system', asset_type=fields['asset_type'], label_no=fields['label_no']
+        ).values_list('pk', 'system_id').first()
+        if placeholder:
+            InventoryAsset.objects.filter(pk=placeholder[0]).delete()
+            fields['system_id'] = placeholder[1]
+        InventoryAsset.objects.update_or_create(
+            source='inventory', asset_type=fields.pop('asset_type'), label_no=fields.pop('label_no'), defaults=fields
+        )
+
+    @staticmethod
+    def remove_peripheral(instance) -> None:
+        """Release the index row of a deleted peripheral inventory instance"""
+        asset_type = InventoryIndexService.PERIPHERAL_TYPES[type(instance)]
+        InventoryIndexService._release_peripheral_rows(
+            InventoryAsset.objects.filter(asset_type=asset_type, source='inventory', source_id=instance.pk)
+        )
+
+    @staticmethod
+    def _release_peripheral_rows(queryset) -> None:
+        """
+        Inventory rows a peripheral no longer backs: rows still referenced by
+        a system become that system's rows, the rest are dropped
+        """
+        queryset.filter(system__isnull=True).delete()
+        queryset.update(source='system', source_id=F('system_id'), holder=None, status='allocated')
+
+    @staticmethod
+    def sync_device(device: Device) -> None:
+        """Upsert the index row for a Device, resolving its current holder"""
+        allocation = device.allocations.filter(returned_date__isnull=True).values('assigned_to_id').first()
+        fields = InventoryIndexService._device_fields(device, allocation['assigned_to_id'] if allocation else None)
+        InventoryAsset.objects.filter(source='device', source_id=device.pk).exclude(
+            asset_type=fields['asset_type'], label_no=fields['label_no']
+        ).delete()
+        InventoryAsset.objects.update_or_create(
+            source='device', asset_type=fields.pop('asset_type'), label_no=fields.pop('label_no'), defaults=fields
+        )
+
+    @staticmethod
+    def sync_allocation(allocation: DeviceAllocation) -> None:
+        """
+        Refresh the holder of the device an allocation row points at, after
+        the row was saved or deleted. The holder comes from the device's open
+        allocation, so returning or deleting an old row leaves it alone.
+        """
+        holder_id = DeviceAllocation.objects.filter(
+            device_id=allocation.device_id, returned_date__isnull=True
+        ).values_list('assigned_to_id', flat=True).first()
+        InventoryAsset.objects.filter(source='device', source_id=allocation.device_id).update(holder_id=holder_id)
+
+    @staticmethod
+    def remove_device(device: Device) -> None:
+        """Drop the index row for a deleted Device"""
+        InventoryAsset.objects.filter(source='device', source_id=device.pk).delete()
+
+    @staticmethod
+    @transaction.atomic
+    def sync_system(system: SystemDetail) -> None:
+        """
+        Link the labels of an active SystemDetail to its index rows.
+
+        Labels without a peripheral inventory row get a system-sourced row so
+        they are still searchable. Labels the system no longer references (or
+        all of them, once the system is inactive) are unlinked.
+        """
+        labels = InventoryIndexService._system_labels(system) if system.is_active and system.employee_id else []
+
+        keep = Q(pk__in=[])
+        for label in labels:
+            keep |= Q(asset_type=label['asset_type'], label_no=label['label_no'])
+        InventoryIndexService._unlink_system(InventoryAsset.objects.filter(system=system).exclude(keep))
+
+        for label in labels:
+            asset = InventoryAsset.objects.filter(
+                source='inventory', asset_type=label['asset_type'], label_no=label['label_no']
+            ).first()
+            if asset is not None:
+                if asset.system_id != system.pk:
+                    asset.system = system
+                    asset.save(update_fields=['system', 'updated_at'])
+                continue
+            asset, created = InventoryAsset.objects.get_or_create(
+                source='system',
+                asset_type=label['asset_type'],
+                label_no=label['label_no'],
+                defaults={
+                    'company_name': label.get('company_name') or '',
+                    'description': label.get('description') or '',
+                    'size_inches': label.get('size_inches'),
+                    'status': 'allocated',
+                    'source_id': system.pk,
+                    'system': system,
+                },
+            )
+            if not created and asset.system_id != system.pk:
+                asset.system = system
+                asset.source_id = system.pk
+                asset.save(update_fields=['system', 'source_id', 'updated_at'])
+
+    @staticmethod
+    def remove_system(system: SystemDetail) -> None:
+        """Unlink every index row referencing a deleted SystemDetail"""
+        InventoryIndexService._unlink_system(InventoryAsset.objects.filter(system_id=system.pk))
+
+    @staticmethod
+    def _unlink_system(queryset) -> None:
+        """System-only rows are dropped; inventory rows just lose the link"""
+        queryset.filter(source='system').delete()
+        queryset.update(system=None)
+
+    # ========================================================================
+    # FULL REBUILD
+    # ========================================================================
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(batch_size: int = 500) -> int:
+        """
+        Recreate the whole index from the source tables.
+
+        Returns:
+            Number of index rows written
+        """
+        rows = {}
+
+        for model in InventoryIndexService.PERIPHERAL_TYPES:
+            for instance in model.objects.order_by().iterator():
+                fields = InventoryIndexService._peripheral_fields(instance)
+                rows[('inventory', fields['asset_type'], fields['label_no'])] = fields
+
+        holders = dict(
+            DeviceAllocation.objects.filter(returned_date__isnull=True).values_list('device_id', 'assigned_to_id')
+        )
+        for device in Device.objects.order_by().iterator():
+            fields = InventoryIndexService._device_fields(device, holders.get(device.pk))
+            rows[('device', fields['asset_type'], fields['label_no'])] = fields
+
+        active_systems = SystemDetail.objects.filter(is_active=True, employee__isnull=False).order_by()
+        for system in active_systems.iterator():
+            for label in InventoryIndexService._system_labels(system):
+                inventory_key = ('inventory', label['asset_type'], label['label_no'])
+                if inventory_key in rows:
+                    rows[inventory_key]['system_id'] = system.pk
+                else:
+                    rows[('system', label['asset_type'], label['label_no'])] = {
+                        'asset_type': label['asset_type'],
+                        'label_no': label['label_no'],
+                        'company_name': label.get('company_name') or '',
+                        'description': label.get('description') or '',
+                        'size_inches': label.get('size_inches'),
+                        'status': 'allocated',
+                        'source': 'system',
+                        'source_id': system.pk,
+                        'system_id': system.pk,
+                    }
+
+        InventoryAsset.objects.all().delete()
+        InventoryAsset.objects.bulk_create([InventoryAsset(**fields) for fields in rows.values()], batch_size=batch_size)
+        return len(rows)
+
+    # ========================================================================
+    # LOOKUPS
+    # ========================================================================
+
+    @staticmethod
+    def search(asset_type: str = None, available_only: bool = False, status: str = None,
+               size_inches: int = None, label_no: str = None, holder_id: int = None,
+               team_of: int = None, query: str = None, limit: int = 100):
+        """
+        Search the index in one query.
+
+        Args:
+            asset_type: Restrict to one asset type ('screen', 'laptop', ...)
+            available_only: Only assets that are in stock and not held by anyone
+            status: Restrict to one normalized status
+            size_inches: Exact parsed screen size
+            label_no: Exact label/serial number
+            holder_id: Assets held by this employee (directly or via a system)
+            team_of: Assets held by anyone reporting to this employee, at any depth
+            query: Prefix match on label number
+            limit: Maximum number of rows returned
+
+        Returns:
+            Queryset of InventoryAsset with holder and system employee joined
+        """
+        queryset = InventoryAsset.objects.select_related('holder', 'system__employee')
+
+        if asset_type:
+            queryset = queryset.filter(asset_type=asset_type)
+        if available_only:
+            queryset = queryset.filter(status='available', holder__isnull=True, system__isnull=True)
+        elif status:
+            queryset = queryset.filter(status=status)
+        if size_inches is not None:
+            queryset = queryset.filter(size_inches=size_inches)
+        if label_no:
+            queryset = queryset.filter(label_no=label_no)
+        if holder_id:
+            queryset = queryset.filter(Q(holder_id=holder_id) | Q(system__employee_id=holder_id))
+        if team_of:
+            from .org_hierarchy import OrgHierarchyService
+            queryset = queryset.filter(
+                OrgHierarchyService.team_filter(team_of, 'holder') | OrgHierarchyService.team_filter(team_of, 'system__employee')
+            )
+        if query:
+            queryset = queryset.filter(label_no__startswith=query)
+
+        return queryset[:limit]
+
+    @staticmethod
+    def who_holds(label_no: str) -> List[Dict]:
+        """Resolve the current holder of every asset carrying a label"""
+        return [
+            InventoryIndexService.serialize(asset)
+            for asset in InventoryIndexService.search(label_no=label_no)
+        ]
+
+    @staticmethod
+    def serialize(asset: InventoryAsset) -> Dict:
+        """JSON-friendly representation of an index row"""
+        holder = asset.current_holder
+        return {
+            'asset_type': asset.asset_type,
+            'label_no': asset.label_no,
+            'company_name': asset.company_name,
+            'description': asset.description,
+            'size_inches': asset.size_inches,
+            'status': asset.status,
+            'is_free': asset.is_free,
+            'holder': {
+                'id': holder.id,
+                'full_name': holder.full_name,
+                'employee_code': holder.employee_code,
+            } if holder else None,
+            'system_id': asset.system_id,
+            'source': asset.source,
+            'source_id': asset.source_id,
+        }
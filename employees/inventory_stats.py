@@ -0,0 +1,115 @@
+# Inventory Statistics Service
+# Builds the counters shown on the IT admin system_management page.
+#
+# SystemDetail counters come from one conditional-aggregation query and the six
+# peripheral inventories from one UNION ALL of per-table status GROUP BYs, so the
+# whole page renders from two queries. The snapshot is cached and dropped from
+# signals.py whenever a system or device row is saved or deleted.
+
+from typing import Dict
+from django.core.cache import cache
+from django.db.models import CharField, Count, Q, Value
+from .models import SystemDetail, CPUDevice, ScreenDevice, KeyboardDevice, MouseDevice, HeadphoneDevice, ExtenderDevice
+
+
+class InventoryStatsService:
+    """
+    Service class for system and peripheral inventory statistics
+    """
+
+    CACHE_KEY = 'employees:stats:inventory'
+    CACHE_TIMEOUT = 60 * 60  # Signals invalidate on change; TTL is only a safety net
+
+    # Peripheral models keyed by the suffix used in the template context
+    # (total_<key>, allocated_<key>, available_<key>)
+    DEVICE_MODELS = {
+        'cpus': CPUDevice,
+        'screens': ScreenDevice,
+        'keyboards': KeyboardDevice,
+        'mice': MouseDevice,
+        'headphones': HeadphoneDevice,
+        'extenders': ExtenderDevice,
+    }
+
+    # ========================================================================
+    # SYSTEM DETAIL COUNTERS
+    # ========================================================================
+
+    @staticmethod
+    def compute_system_stats() -> Dict:
+        """Compute every SystemDetail counter in a single aggregate query"""
+        has_mac = Q(macaddress__isnull=False) & ~Q(macaddress='')
+        assigned = Q(employee__isnull=False, is_active=True)
+        pending = Q(employee__isnull=False, is_active=False)
+
+        return SystemDetail.objects.aggregate(
+            total_systems=Count('id'),
+            available_systems=Count('id', filter=Q(employee__isnull=True)),
+            allocated_systems=Count('id', filter=assigned),
+            inactive_systems=Count('id', filter=Q(is_active=False)),
+            windows_systems=Count('id', filter=Q(system_type='windows')),
+            mac_systems=Count('id', filter=Q(system_type='mac')),
+            total_mac_addresses=Count('id', filter=Q(system_type='mac') & has_mac),
+            allocated_mac_addresses=Count('id', filter=Q(system_type='mac') & has_mac & assigned),
+            available_mac_addresses=Count('id', filter=Q(system_type='mac') & pending),
+            allocated_windows_systems=Count('id', filter=Q(system_type='windows') & assigned),
+            available_windows_systems=Count('id', filter=Q(system_type='windows') & pending),
+        )
+
+    # ========================================================================
+    # PERIPHERAL COUNTERS
+    # ========================================================================
+
+    @staticmethod
+    def compute_device_stats() -> Dict:
+        """
+        Compute per-status counts for all peripheral tables in one UNION query.
+
+        Returns:
+            Dict with total_/allocated_/available_ counters for each device kind
+            plus a device_status_breakdown mapping kind -> {status: count}
+        """
+        querysets = [
+            model.objects.order_by().values('status').annotate(
+                kind=Value(kind, output_field=CharField()),
+                count=Count('id'),
+            ).values_list('kind', 'status', 'count')
+            for kind, model in InventoryStatsService.DEVICE_MODELS.items()
+        ]
+        rows = querysets[0].union(*querysets[1:], all=True)
+
+        breakdown = {kind: {} for kind in InventoryStatsService.DEVICE_MODELS}
+        for kind, status, count in rows:
+            breakdown[kind][status] = count
+
+        stats = {'device_status_breakdown': breakdown}
+        for kind, counts in breakdown.items():
+            stats[f'total_{kind}'] = sum(counts.values())
+            stats[f'allocated_{kind}'] = counts.get('allocated', 0)
+            stats[f'available_{kind}'] = counts.get('available', 0)
+        return stats
+
+    # ========================================================================
+    # SNAPSHOT
+    # ========================================================================
+
+    @staticmethod
+    def compute_snapshot() -> Dict:
+        """Compute the full inventory snapshot (two queries)"""
+        snapshot = InventoryStatsService.compute_system_stats()
+        snapshot.update(InventoryStatsService.compute_device_stats())
+        return snapshot
+
+    @staticmethod
+    def get_snapshot() -> Dict:
+        """Return the cached inventory snapshot, computing it on a miss"""
+        snapshot = cache.get(InventoryStatsService.CACHE_KEY)
+        if snapshot is None:
+            snapshot = InventoryStatsService.compute_snapshot()
+            cache.set(InventoryStatsService.CACHE_KEY, snapshot, InventoryStatsService.CACHE_TIMEOUT)
+        return snapshot
+
+    @staticmethod
+    def invalidate() -> None:
+        """Drop the cached inventory snapshot"""
+        cache.delete(InventoryStatsService.CACHE_KEY)
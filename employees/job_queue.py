@@ -0,0 +1,314 @@
+# Background Job Queue
+# Database-backed queue for work that outgrows an HTTP request.
+#
+# Imports, payslip e-mails, bulk PDFs and large exports are enqueued as
+# BackgroundJob rows and executed by the run_job_worker command in a thread
+# or process pool; no broker is needed. A claim is a conditional UPDATE
+# (... WHERE status='queued'), with SELECT ... FOR UPDATE SKIP LOCKED where
+# the database supports it, so several workers can share the table without
+# taking the same job twice. Handlers report progress through JobContext and
+# pages poll the row until it finishes.
+
+import importlib
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger('employees.jobs')
+
+# kind -> handler(job, context) returning a JSON-serializable result
+_HANDLERS: Dict[str, Callable] = {}
+_handlers_loaded = False
+
+DEFAULT_HANDLER_MODULES = ['employees.jobs']
+
+
+def job_storage():
+    """The private storage job uploads and result files are kept in"""
+    return BackgroundJob._meta.get_field('result_file').storage
+
+
+def register(kind: str):
+    """Decorator registering a job handler under a kind name"""
+    def decorator(func):
+        _HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+class JobCancelled(Exception):
+    """Raised by JobContext.progress() when the job was cancelled meanwhile"""
+
+
+class JobContext:
+    """
+    Handle given to a running job for progress reporting and result files.
+    """
+
+    PROGRESS_INTERVAL = 1.0  # Seconds between progress writes
+
+    def __init__(self, job: BackgroundJob):
+        self.job = job
+        self._last_write = 0.0
+
+    @property
+    def user(self):
+        return self.job.created_by
+
+    def progress(self, done: int, total: int = None, message: str = '', force: bool = False) -> None:
+        """Record progress (throttled) and refresh the heartbeat"""
+        now = time.monotonic()
+        if not force and now - self._last_write < self.PROGRESS_INTERVAL:
+            return
+        self._last_write = now
+        percent = min(int(done * 100 / total), 99) if total else 0
+        updated = BackgroundJob.objects.filter(pk=self.job.pk, status='running').update(
+            progress=percent, progress_message=message[:255], heartbeat_at=timezone.now()
+        )
+        if not updated:
+            raise JobCancelled()
+
+    def open_upload(self, key: str = 'upload', mode: str = 'rb'):
+        """Open a file stored with JobQueueService.store_upload()"""
+        return job_storage().open(self.job.payload[key], mode)
+
+    def save_result_file(self, name: str, content) -> None:
+        """Attach a result file (bytes, or an open file object) to the job"""
+        content = ContentFile(content) if isinstance(content, (bytes, str)) else File(content)
+        self.job.result_file.save(name, content, save=False)
+        BackgroundJob.objects.filter(pk=self.job.pk).update(result_file=self.job.result_file.name)
+
+
+class JobQueueService:
+    """
+    Service class for enqueuing, claiming and executing background jobs
+    """
+
+    UPLOAD_DIR = 'background_jobs/uploads'
+
+    # ========================================================================
+    # HANDLER REGISTRY
+    # ========================================================================
+
+    @staticmethod
+    def load_handlers() -> Dict[str, Callable]:
+        """Import the handler modules once (settings.JOB_QUEUE_HANDLER_MODULES)"""
+        global _handlers_loaded
+        if not _handlers_loaded:
+            for module in getattr(settings, 'JOB_QUEUE_HANDLER_MODULES', DEFAULT_HANDLER_MODULES):
+                importlib.import_module(module)
+            _handlers_loaded = True
+        return _HANDLERS
+
+    # ========================================================================
+    # ENQUEUE
+    # ========================================================================
+
+    @staticmethod
+    def store_upload(upload) -> str:
+        """Persist an uploaded file for a job; returns the storage name for the payload"""
+        name = f'{JobQueueService.UPLOAD_DIR}/{uuid.uuid4().hex}_{os.path.basename(upload.name)}'
+        return job_storage().save(name, upload)
+
+    @staticmethod
+    def enqueue(kind: str, payload: Dict = None, user=None, label: str = '', max_attempts: int = 1,
+                delay: Optional[timedelta] = None) -> BackgroundJob:
+        """
+        Queue a job. The row is visible to workers once the surrounding
+        transaction commits.
+        """
+        job = BackgroundJob.objects.create(
+            kind=kind,
+            label=label[:200],
+            payload=payload or {},
+            created_by=user if user is not None and user.is_authenticated else None,
+            max_attempts=max_attempts,
+            run_after=timezone.now() + (delay or timedelta()),
+        )
+        if getattr(settings, 'JOB_QUEUE_EAGER', False):
+            # Development/testing: run inline instead of waiting for a worker
+            transaction.on_commit(lambda: JobQueueService.run_job(job.pk, worker='eager'))
+        return job
+
+    @staticmethod
+    def cancel(job: BackgroundJob) -> bool:
+        """Cancel a queued or running job; running handlers stop at their next progress()"""
+        if BackgroundJob.objects.filter(pk=job.pk, status='queued').update(
+            status='cancelled', finished_at=timezone.now()
+        ):
+            JobQueueService._delete_upload(job)
+            return True
+        # A running handler may still be reading the upload; run_job removes it
+        return bool(BackgroundJob.objects.filter(pk=job.pk, status='running').update(
+            status='cancelled', finished_at=timezone.now()
+        ))
+
+    # ========================================================================
+    # CLAIM AND EXECUTE
+    # ========================================================================
+
+    @staticmethod
+    def worker_name() -> str:
+        return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+    @staticmethod
+    def claim(worker: str, kinds=None) -> Optional[int]:
+        """
+        Take the oldest due job.
+
+        Returns:
+            The claimed job id, or None when nothing is due
+        """
+        lock_kwargs = {'skip_locked': True} if connection.features.has_select_for_update_skip_locked else {}
+        now = timezone.now()
+        with transaction.atomic():
+            candidates = BackgroundJob.objects.select_for_update(**lock_kwargs).filter(
+                status='queued', run_after__lte=now
+            )
+            if kinds:
+                candidates = candidates.filter(kind__in=kinds)
+            job_id = candidates.order_by('run_after', 'pk').values_list('pk', flat=True).first()
+            if job_id is None:
+                return None
+            claimed = BackgroundJob.objects.filter(pk=job_id, status='queued').update(
+                status='running', worker=worker[:100], started_at=now, heartbeat_at=now,
+                attempts=F('attempts') + 1, error='',
+            )
+        return job_id if claimed else None
+
+    @staticmethod
+    def run_job(job_id: int, worker: str = '') -> str:
+        """
+        Execute a claimed job and record its outcome. Safe to call from a
+        pool thread or a spawned process.
+
+        Returns:
+            The final status
+        """
+        close_old_connections()
+        try:
+            job = BackgroundJob.objects.select_related('created_by').get(pk=job_id)
+            if job.status != 'running':
+                # Eager mode runs straight from the queue
+                if job.status != 'queued' or not BackgroundJob.objects.filter(pk=job_id, status='queued').update(
+                        status='running', worker=worker, started_at=timezone.now(),
+                        heartbeat_at=timezone.now(), attempts=F('attempts') + 1):
+                    return job.status
+                job.refresh_from_db()
+
+            handler = JobQueueService.load_handlers().get(job.kind)
+            if handler is None:
+                JobQueueService._finish(job, 'failed', error=f'No handler registered for "{job.kind}"')
+                return 'failed'
+
+            start = time.monotonic()
+            try:
+                result = handler(job, JobContext(job))
+            except JobCancelled:
+                logger.info('Job %s (%s) cancelled', job.pk, job.kind)
+                JobQueueService._delete_upload(job)
+                return 'cancelled'
+            except Exception as e:
+                logger.exception('Job %s (%s) failed', job.pk, job.kind)
+                if job.attempts < job.max_attempts:
+                    BackgroundJob.objects.filter(pk=job.pk, status='running').update(
+                        status='queued', error=traceback.format_exc()[-4000:],
+                        run_after=timezone.now() + timedelta(seconds=30 * 2 ** job.attempts),
+                    )
+                    return 'queued'
+                JobQueueService._finish(job, 'failed', error=f'{e}\n\n{traceback.format_exc()[-4000:]}')
+                return 'failed'
+
+            JobQueueService._finish(job, 'succeeded', result=result)
+            logger.info('Job %s (%s) succeeded in %.1fs', job.pk, job.kind, time.monotonic() - start)
+            return 'succeeded'
+        finally:
+            close_old_connections()
+
+    @staticmethod
+    def _finish(job: BackgroundJob, status: str, result=None, error: str = '') -> None:
+        BackgroundJob.objects.filter(pk=job.pk, status='running').update(
+            status=status, result=result, error=error, finished_at=timezone.now(),
+            progress=100 if status == 'succeeded' else F('progress'),
+        )
+        if status in BackgroundJob.FINISHED_STATUSES:
+            JobQueueService._delete_upload(job)
+
+    @staticmethod
+    def _delete_upload(job: BackgroundJob) -> None:
+        """Remove the stored upload of a job that will not run again"""
+        upload = (job.payload or {}).get('upload')
+        if upload:
+            job_storage().delete(upload)
+
+    # ========================================================================
+    # MAINTENANCE
+    # ========================================================================
+
+    @staticmethod
+    def requeue_stale(stale_after: timedelta) -> int:
+        """Return jobs whose worker stopped heart-beating to the queue (or fail them)"""
+        cutoff = timezone.now() - stale_after
+        stale = BackgroundJob.objects.filter(status='running', heartbeat_at__lt=cutoff)
+        failed = 0
+        for job in stale.filter(attempts__gte=F('max_attempts')).only('pk', 'payload'):
+            if BackgroundJob.objects.filter(pk=job.pk, status='running', heartbeat_at__lt=cutoff).update(
+                status='failed', error='Worker stopped responding', finished_at=timezone.now()
+            ):
+                JobQueueService._delete_upload(job)
+                failed += 1
+        requeued = stale.update(status='queued', worker='')
+        return failed + requeued
+
+    @staticmethod
+    def prune(older_than: timedelta) -> int:
+        """Delete finished jobs (and their files) older than the given age"""
+        old = BackgroundJob.objects.filter(
+            status__in=BackgroundJob.FINISHED_STATUSES, finished_at__lt=timezone.now() - older_than
+        )
+        storage = job_storage()
+        for name, payload in old.values_list('result_file', 'payload'):
+            # Uploads are normally gone already; jobs from older releases may still have one
+            for stored in (name, (payload or {}).get('upload')):
+                if stored:
+                    storage.delete(stored)
+        count, _ = old.delete()
+        return count
+
+    # ========================================================================
+    # SERIALIZATION
+    # ========================================================================
+
+    @staticmethod
+    def summarize(job: BackgroundJob) -> Dict:
+        """JSON payload for the progress-polling endpoint"""
+        from django.urls import reverse
+        return {
+            'id': job.pk,
+            'kind': job.kind,
+            'label': job.label,
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'finished': job.is_finished,
+            'progress': job.progress,
+            'message': job.progress_message,
+            'result': job.result,
+            'error': job.error.split('\n\n', 1)[0] if job.error else '',
+            'download_url': reverse('employees:background_job_download', args=[job.pk]) if job.result_file else None,
+            'created_at': job.created_at,
+            'finished_at': job.finished_at,
+        }
@@ -0,0 +1,226 @@
+# Background Job Handlers
+# Work moved out of the request/response cycle onto the job queue.
+#
+# Each handler receives the BackgroundJob and a JobContext, reports progress
+# through the context and returns a JSON-serializable result that the job
+# page renders: a summary message, counts and the first row errors.
+#
+# Account, public holiday and job description files go through the bulk
+# import engine (bulk_import.py), which commits one chunk at a time; the
+# employee import commits each row in its own transaction. Either way a bad
+# row does not poison the rest and the progress written to the job row is
+# visible to the polling page while the import runs.
+
+import csv
+import os
+import tempfile
+from datetime import datetime
+from io import TextIOWrapper
+
+from django.db import transaction
+
+from .bulk_import import BulkImporter, ImportReport, count_rows
+from .code_allocator import EmployeeCodeAllocator
+from .import_schemas import AccountImportSchema, JobDescriptionImportSchema, PublicHolidayImportSchema
+from .job_queue import register
+from .models import Department, Designation, Employee
+
+
+def _count_rows(ctx):
+    """Data rows in the uploaded file (minus the header), for progress"""
+    with ctx.open_upload() as f:
+        return count_rows(f, ctx.job.payload.get('filename', ''))
+
+
+def _csv_rows(f):
+    """DictReader over the stored upload"""
+    return csv.DictReader(TextIOWrapper(f, encoding='utf-8'))
+
+
+def _run_import(ctx, schema):
+    """
+    Stream the upload through the bulk-import engine. Rejected rows are
+    attached to the job as a CSV that can be fixed and uploaded again.
+    """
+    filename = ctx.job.payload.get('filename', '')
+    total = _count_rows(ctx)
+    with ctx.open_upload() as f:
+        report = BulkImporter(schema).run(f, filename, progress=ctx.progress, total=total)
+    try:
+        content = report.error_file_bytes()
+        if content is not None:
+            ctx.save_result_file(f'{os.path.splitext(os.path.basename(filename))[0]}_errors.csv', content)
+    finally:
+        report.close()
+    return report.result()
+
+
+# ============================================================================
+# EMPLOYEE IMPORT
+# ============================================================================
+
+def _existing_and_new_emails(ctx):
+    """
+    Official e-mails of the rows without an Employee Code, split into those
+    already on file and new ones (which need a generated code)
+    """
+    with ctx.open_upload() as f:
+        emails = {
+            (row.get('Official Email') or '').strip()
+            for row in _csv_rows(f) if not (row.get('Employee Code') or '').strip()
+        }
+    emails.discard('')
+    emails = sorted(emails)
+    existing = set()
+    for start in range(0, len(emails), 1000):
+        existing.update(
+            Employee.objects.filter(official_email__in=emails[start:start + 1000]).values_list('official_email', flat=True)
+        )
+    return existing, set(emails) - existing
+
+
+@register('import_employees_csv')
+def import_employees_csv(job, ctx):
+    total = _count_rows(ctx)
+    report = ImportReport('employee')
+    # New hires get their codes from one reservation instead of one per save()
+    existing_emails, new_emails = _existing_and_new_emails(ctx)
+    codes = iter(EmployeeCodeAllocator.reserve(len(new_emails)))
+
+    with ctx.open_upload() as f:
+        for row_num, row in enumerate(_csv_rows(f), start=2):
+            ctx.progress(row_num - 1, total, f'Row {row_num - 1} of {total}')
+            try:
+                with transaction.atomic():
+                    # Get or create department
+                    dept_name = row.get('Department', '').strip()
+                    if not dept_name:
+                        raise ValueError("Department is required")
+
+                    department, _ = Department.objects.get_or_create(
+                        name=dept_name,
+                        defaults={'description': f'{dept_name} Department'}
+                    )
+
+                    # Get or create designation
+                    desig_name = row.get('Designation', '').strip()
+                    if not desig_name:
+                        raise ValueError("Designation is required")
+
+                    designation, _ = Designation.objects.get_or_create(
+                        name=desig_name,
+                        department=department,
+                        defaults={'description': f'{desig_name} Position'}
+                    )
+
+                    # Parse dates
+                    joining_date = datetime.strptime(row.get('Joining Date', '').strip(), '%Y-%m-%d').date() if row.get('Joining Date', '').strip() else None
+                    relieving_date = datetime.strptime(row.get('Relieving Date', '').strip(), '%Y-%m-%d').date() if row.get('Relieving Date', '').strip() else None
+                    date_of_birth = datetime.strptime(row.get('Date of Birth', '').strip(), '%Y-%m-%d').date() if row.get('Date of Birth', '').strip() else None
+                    anniversary_date = datetime.strptime(row.get('Anniversary Date', '').strip(), '%Y-%m-%d').date() if row.get('Anniversary Date', '').strip() else None
+
+                    # Create or update employee
+                    employee_code = row.get('Employee Code', '').strip()
+                    official_email = row.get('Official Email', '').strip()
+
+                    if not official_email:
+                        raise ValueError("Official Email is required")
+
+                    if not employee_code and official_email not in existing_emails:
+                        employee_code = next(codes, '')  # Left empty, save() allocates one
+                        existing_emails.add(official_email)
+
+                    defaults = {
+                        'employee_code': employee_code,
+                        'full_name': row.get('Full Name', '').strip(),
+                        'department': department,
+                        'designation': designation,
+                        'joining_date': joining_date,
+                        'relieving_date': relieving_date,
+                        'employment_status': row.get('Employment Status', 'active').strip(),
+                        'mobile_number': row.get('Mobile Number', '').strip(),
+                        'personal_email': row.get('Personal Email', '').strip() or None,
+                        'local_address': row.get('Local Address', '').strip(),
+                        'permanent_address': row.get('Permanent Address', '').strip(),
+                        'date_of_birth': date_of_birth,
+                        'marital_status': row.get('Marital Status', 'single').strip(),
+                        'anniversary_date': anniversary_date,
+                        'highest_qualification': row.get('Highest Qualification', '').strip(),
+                        'total_experience_years': int(row.get('Total Experience Years', 0) or 0),
+                        'total_experience_months': int(row.get('Total Experience Months', 0) or 0),
+                        'period_type': row.get('Period Type', 'confirmed').strip(),
+                        'aadhar_card_number': row.get('Aadhar Card Number', '').strip(),
+                        'pan_card_number': row.get('PAN Card Number', '').strip().upper(),
+                        'emergency_contact_name': row.get('Emergency Contact Name', '').strip(),
+                        'emergency_contact_mobile': row.get('Emergency Contact Mobile', '').strip(),
+                        'emergency_contact_email': row.get('Emergency Contact Email', '').strip(),
+                        'emergency_contact_address': row.get('Emergency Contact Address', '').strip(),
+                        'emergency_contact_relationship': row.get('Emergency Contact Relationship', '').strip(),
+                    }
+                    if not employee_code:
+                        # Keep the code of an existing employee
+                        del defaults['employee_code']
+                    Employee.objects.update_or_create(official_email=official_email, defaults=defaults)
+                report.success += 1
+            except Exception as e:
+                report.error(row_num, e)
+
+    return report.result()
+
+
+# ============================================================================
+# PUBLIC HOLIDAY IMPORT / EXPORT
+# ============================================================================
+
+@register('import_public_holidays_csv')
+def import_public_holidays_csv(job, ctx):
+    return _run_import(ctx, PublicHolidayImportSchema(user=ctx.user))
+
+
+@register('export_public_holidays')
+def export_public_holidays(job, ctx):
+    from .exports import build_public_holidays_workbook
+
+    ctx.progress(0, 1, 'Building workbook', force=True)
+    wb, filename = build_public_holidays_workbook()
+    with tempfile.TemporaryFile() as f:
+        wb.save(f)
+        f.seek(0)
+        ctx.save_result_file(filename, f)
+    return {'message': 'Public holiday export is ready.', 'filename': filename}
+
+
+# ============================================================================
+# JOB DESCRIPTION IMPORT
+# ============================================================================
+
+@register('import_job_descriptions_csv')
+def import_job_descriptions_csv(job, ctx):
+    return _run_import(ctx, JobDescriptionImportSchema(user=ctx.user))
+
+
+# ============================================================================
+# ACCOUNT IMPORT
+# ============================================================================
+
+@register('import_accounts_csv')
+def import_accounts_csv(job, ctx):
+    schema = AccountImportSchema(user=ctx.user, skip_duplicates=job.payload.get('skip_duplicates', False))
+    return _run_import(ctx, schema)
+
+
+# ============================================================================
+# PAYSLIPS
+# ============================================================================
+
+@register('email_payslip')
+def email_payslip(job, ctx):
+    from .payslip_service import PayslipService
+
+    payload = job.payload
+    employee = Employee.objects.select_related('department', 'designation').get(pk=payload['employee_id'])
+    ctx.progress(0, 1, 'Rendering payslip', force=True)
+    PayslipService.email_payslip(
+        employee, int(payload['month']), int(payload['year']), payload['month_name'], payload['base_url']
+    )
+    return {'message': f"Payslip for {payload['month_name']} {payload['year']} has been sent to {employee.official_email}."}
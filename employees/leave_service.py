@@ -12,6 +12,7 @@ from typing import Dict, Tuple, Optional, List
 from django.db.models import Sum, Q
 from django.utils import timezone
 from .models import Employee, LeaveApplication, LeaveType, PublicHoliday
+from .lifecycle_service import EmployeeLifecycleService
 
 
 class LeaveValidationResult:
@@ -170,20 +171,31 @@ class LeaveManagementService:
     # ========================================================================
 
     @staticmethod
-    def identify_employee_type(employee: Employee) -> str:
+    def identify_employee_type(employee: Employee, on: Optional[date] = None) -> str:
         """
         FLOW DIAGRAM STEP 1: Identify Employee Type
         First decision point in the leave management flow
         
         Decision Logic:
-        - If employee.period_type in [trainee, intern, probation, notice_period] → 'restricted'
-        - If employee.period_type = confirmed → 'regular'
+        - If the employee's phase on `on` (default today) is trainee, intern,
+          probation or notice_period → 'restricted'
+        - If the phase is confirmed → 'regular'
+        
+        The lifecycle timeline always ends in the current period_type,
+        open-ended, so for today and later dates the phase is period_type
+        itself: an employee still on probation is restricted for a future
+        leave even after probation_end_date until HR confirms them. Only
+        past dates are looked up in the timeline (one query per date).
         
         Returns:
             'restricted' - for Trainee/Intern/Probation/Notice period
             'regular' - for Confirmed employees
         """
-        if employee.period_type in LeaveManagementService.RESTRICTED_EMPLOYEE_TYPES:
+        if on is not None and on < timezone.localdate():
+            phase = EmployeeLifecycleService.current_phase(employee, on)
+        else:
+            phase = employee.period_type
+        if phase in LeaveManagementService.RESTRICTED_EMPLOYEE_TYPES:
             return 'restricted'
         return 'regular'
 
@@ -413,72 +425,91 @@ class LeaveManagementService:
         if year is None:
             year = timezone.now().year
 
-        # Get annual allocation
-        annual_allocation = LeaveManagementService.ANNUAL_ALLOCATIONS.get(leave_type_code, 0)
+        leave_type_name = LeaveManagementService.get_leave_type_name(leave_type_code)
+        approved_leaves = LeaveApplication.objects.filter(
+            employee=employee,
+            leave_type__name=leave_type_name,
+            status='approved',
+            start_date__year=year
+        ).aggregate(total=Sum('total_days'))['total']
 
-        # For Casual Leave, calculate accrued balance based on months worked
-        if leave_type_code == LeaveManagementService.CASUAL_LEAVE:
-            # Calculate months worked in current year
-            current_date = timezone.now().date()
-
-            # If employee joined this year, calculate from joining date
-            if employee.joining_date and employee.joining_date.year == year:
-                start_month = employee.joining_date.month
-            else:
-                start_month = 1
-
-            # Current month calculation
-            if year > current_date.year:  # Future year, 0 accrual
-                months_worked = 0
-            elif year < current_date.year:  # Past year, full accrual
-                months_worked = 12
-            else:  # Current year
-                months_worked = current_date.month - start_month + 1
+        return LeaveManagementService._balance(employee, leave_type_code, year, approved_leaves or 0)
 
-            # Accrued leaves = months worked (max 12)
-            accrued_leaves = max(0, min(months_worked, 12))
+    @staticmethod
+    def get_leave_balances(employee: Employee, leave_type_codes: List[str], year: int = None,
+                           approved_days: Optional[Dict[str, Decimal]] = None) -> Dict[str, Decimal]:
+        """
+        Balances of several leave types from one grouped query, for forms
+        that show them all (see get_leave_balance for the rules)
 
-            # Get total approved leaves for this year
-            leave_type_name = LeaveManagementService.get_leave_type_name(leave_type_code)
-            approved_leaves = LeaveApplication.objects.filter(
-                employee=employee,
-                leave_type__name=leave_type_name,
-                status='approved',
-                start_date__year=year
-            ).aggregate(total=Sum('total_days'))['total']
+        Args:
+            approved_days: get_approved_days() result, when the caller has it already
 
-            # Handle None case
-            if approved_leaves is None:
-                approved_leaves = 0
+        Returns:
+            {leave_type_code: Decimal balance}
+        """
+        if year is None:
+            year = timezone.now().year
 
-            # Calculate balance (accrued - used)
-            balance = Decimal(str(accrued_leaves)) - Decimal(str(approved_leaves))
+        approved = approved_days if approved_days is not None else LeaveManagementService.get_approved_days(employee, year)
+        return {
+            code: LeaveManagementService._balance(
+                employee, code, year, approved.get(LeaveManagementService.get_leave_type_name(code), 0)
+            )
+            for code in leave_type_codes
+        }
 
-            return balance
-        else:
-            # For other leave types, full annual allocation is available
-            leave_type_name = LeaveManagementService.get_leave_type_name(leave_type_code)
-            approved_leaves = LeaveApplication.objects.filter(
-                employee=employee,
-                leave_type__name=leave_type_name,
-                status='approved',
-                start_date__year=year
-            ).aggregate(total=Sum('total_days'))['total']
+    @staticmethod
+    def get_approved_days(employee: Employee, year: int = None) -> Dict[str, Decimal]:
+        """Approved leave days of a year per leave type name, in one query"""
+        if year is None:
+            year = timezone.now().year
 
-            # Handle None case
-            if approved_leaves is None:
-                approved_leaves = 0
+        rows = LeaveApplication.objects.filter(
+            employee=employee,
+            status='approved',
+            start_date__year=year
+        ).values('leave_type__name').annotate(total=Sum('total_days'))
+        return {row['leave_type__name']: row['total'] or 0 for row in rows}
 
-            # Calculate balance
-            balance = Decimal(str(annual_allocation)) - Decimal(str(approved_leaves))
+    @staticmethod
+    def _casual_months_worked(employee: Employee, year: int) -> int:
+        """Months of a year casual leave has accrued for (1 per month)"""
+        current_date = timezone.now().date()
 
-            return balance
+        # If employee joined this year, calculate from joining date
+        if employee.joining_date and employee.joining_date.year == year:
+            start_month = employee.joining_date.month
+        else:
+            start_month = 1
+
+        if year > current_date.year:  # Future year, 0 accrual
+            return 0
+        if year < current_date.year:  # Past year, full accrual
+            return 12
+        return current_date.month - start_month + 1
+
+    @staticmethod
+    def _balance(employee: Employee, leave_type_code: str, year: int, approved_leaves) -> Decimal:
+        """Allocated (accrued, for casual leave) minus the approved days"""
+        if leave_type_code == LeaveManagementService.CASUAL_LEAVE:
+            # Accrued leaves = months worked (max 12)
+            months_worked = LeaveManagementService._casual_months_worked(employee, year)
+            allocation = max(0, min(months_worked, 12))
+        else:
+            # For other leave types, full annual allocation is available
+            allocation = LeaveManagementService.ANNUAL_ALLOCATIONS.get(leave_type_code, 0)
+        return Decimal(str(allocation)) - Decimal(str(approved_leaves))
 
     @staticmethod
-    def get_casual_leave_accrual_info(employee: Employee, year: int = None) -> Dict:
+    def get_casual_leave_accrual_info(employee: Employee, year: int = None,
+                                      approved_days: Optional[Dict[str, Decimal]] = None) -> Dict:
         """
         Get detailed accrual information for casual leave
         Useful for displaying to users why they have certain balance
+
+        Args:
+            approved_days: get_approved_days() result, when the caller has it already
         
         Returns:
             Dict with keys: accrued, used, available, months_worked
@@ -486,29 +517,13 @@ class LeaveManagementService:
         if year is None:
             year = timezone.now().year
 
-        current_date = timezone.now().date()
-
-        if employee.joining_date and employee.joining_date.year == year:
-            start_month = employee.joining_date.month
-        else:
-            start_month = 1
-
-        if year > current_date.year:
-            months_worked = 0
-        elif year < current_date.year:
-            months_worked = 12
-        else:
-            months_worked = current_date.month - start_month + 1
-
+        months_worked = LeaveManagementService._casual_months_worked(employee, year)
         accrued_leaves = max(0, min(months_worked, 12))
 
+        if approved_days is None:
+            approved_days = LeaveManagementService.get_approved_days(employee, year)
         leave_type_name = LeaveManagementService.get_leave_type_name(LeaveManagementService.CASUAL_LEAVE)
-        approved_leaves = LeaveApplication.objects.filter(
-            employee=employee,
-            leave_type__name=leave_type_name,
-            status='approved',
-            start_date__year=year
-        ).aggregate(total=Sum('total_days'))['total'] or 0
+        approved_leaves = approved_days.get(leave_type_name, 0)
 
         available = accrued_leaves - approved_leaves
 
@@ -559,7 +574,7 @@ class LeaveManagementService:
         # STEP 1: IDENTIFY EMPLOYEE TYPE
         # ====================================================================
         # First decision point: Regular Employee OR Trainee/Intern/Probation/Notice period
-        employee_type = LeaveManagementService.identify_employee_type(employee)
+        employee_type = LeaveManagementService.identify_employee_type(employee, start_date)
 
         # If restricted employee, reject for restricted leave types
         if employee_type == 'restricted' and leave_type_code in LeaveManagementService.RESTRICTED_LEAVE_TYPES:
@@ -731,10 +746,12 @@ class PaidAbsenceService:
             (True, success_message) if eligible
             (False, rejection_reason) if not eligible
         """
+        phase = EmployeeLifecycleService.current_phase(employee)
+
         # ====================================================================
         # CHECK 1.1: IDENTIFY EMPLOYEE TYPE
         # ====================================================================
-        if employee.period_type in ['trainee', 'intern']:
+        if phase in ['trainee', 'intern']:
             return False, (
                 "❌ Trainees and Interns are not eligible for paid absence. "
                 "Only confirmed employees with at least 1 year tenure are eligible."
@@ -743,7 +760,7 @@ class PaidAbsenceService:
         # ====================================================================
         # CHECK 1.2: CHECK EMPLOYMENT PHASE
         # ====================================================================
-        if employee.period_type in ['probation', 'notice_period']:
+        if phase in ['probation', 'notice_period']:
             return False, (
                 "❌ Employees on Probation or Notice period are not eligible for paid absence. "
                 "Only confirmed employees with at least 1 year tenure are eligible."
@@ -0,0 +1,310 @@
+# Employee Lifecycle Service
+# Maintains the EmploymentPhase timeline of each employee and answers
+# "which phase was / will this employee be in on a date".
+#
+# The timeline is planned from the period type and the joining, probation
+# end and relieving dates against a schedule: trainees spend 6 months as
+# trainee and 3 on probation, everyone else is on probation until
+# probation_end_date, then confirmed. The timeline always ends in the
+# employee's current period_type, open-ended: nobody is treated as confirmed
+# before HR (or run_lifecycle_transitions --promote) says so. When HR moves
+# an employee ahead of the schedule (early confirmation, notice period) the
+# new phase starts on the day it was first seen, which the stored timeline
+# remembers. The post_save signal re-plans on relevant changes and
+# run_lifecycle_transitions does so daily.
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .evaluation_service import EvaluationCycleService
+from .models_lifecycle import EmploymentPhase
+
+
+class LifecycleSubject(NamedTuple):
+    """The employee fields that determine the timeline"""
+    employee_id: int
+    period_type: str
+    joining_date: Optional[date]
+    probation_end_date: Optional[date]
+    relieving_date: Optional[date]
+
+
+class PhaseSpan(NamedTuple):
+    phase: str
+    start_date: date
+    end_date: Optional[date]
+
+
+class EmployeeLifecycleService:
+    """
+    Service class for the employee lifecycle timeline
+    """
+
+    TRAINEE_MONTHS = 6
+    PROBATION_MONTHS = 3
+
+    # Order of the normal progression; intern is a track of its own
+    PHASE_RANK = {'trainee': 0, 'probation': 1, 'confirmed': 2, 'notice_period': 3}
+
+    SUBJECT_FIELDS = ('pk', 'period_type', 'joining_date', 'probation_end_date', 'relieving_date')
+    # Employee fields whose change requires re-planning
+    TRACKED_FIELDS = SUBJECT_FIELDS[1:]
+
+    # ========================================================================
+    # PLANNING
+    # ========================================================================
+
+    @staticmethod
+    def default_probation_end(joining_date: date) -> date:
+        """Probation ends 3 months after joining (clamped to the month's last day)"""
+        return EvaluationCycleService.add_months(joining_date, EmployeeLifecycleService.PROBATION_MONTHS)
+
+    @staticmethod
+    def _schedule(subject: LifecycleSubject) -> List[PhaseSpan]:
+        """Phases implied by the joining date and the employee's track"""
+        add_months = EvaluationCycleService.add_months
+        day = timedelta(days=1)
+        joined = subject.joining_date
+
+        if subject.period_type == 'intern':
+            return [PhaseSpan('intern', joined, None)]
+
+        if subject.period_type == 'trainee':
+            trainee_end = add_months(joined, EmployeeLifecycleService.TRAINEE_MONTHS) - day
+            probation_end = add_months(trainee_end + day, EmployeeLifecycleService.PROBATION_MONTHS) - day
+            return [
+                PhaseSpan('trainee', joined, trainee_end),
+                PhaseSpan('probation', trainee_end + day, probation_end),
+                PhaseSpan('confirmed', probation_end + day, None),
+            ]
+
+        probation_end = subject.probation_end_date or EmployeeLifecycleService.default_probation_end(joined)
+        if probation_end < joined:
+            return [PhaseSpan('confirmed', joined, None)]
+        return [PhaseSpan('probation', joined, probation_end), PhaseSpan('confirmed', probation_end + day, None)]
+
+    @staticmethod
+    def plan(subject: LifecycleSubject, anchors: Dict[str, date] = None, today: date = None) -> List[PhaseSpan]:
+        """
+        Timeline for an employee; empty without a joining date. The earlier
+        phases follow the schedule and the last one is the current
+        period_type, open-ended (until the relieving date).
+
+        Args:
+            subject: Employee fields
+            anchors: Start dates of the phases already stored, which keep
+                phases begun ahead of schedule where they started
+            today: Reference date (defaults to today)
+        """
+        if not subject.joining_date:
+            return []
+        today = today or timezone.localdate()
+        anchors = anchors or {}
+        day = timedelta(days=1)
+        spans = EmployeeLifecycleService._schedule(subject)
+
+        rank = EmployeeLifecycleService.PHASE_RANK
+        scheduled = EmployeeLifecycleService.phase_on(spans, today)
+        current = subject.period_type
+        scheduled_start = next((span.start_date for span in spans if span.phase == current), None)
+        if current in rank and current != scheduled and rank[current] > rank.get(scheduled, -1):
+            # HR moved the employee ahead of the schedule
+            start = max(anchors.get(current) or today, subject.joining_date)
+        elif scheduled_start is not None:
+            # On schedule, or kept in the phase past its scheduled end
+            start = scheduled_start
+        else:
+            start = subject.joining_date
+        spans = [
+            PhaseSpan(span.phase, span.start_date, min(span.end_date or start - day, start - day))
+            for span in spans if span.start_date < start
+        ]
+        spans.append(PhaseSpan(current, start, None))
+
+        if subject.relieving_date:
+            relieved = subject.relieving_date
+            spans = [
+                PhaseSpan(span.phase, span.start_date, min(span.end_date or relieved, relieved))
+                for span in spans if span.start_date <= relieved
+            ]
+        return spans
+
+    @staticmethod
+    def scheduled_span(subject: LifecycleSubject, on: date) -> Optional[PhaseSpan]:
+        """The phase the schedule alone puts the employee in on a date"""
+        if not subject.joining_date:
+            return None
+        for span in EmployeeLifecycleService._schedule(subject):
+            if span.start_date <= on and (span.end_date is None or on <= span.end_date):
+                return span
+        return None
+
+    @staticmethod
+    def phase_on(spans: Iterable[PhaseSpan], on: date) -> Optional[str]:
+        for span in spans:
+            if span.start_date <= on and (span.end_date is None or on <= span.end_date):
+                return span.phase
+        return None
+
+    # ========================================================================
+    # SYNC
+    # ========================================================================
+
+    @staticmethod
+    def subject_for(employee) -> LifecycleSubject:
+        return LifecycleSubject(
+            employee.pk, employee.period_type, employee.joining_date,
+            employee.probation_end_date, employee.relieving_date,
+        )
+
+    @staticmethod
+    def snapshot(employee) -> tuple:
+        """Tracked field values, compared by the signal to detect relevant changes"""
+        return tuple(getattr(employee, name) for name in EmployeeLifecycleService.TRACKED_FIELDS)
+
+    @staticmethod
+    @transaction.atomic
+    def sync(subjects: Iterable[LifecycleSubject], today: date = None) -> Dict[str, int]:
+        """
+        Re-plan the timelines of many employees, rewriting only those that changed.
+
+        Returns:
+            {'checked': n, 'updated': n}
+        """
+        subjects = {subject.employee_id: subject for subject in subjects}
+        if not subjects:
+            return {'checked': 0, 'updated': 0}
+
+        stored: Dict[int, List[PhaseSpan]] = {employee_id: [] for employee_id in subjects}
+        for employee_id, phase, start, end in EmploymentPhase.objects.filter(
+            employee_id__in=list(subjects)
+        ).order_by('employee_id', 'start_date').values_list('employee_id', 'phase', 'start_date', 'end_date'):
+            stored[employee_id].append(PhaseSpan(phase, start, end))
+
+        changed = {}
+        for employee_id, subject in subjects.items():
+            anchors = {span.phase: span.start_date for span in stored[employee_id]}
+            planned = EmployeeLifecycleService.plan(subject, anchors=anchors, today=today)
+            if planned != stored[employee_id]:
+                changed[employee_id] = planned
+
+        if changed:
+            EmploymentPhase.objects.filter(employee_id__in=list(changed)).delete()
+            EmploymentPhase.objects.bulk_create([
+                EmploymentPhase(employee_id=employee_id, phase=span.phase, start_date=span.start_date, end_date=span.end_date)
+                for employee_id, spans in changed.items()
+                for span in spans
+            ], batch_size=500)
+        return {'checked': len(subjects), 'updated': len(changed)}
+
+    @staticmethod
+    def run_transitions(today: date = None, batch_size: int = 500, promote: bool = False):
+        """
+        Daily job: re-plan every timeline and, with promote, move period_type
+        forward to the phase the schedule has reached (trainee to probation,
+        probation to confirmed once probation_end_date has passed).
+
+        Yields:
+            (employees_checked, timelines_updated, employees_promoted) after each batch
+        """
+        from .models import Employee
+
+        today = today or timezone.localdate()
+        employees = Employee.objects.filter(joining_date__isnull=False).order_by('pk').values_list(
+            *EmployeeLifecycleService.SUBJECT_FIELDS
+        )
+        checked = updated = promoted = 0
+        batch = []
+        for row in employees.iterator(chunk_size=batch_size):
+            batch.append(LifecycleSubject(*row))
+            if len(batch) >= batch_size:
+                checked, updated, promoted = EmployeeLifecycleService._run_batch(
+                    batch, today, promote, (checked, updated, promoted)
+                )
+                batch = []
+                yield checked, updated, promoted
+        if batch:
+            checked, updated, promoted = EmployeeLifecycleService._run_batch(
+                batch, today, promote, (checked, updated, promoted)
+            )
+            yield checked, updated, promoted
+
+    @staticmethod
+    def _run_batch(batch, today, promote, totals):
+        from .models import Employee
+
+        checked, updated, promoted = totals
+        result = EmployeeLifecycleService.sync(batch, today=today)
+        checked += result['checked']
+        updated += result['updated']
+        if promote:
+            rank = EmployeeLifecycleService.PHASE_RANK
+            for subject in batch:
+                if subject.period_type not in ('trainee', 'probation'):
+                    continue
+                span = EmployeeLifecycleService.scheduled_span(subject, today)
+                if span is None or span.phase not in rank or rank[span.phase] <= rank[subject.period_type]:
+                    continue
+                # save() so evaluation cycles, stats, search and the timeline stay in step
+                employee = Employee.objects.get(pk=subject.employee_id)
+                employee.period_type = span.phase
+                update_fields = ['period_type', 'updated_at']
+                if span.phase == 'probation':
+                    # Keep the trainee schedule's probation end on the probation track
+                    employee.probation_end_date = span.end_date
+                    update_fields.append('probation_end_date')
+                employee.save(update_fields=update_fields)
+                promoted += 1
+        return checked, updated, promoted
+
+    # ========================================================================
+    # LOOKUPS
+    # ========================================================================
+
+    @staticmethod
+    def _covering(on: date) -> Q:
+        return Q(start_date__lte=on) & (Q(end_date__isnull=True) | Q(end_date__gte=on))
+
+    @staticmethod
+    def phase_as_of(employee_id: int, on: date = None) -> Optional[str]:
+        """Phase on a date (today by default), or None outside employment"""
+        on = on or timezone.localdate()
+        return EmploymentPhase.objects.filter(
+            EmployeeLifecycleService._covering(on), employee_id=employee_id
+        ).values_list('phase', flat=True).first()
+
+    @staticmethod
+    def current_phase(employee, on: date = None) -> str:
+        """
+        Phase of an employee on a date, memoized on the instance for the
+        duration of the request. Falls back to period_type for employees
+        whose timeline has not been built yet.
+        """
+        on = on or timezone.localdate()
+        cache = employee.__dict__.setdefault('_phase_cache', {})
+        if on not in cache:
+            phase = EmployeeLifecycleService.phase_as_of(employee.pk, on) if employee.pk else None
+            cache[on] = phase or employee.period_type
+        return cache[on]
+
+    @staticmethod
+    def phases_as_of(on: date, employee_ids: Iterable[int] = None) -> Dict[int, str]:
+        """Phase of many (or all) employees on a date, in one query"""
+        phases = EmploymentPhase.objects.filter(EmployeeLifecycleService._covering(on))
+        if employee_ids is not None:
+            phases = phases.filter(employee_id__in=list(employee_ids))
+        return dict(phases.values_list('employee_id', 'phase'))
+
+    @staticmethod
+    def employees_in_phase(phase: str, on: date = None):
+        """Employees in a phase on a date, as a queryset for reports"""
+        from .models import Employee
+
+        on = on or timezone.localdate()
+        return Employee.objects.filter(
+            pk__in=EmploymentPhase.objects.filter(EmployeeLifecycleService._covering(on), phase=phase).values('employee_id')
+        )
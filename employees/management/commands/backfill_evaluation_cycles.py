@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from employees.evaluation_service import EvaluationCycleService
+from employees.evaluation_scheduler import EvaluationSchedulerService
+
+
+class Command(BaseCommand):
+    help = 'Create missing performance evaluation cycles for trainees, interns and probationers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Employees synced per transaction (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        processed = created = rescheduled = 0
+        for processed, created, rescheduled in EvaluationCycleService.backfill(batch_size=options['batch_size']):
+            self.stdout.write(f'  {processed} employees checked')
+
+        # Bulk-created cycles bypass signals; bring the dashboard buckets up to date
+        EvaluationSchedulerService.refresh_buckets()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Evaluation cycles synced for {processed} employees: {created} created, {rescheduled} rescheduled'
+        ))
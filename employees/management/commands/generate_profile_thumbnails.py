@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from employees.thumbnails import ProfileThumbnailService
+
+
+class Command(BaseCommand):
+    help = 'Render the thumbnail sizes of existing employee profile pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Rendering processes (default: THUMBNAIL_WORKERS setting, or 2)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Pictures dispatched to the pool per batch (default: 50)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render pictures whose thumbnails already exist',
+        )
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        for processed, failed in ProfileThumbnailService.backfill(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            force=options['force'],
+        ):
+            self.stdout.write(f'  {processed} pictures processed ({failed} failed)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Profile thumbnails updated: {processed} pictures processed, {failed} failed'
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from employees.resume_index import ResumeIndexService
+
+
+class Command(BaseCommand):
+    help = 'Extract and index the text of job application resumes and cover letters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Extraction processes (default: RESUME_INDEX_WORKERS setting, or 2)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Documents dispatched to the pool per batch (default: 200)',
+        )
+        parser.add_argument(
+            '--reindex',
+            action='store_true',
+            help='Re-extract applications that already have indexed text',
+        )
+
+    def handle(self, *args, **options):
+        processed = failed = 0
+        for processed, failed in ResumeIndexService.backfill(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            reindex=options['reindex'],
+        ):
+            self.stdout.write(f'  {processed} documents processed ({failed} failed)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Resume index updated: {processed} documents processed, {failed} failed'
+        ))
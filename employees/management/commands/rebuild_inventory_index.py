@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from employees.inventory_index import InventoryIndexService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the unified inventory index from devices, systems and peripheral inventory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per bulk insert (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        count = InventoryIndexService.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Inventory index rebuilt with {count} assets'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from employees.org_hierarchy import OrgHierarchyService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the reporting hierarchy closure table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows per bulk insert (default: 2000)',
+        )
+
+    def handle(self, *args, **options):
+        count = OrgHierarchyService.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reporting hierarchy rebuilt with {count} lines'))
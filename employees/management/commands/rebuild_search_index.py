@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from employees.search_service import EmployeeSearchService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the employee search token index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk insert (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        count = EmployeeSearchService.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt for {count} employees'))
@@ -0,0 +1,87 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from employees.benchmark import BenchmarkDataset, BenchmarkSuite
+
+
+class Command(BaseCommand):
+    help = 'Generate the synthetic benchmark dataset and time the HRMS hot paths (p50/p95 and query counts as JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--generate',
+            action='store_true',
+            help='Generate the dataset before benchmarking (drops an existing benchmark dataset)',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Only delete the benchmark dataset',
+        )
+        parser.add_argument(
+            '--no-run',
+            action='store_true',
+            help='Generate the dataset without running the benchmarks',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--employees', type=int, default=20000, help='Employees to generate (default: 20000)')
+        parser.add_argument('--leaves', type=int, default=1000000, help='Leave applications to generate (default: 1000000)')
+        parser.add_argument('--years', type=int, default=5, help='Years of holidays and salary slips (default: 5)')
+        parser.add_argument('--end-year', type=int, default=2025, help='Last generated year (default: 2025)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert (default: 5000)')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed iterations per benchmark (default: 20)')
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            metavar='NAME',
+            help='Run only the named benchmarks',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the JSON report to this file instead of stdout',
+        )
+
+    def log(self, message):
+        self.stderr.write(message)
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            BenchmarkDataset.clear()
+            self.stdout.write(self.style.SUCCESS('Benchmark dataset deleted'))
+            return
+
+        if options['generate']:
+            if BenchmarkDataset.exists():
+                self.log('Dropping existing benchmark dataset')
+                BenchmarkDataset.clear()
+            self.log('Generating benchmark dataset')
+            start = time.perf_counter()
+            dataset = BenchmarkDataset(
+                seed=options['seed'], employees=options['employees'], leaves=options['leaves'],
+                years=options['years'], end_year=options['end_year'], batch_size=options['batch_size'], log=self.log,
+            )
+            counts = dataset.generate()
+            self.log(f'Dataset generated in {time.perf_counter() - start:.1f}s: {counts}')
+
+        if options['no_run']:
+            return
+
+        self.log('Running benchmarks')
+        try:
+            suite = BenchmarkSuite(
+                iterations=options['iterations'], seed=options['seed'], end_year=options['end_year'],
+                only=options['only'], log=self.log,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = suite.run()
+        report['meta']['seed'] = options['seed']
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.log(f'Report written to {options["output"]}')
+        else:
+            self.stdout.write(output)
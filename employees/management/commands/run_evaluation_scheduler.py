@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from employees.evaluation_scheduler import EvaluationSchedulerService
+
+
+class Command(BaseCommand):
+    help = 'Refresh evaluation due buckets and send manager reminders (run daily, or with --loop)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-reminders',
+            action='store_true',
+            help='Only refresh the due buckets',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Build reminders without sending them or stamping evaluations',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running, repeating every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=3600,
+            help='Seconds between runs with --loop (default: 3600)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            result = EvaluationSchedulerService.run(
+                send_reminders=not options['no_reminders'],
+                dry_run=options['dry_run'],
+            )
+            message = f"{result['buckets']} due bucket(s) refreshed"
+            if 'managers' in result:
+                message += (
+                    f", {result['evaluations']} evaluation(s) in reminders to {result['managers']} manager(s)"
+                    f" ({result['sent']} sent)"
+                )
+            self.stdout.write(self.style.SUCCESS(message))
+
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(max(options['interval'], 60))
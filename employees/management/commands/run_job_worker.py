@@ -0,0 +1,121 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from employees.job_queue import JobQueueService
+
+
+def _run_in_process(job_id, worker):
+    # Spawned processes import Django afresh; django.setup() ran in the initializer
+    return JobQueueService.run_job(job_id, worker=worker)
+
+
+class Command(BaseCommand):
+    help = 'Execute queued background jobs (imports, exports, payslips) in a thread or process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Jobs executed concurrently (default: 2)',
+        )
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help='Run jobs in spawned processes instead of threads (for CPU-heavy jobs such as PDFs)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue and exit (for cron on hosts without long-running processes)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when the queue is empty (default: 2)',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=1800,
+            help='Requeue running jobs without a heartbeat for this many seconds (default: 1800)',
+        )
+        parser.add_argument(
+            '--kind',
+            action='append',
+            dest='kinds',
+            help='Only run jobs of this kind (repeatable)',
+        )
+        parser.add_argument(
+            '--prune-days',
+            type=int,
+            default=30,
+            help='Delete finished jobs older than this many days (default: 30, 0 to keep)',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        if options['processes']:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+            submit = lambda job_id, worker: executor.submit(_run_in_process, job_id, worker)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-worker')
+            submit = lambda job_id, worker: executor.submit(JobQueueService.run_job, job_id, worker)
+
+        JobQueueService.load_handlers()
+        stale_after = timedelta(seconds=options['stale_after'])
+        worker = JobQueueService.worker_name()
+        running = {}
+        done_count = 0
+        last_maintenance = 0.0
+
+        self.stdout.write(f"Job worker {worker} started with {workers} {'process' if options['processes'] else 'thread'}(s)")
+        try:
+            while True:
+                if time.monotonic() - last_maintenance > 60:
+                    requeued = JobQueueService.requeue_stale(stale_after)
+                    if requeued:
+                        self.stdout.write(self.style.WARNING(f'{requeued} stale job(s) requeued or failed'))
+                    if options['prune_days']:
+                        JobQueueService.prune(timedelta(days=options['prune_days']))
+                    last_maintenance = time.monotonic()
+
+                # Fill free slots
+                while len(running) < workers:
+                    job_id = JobQueueService.claim(worker, kinds=options['kinds'])
+                    if job_id is None:
+                        break
+                    running[submit(job_id, worker)] = job_id
+
+                if not running:
+                    if options['once']:
+                        break
+                    close_old_connections()
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                finished, _ = wait(list(running), timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job_id = running.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception as e:
+                        status = f'crashed ({e})'
+                    done_count += 1
+                    self.stdout.write(f'Job {job_id}: {status}')
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping; waiting for running jobs to finish')
+        finally:
+            executor.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(f'{done_count} job(s) processed'))
@@ -0,0 +1,47 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.lifecycle_service import EmployeeLifecycleService
+
+
+class Command(BaseCommand):
+    help = (
+        'Bring every employee lifecycle timeline up to date. Run daily; with --promote, '
+        'period_type is moved forward once a scheduled phase (probation, confirmed) has begun'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Employees synced per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--promote',
+            action='store_true',
+            help='Update period_type of employees whose next phase has started',
+        )
+        parser.add_argument(
+            '--date',
+            help='Reference date as YYYY-MM-DD (default: today)',
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+
+        checked = updated = promoted = 0
+        for checked, updated, promoted in EmployeeLifecycleService.run_transitions(
+            today=today, batch_size=options['batch_size'], promote=options['promote']
+        ):
+            self.stdout.write(f'  {checked} employees checked')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Lifecycle timelines synced for {checked} employees: {updated} updated, {promoted} promoted'
+        ))
@@ -87,23 +87,23 @@ class HierarchicalManager(BaseManager):
         return self.filter(children__isnull=True)
     
     def get_tree(self):
-        """Get complete tree structure"""
-        roots = self.roots()
-        tree = []
-        for root in roots:
-            tree.append(self._build_subtree(root))
-        return tree
-    
-    def _build_subtree(self, node):
-        """Build subtree for a given node"""
-        subtree = {
+        """Get complete tree structure (one query, assembled in memory)"""
+        nodes = list(self.all())
+        children = {}
+        for node in nodes:
+            children.setdefault(node.parent_id, []).append(node)
+        return [self._build_subtree(root, children) for root in children.get(None, [])]
+    
+    def _build_subtree(self, node, children=None):
+        """Build subtree for a given node from a parent_id -> children map"""
+        if children is None:
+            children = {}
+            for item in self.all():
+                children.setdefault(item.parent_id, []).append(item)
+        return {
             'node': node,
-            'children': []
+            'children': [self._build_subtree(child, children) for child in children.get(node.pk, [])]
         }
-        children = node.children.all()
-        for child in children:
-            subtree['children'].append(self._build_subtree(child))
-        return subtree
 
 
 class UserManager(BaseManager):
@@ -214,20 +214,12 @@ class EmployeeManager(BaseManager):
         return self.filter(is_active=True)
     
     def search_employees(self, query):
-        """Search employees by various fields"""
+        """Search employees by name, code, email or mobile, ranked by relevance"""
         if not query:
             return self.all()
         
-        from django.db.models import Q
-        return self.filter(
-            Q(employee_code__icontains=query) |
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(email__icontains=query) |
-            Q(phone__icontains=query) |
-            Q(department__name__icontains=query) |
-            Q(designation__name__icontains=query)
-        )
+        from .search_service import EmployeeSearchService
+        return EmployeeSearchService.apply(self.all(), query)
     
     def get_employees_by_role(self, role):
         """Get employees by profile role"""
@@ -81,6 +81,9 @@ class BulkOperationMixin:
 class SearchMixin:
     """Mixin to handle search functionality"""
     
+    # Optional service exposing apply(queryset, query), e.g. EmployeeSearchService
+    search_backend = None
+    
     def get_queryset(self):
         queryset = super().get_queryset()
         search_query = self.request.GET.get('search', '').strip()
@@ -91,7 +94,9 @@ class SearchMixin:
         return queryset
     
     def _apply_search(self, queryset, search_query):
-        """Apply search to queryset - to be overridden in subclasses"""
+        """Apply search to queryset - delegates to search_backend or is overridden in subclasses"""
+        if self.search_backend is not None:
+            return self.search_backend.apply(queryset, search_query)
         return queryset
     
     def get_context_data(self, **kwargs):
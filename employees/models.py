@@ -13,9 +13,21 @@ from .abstract_models import NameDescriptionModel, TimeStampedModel, SoftDeleteM
 
 # Import job and performance management models
 
-from .models_job import JobDescription, JobApplication, InterviewSchedule
+from .models_job import (
+    JobDescription, JobApplication, JobApplicationStageEvent, ApplicationDocumentText, ApplicationSearchToken,
+    InterviewSchedule,
+)
 
-from .models_performance import PerformanceEvaluation, EvaluationAuditLog
+from .models_performance import PerformanceEvaluation, EvaluationAuditLog, EvaluationDueBucket
+
+from .models_inventory import InventoryAsset
+
+from .models_search import EmployeeSearchToken
+from .models_hierarchy import ReportingLine
+from .models_profiling import ProfileCapture
+from .models_queue import BackgroundJob
+from .models_sequence import CodeSequence
+from .models_lifecycle import EmploymentPhase
 
 class UserProfile(TimeStampedModel):
 
@@ -135,6 +147,20 @@ class Department(NameDescriptionModel):
 
         ordering = ['name']
 
+    @classmethod
+
+    def from_db(cls, db, field_names, values):
+
+        instance = super().from_db(db, field_names, values)
+
+        # Remember the loaded head so signals only rebuild the hierarchy when it changes
+
+        if 'head_id' in field_names:
+
+            instance._loaded_head_id = instance.head_id
+
+        return instance
+
 class Designation(NameDescriptionModel):
 
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='designations')
@@ -257,6 +283,8 @@ class Employee(models.Model):
 
     profile_picture = models.ImageField(upload_to='employee_profiles/%Y/%m/', null=True, blank=True)
 
+    profile_thumbnails_for = models.CharField(max_length=255, blank=True, default='', editable=False, help_text="Profile picture the stored thumbnails were rendered from")
+
     department = models.ForeignKey(Department, on_delete=models.PROTECT, related_name='employees')
 
     designation = models.ForeignKey(Designation, on_delete=models.PROTECT, related_name='employees')
@@ -379,24 +407,31 @@ class Employee(models.Model):
 
         return f"{self.full_name} ({self.employee_code})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the fields evaluation cycles depend on, so the post_save
+        # signal can skip saves that did not change them
+        if 'period_type' in field_names and 'joining_date' in field_names:
+            instance._loaded_evaluation_fields = (instance.period_type, instance.joining_date)
+        # ...and the department, which places the employee in the reporting hierarchy
+        if 'department_id' in field_names:
+            instance._loaded_department_id = instance.department_id
+        # ...and the dates the lifecycle timeline is planned from
+        from .lifecycle_service import EmployeeLifecycleService
+        if all(name in field_names for name in EmployeeLifecycleService.TRACKED_FIELDS):
+            instance._loaded_lifecycle_fields = EmployeeLifecycleService.snapshot(instance)
+        # ...and the picture, whose thumbnails are rendered on upload
+        if 'profile_picture' in field_names:
+            instance._loaded_profile_picture = instance.profile_picture.name or ''
+        return instance
+
     def save(self, *args, **kwargs):
         # Auto-generate employee code only for new employees (when pk is None)
         if not self.pk and not self.employee_code:
-            # Get the latest employee code
-            latest_employee = Employee.objects.order_by('-id').first()
-            
-            if latest_employee and latest_employee.employee_code and latest_employee.employee_code.startswith('EM'):
-                # Extract numeric part and increment
-                try:
-                    latest_num = int(latest_employee.employee_code[2:])
-                    new_num = latest_num + 1
-                except ValueError:
-                    new_num = 1
-            else:
-                new_num = 1
-            
-            # Format as EM0001, EM0002, etc.
-            self.employee_code = f'EM{new_num:04d}'
+            from .code_allocator import EmployeeCodeAllocator
+            # Format as EM0001, EM0002, etc., reserved from the code sequence
+            self.employee_code = EmployeeCodeAllocator.next_code()
 
         # Auto-calculate probation status
 
@@ -414,48 +449,26 @@ class Employee(models.Model):
 
             if not self.probation_end_date:
 
-                probation_months = 3
-
-                year = self.joining_date.year
-
-                month = self.joining_date.month + probation_months
-
-                day = self.joining_date.day
-
-                # Adjust year and month if overflow
-
-                if month > 12:
+                from .lifecycle_service import EmployeeLifecycleService
 
-                    year += 1
-
-                    month -= 12
-
-                # Handle end of month edge cases (e.g. Nov 31 doesn't exist)
-
-                try:
-
-                    self.probation_end_date = date(year, month, day)
-
-                except ValueError:
-
-                    # Fallback to last day of the month
-
-                    if month == 12:
-
-                        self.probation_end_date = date(year, 31, 31) # date(year, 12, 31) -> fixed logic
-
-                        # Simplified:
-
-                        import calendar
-
-                        last_day = calendar.monthrange(year, month)[1]
-
-                        self.probation_end_date = date(year, month, last_day)
+                self.probation_end_date = EmployeeLifecycleService.default_probation_end(self.joining_date)
 
             # Note: probation_status field removed - use period_type instead
 
         super().save(*args, **kwargs)
 
+    @property
+    def profile_thumbnail_url(self):
+        """Small (96px) square thumbnail of the profile picture, for lists and avatars"""
+        from .thumbnails import ProfileThumbnailService
+        return ProfileThumbnailService.url(self, 'small')
+
+    @property
+    def profile_thumbnail_medium_url(self):
+        """Medium (256px) square thumbnail of the profile picture, for profile headers"""
+        from .thumbnails import ProfileThumbnailService
+        return ProfileThumbnailService.url(self, 'medium')
+
     @property
 
     def salary_components(self):
@@ -837,6 +850,12 @@ class PublicHoliday(models.Model):
 
         ordering = ['date']
 
+        constraints = [
+
+            models.UniqueConstraint(fields=['country', 'date', 'name'], name='unique_public_holiday'),
+
+        ]
+
     def __str__(self):
 
         return f"{self.name} ({self.date})"
@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class ReportingLine(models.Model):
+    """
+    Closure table of the reporting hierarchy.
+
+    One row per (manager, report) pair at any depth. Direct lines (depth 1)
+    come from department heads (the head manages everyone in the department)
+    and from evaluation manager assignments. "Everyone under X" is then a
+    single indexed lookup on manager, and the full org chart is the depth-1
+    rows. OrgHierarchyService rewrites the affected reports' rows when heads,
+    departments or evaluation managers change.
+    """
+
+    SOURCE_CHOICES = [
+        ('department', 'Department Head'),
+        ('evaluation', 'Evaluation Manager'),
+        ('transitive', 'Transitive'),
+    ]
+
+    manager = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='report_lines')
+    report = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='manager_lines')
+    depth = models.PositiveSmallIntegerField(help_text="1 for direct reports")
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+
+    class Meta:
+        verbose_name = "Reporting Line"
+        verbose_name_plural = "Reporting Lines"
+        unique_together = ['manager', 'report']
+        indexes = [
+            models.Index(fields=['manager', 'depth'], name='reporting_manager_idx'),
+            models.Index(fields=['report', 'depth'], name='reporting_report_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.manager_id} -> {self.report_id} (depth {self.depth})"
@@ -0,0 +1,84 @@
+from django.db import models
+
+
+class InventoryAsset(models.Model):
+    """
+    Unified, indexed inventory of every physical asset.
+
+    One row per (source, asset_type, label_no), maintained from Device,
+    SystemDetail and the six peripheral inventory models by the signals in
+    signals.py; a label found on a system but in no peripheral inventory gets
+    a system-sourced row. The
+    source tables stay authoritative; this table only exists so availability
+    and "who holds label X" lookups are a single indexed query.
+    """
+
+    ASSET_TYPE_CHOICES = [
+        ('cpu', 'CPU'),
+        ('screen', 'Screen'),
+        ('keyboard', 'Keyboard'),
+        ('mouse', 'Mouse'),
+        ('headphone', 'Headphone'),
+        ('extender', 'Extender'),
+        ('laptop', 'Laptop'),
+        ('mobile', 'Mobile'),
+        ('tablet', 'Tablet'),
+        ('accessories', 'Accessories'),
+    ]
+
+    STATUS_CHOICES = [
+        ('available', 'Available'),
+        ('allocated', 'Allocated'),
+        ('maintenance', 'Under Maintenance'),
+        ('retired', 'Retired'),
+    ]
+
+    SOURCE_CHOICES = [
+        ('inventory', 'Peripheral Inventory'),
+        ('device', 'Device'),
+        ('system', 'System Detail'),
+    ]
+
+    asset_type = models.CharField(max_length=20, choices=ASSET_TYPE_CHOICES)
+    label_no = models.CharField(max_length=100, help_text="Label/asset number or serial number")
+    company_name = models.CharField(max_length=100, blank=True, default='')
+    description = models.CharField(max_length=255, blank=True, default='', help_text="Model/specification summary")
+    size_inches = models.PositiveSmallIntegerField(null=True, blank=True, help_text="Parsed screen size")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
+
+    # Inventory-level holder (peripheral allocated_to or active DeviceAllocation)
+    holder = models.ForeignKey('Employee', on_delete=models.SET_NULL, null=True, blank=True, related_name='held_assets')
+    # Active SystemDetail bundle that references this label, if any
+    system = models.ForeignKey('SystemDetail', on_delete=models.SET_NULL, null=True, blank=True, related_name='indexed_assets')
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    source_id = models.PositiveIntegerField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Inventory Asset"
+        verbose_name_plural = "Inventory Assets"
+        ordering = ['asset_type', 'label_no']
+        unique_together = ['source', 'asset_type', 'label_no']
+        indexes = [
+            models.Index(fields=['asset_type', 'status', 'size_inches'], name='inv_asset_availability_idx'),
+            models.Index(fields=['label_no'], name='inv_asset_label_idx'),
+            models.Index(fields=['holder', 'asset_type'], name='inv_asset_holder_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_asset_type_display()} - {self.label_no} ({self.get_status_display()})"
+
+    @property
+    def current_holder(self):
+        """Employee holding the asset, via inventory allocation or an active system bundle"""
+        if self.holder_id:
+            return self.holder
+        if self.system_id:
+            return self.system.employee
+        return None
+
+    @property
+    def is_free(self):
+        return self.status == 'available' and not self.holder_id and not self.system_id
@@ -177,10 +177,89 @@ class JobApplication(models.Model):
     def __str__(self):
         return f"{self.candidate_name} - {self.job.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded status so signals can record stage transitions
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        # ...and the stored documents, so only new uploads are re-extracted
+        instance._loaded_documents = {
+            name: getattr(instance, name).name for name in ('resume', 'cover_letter') if name in field_names
+        }
+        return instance
+
     @property
     def is_active_candidate(self):
         return self.status in ['received', 'under_review', 'shortlisted', 'interview_scheduled', 'interviewed']
 
+class JobApplicationStageEvent(models.Model):
+    """Timestamped entry of an application into a pipeline status"""
+
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='stage_events')
+    status = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES)
+    entered_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Application Stage Event"
+        verbose_name_plural = "Application Stage Events"
+        ordering = ['application', 'entered_at']
+        indexes = [
+            models.Index(fields=['status', 'entered_at'], name='job_stage_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.application_id} - {self.get_status_display()} at {self.entered_at:%Y-%m-%d %H:%M}"
+
+class ApplicationDocumentText(models.Model):
+    """Text extracted from an application's resume or cover letter"""
+
+    DOCUMENT_CHOICES = [
+        ('resume', 'Resume'),
+        ('cover_letter', 'Cover Letter'),
+    ]
+
+    STATUS_CHOICES = [
+        ('extracted', 'Extracted'),
+        ('empty', 'No Text Layer'),
+        ('unsupported', 'Unsupported Format'),
+        ('failed', 'Failed'),
+    ]
+
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='document_texts')
+    document = models.CharField(max_length=20, choices=DOCUMENT_CHOICES)
+    source_name = models.CharField(max_length=255, help_text="Stored file name the text was extracted from")
+    text = models.TextField(blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    error = models.CharField(max_length=500, blank=True, default='')
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Application Document Text"
+        verbose_name_plural = "Application Document Texts"
+        unique_together = ['application', 'document']
+
+    def __str__(self):
+        return f"{self.application_id} - {self.get_document_display()} ({self.get_status_display()})"
+
+class ApplicationSearchToken(models.Model):
+    """Word from an application's documents, indexed for prefix search"""
+
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='search_tokens')
+    document = models.CharField(max_length=20, choices=ApplicationDocumentText.DOCUMENT_CHOICES)
+    token = models.CharField(max_length=50)
+
+    class Meta:
+        verbose_name = "Application Search Token"
+        verbose_name_plural = "Application Search Tokens"
+        unique_together = ['application', 'document', 'token']
+        indexes = [
+            models.Index(fields=['token', 'application'], name='job_app_token_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.application_id} - {self.token}"
+
 class JobApplicationUser(models.Model):
     """User model for job applications"""
     username = models.CharField(max_length=150, unique=True, help_text="Username for application tracking")
@@ -251,6 +330,20 @@ class InterviewSchedule(models.Model):
         verbose_name = "Interview Schedule"
         verbose_name_plural = "Interview Schedules"
         ordering = ['scheduled_date', 'scheduled_time']
+        indexes = [
+            models.Index(fields=['taken_by', 'scheduled_date', 'scheduled_time'], name='interview_taken_by_slot_idx'),
+        ]
 
     def __str__(self):
         return f"{self.application.candidate_name} - {self.get_interview_type_display()} - {self.scheduled_date}"
+
+    SLOT_FIELDS = ('scheduled_date', 'scheduled_time', 'duration_minutes', 'taken_by_id')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded slot so edits that keep it skip the conflict check
+        if all(name in field_names for name in cls.SLOT_FIELDS + ('status',)):
+            instance._loaded_slot = tuple(getattr(instance, name) for name in cls.SLOT_FIELDS)
+            instance._loaded_status = instance.status
+        return instance
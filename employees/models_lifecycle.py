@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class EmploymentPhase(models.Model):
+    """
+    One phase of an employee's lifecycle timeline (trainee, probation,
+    confirmed, notice period) with inclusive start and end dates; the open
+    phase has no end date.
+
+    Maintained by EmployeeLifecycleService from the employee's period type,
+    joining, probation end and relieving dates (on save, and daily by the
+    run_lifecycle_transitions command), so "phase on a date" is an indexed
+    range lookup instead of date arithmetic in every leave check.
+    """
+
+    PHASE_CHOICES = [
+        ('trainee', 'Trainee'),
+        ('intern', 'Intern'),
+        ('probation', 'Probation'),
+        ('confirmed', 'Confirmed'),
+        ('notice_period', 'Notice Period'),
+    ]
+
+    employee = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='phases')
+    phase = models.CharField(max_length=20, choices=PHASE_CHOICES)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True, help_text="Last day of the phase; empty while open-ended")
+
+    class Meta:
+        verbose_name = "Employment Phase"
+        verbose_name_plural = "Employment Phases"
+        ordering = ['employee', 'start_date']
+        unique_together = ['employee', 'start_date']
+        indexes = [
+            models.Index(fields=['employee', 'start_date', 'end_date'], name='phase_employee_range_idx'),
+            models.Index(fields=['phase', 'start_date', 'end_date'], name='phase_range_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id}: {self.phase} {self.start_date} - {self.end_date or '...'}"
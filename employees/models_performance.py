@@ -84,6 +84,10 @@ class PerformanceEvaluation(models.Model):
 
     
 
+    last_reminded_at = models.DateTimeField(null=True, blank=True, help_text="When the assigned manager was last reminded")
+
+    
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     updated_at = models.DateTimeField(auto_now=True)
@@ -100,6 +104,12 @@ class PerformanceEvaluation(models.Model):
 
         unique_together = ['employee', 'category', 'cycle_number']
 
+        indexes = [
+
+            models.Index(fields=['status', 'due_date', 'assigned_manager'], name='perf_eval_due_queue_idx'),
+
+        ]
+
 
 
     def __str__(self):
@@ -116,6 +126,22 @@ class PerformanceEvaluation(models.Model):
 
 
 
+    @classmethod
+
+    def from_db(cls, db, field_names, values):
+
+        instance = super().from_db(db, field_names, values)
+
+        # Remember the loaded manager so both old and new due buckets get refreshed
+
+        if 'assigned_manager_id' in field_names:
+
+            instance._loaded_manager_id = instance.assigned_manager_id
+
+        return instance
+
+
+
 class EvaluationAuditLog(models.Model):
 
     evaluation = models.ForeignKey(PerformanceEvaluation, on_delete=models.CASCADE, related_name='audit_logs')
@@ -134,3 +160,58 @@ class EvaluationAuditLog(models.Model):
 
         ordering = ['-timestamp']
 
+
+
+class EvaluationDueBucket(models.Model):
+
+    """
+
+    Precomputed count of pending evaluations per manager, category and due bucket.
+
+    Maintained by EvaluationSchedulerService (run_evaluation_scheduler command
+
+    and PerformanceEvaluation signals) so dashboards never scan evaluations.
+
+    """
+
+    BUCKET_CHOICES = [
+
+        ('overdue', 'Overdue'),
+
+        ('due_soon', 'Due Soon'),
+
+    ]
+
+
+
+    manager = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='evaluation_due_buckets',
+
+                                help_text="Assigned manager; empty for unassigned evaluations")
+
+    category = models.CharField(max_length=20, choices=PerformanceEvaluation.CATEGORY_CHOICES)
+
+    bucket = models.CharField(max_length=20, choices=BUCKET_CHOICES)
+
+    evaluation_count = models.PositiveIntegerField(default=0)
+
+    oldest_due_date = models.DateField(null=True, blank=True)
+
+    computed_for = models.DateField(help_text="Day the bucket boundaries were computed for")
+
+    computed_at = models.DateTimeField(auto_now=True)
+
+
+
+    class Meta:
+
+        verbose_name = "Evaluation Due Bucket"
+
+        verbose_name_plural = "Evaluation Due Buckets"
+
+        unique_together = ['manager', 'category', 'bucket']
+
+
+
+    def __str__(self):
+
+        return f"{self.manager or 'Unassigned'} - {self.get_category_display()} {self.get_bucket_display()}: {self.evaluation_count}"
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import models
+
+
+class ProfileCapture(models.Model):
+    """
+    One on-demand profile of a request, captured by ProfilerMiddleware.
+
+    The raw profile (a pstats dump, or pyinstrument HTML when sampled) is
+    written under PROFILER_DIR; the row keeps the summary shown in the admin:
+    timings, the hottest functions and the slowest SQL statements.
+    """
+
+    PROFILER_CHOICES = [
+        ('cprofile', 'cProfile'),
+        ('pyinstrument', 'pyinstrument (sampling)'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='profile_captures')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True, default='')
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    profiler = models.CharField(max_length=20, choices=PROFILER_CHOICES, default='cprofile')
+
+    duration_ms = models.FloatField(default=0)
+    sql_ms = models.FloatField(default=0)
+    query_count = models.PositiveIntegerField(default=0)
+
+    profile_file = models.CharField(max_length=500, blank=True, default='', help_text="Path of the raw profile on disk")
+    top_functions = models.JSONField(default=list, blank=True)
+    top_queries = models.JSONField(default=list, blank=True)
+    repeated_queries = models.JSONField(default=list, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Profile Capture"
+        verbose_name_plural = "Profile Captures"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='profile_capture_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
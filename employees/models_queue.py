@@ -0,0 +1,86 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils import timezone
+
+
+def job_file_storage():
+    """
+    Storage for job uploads and result files. It lives outside MEDIA_ROOT
+    (JOB_FILES_ROOT, default <BASE_DIR>/private/jobs) so the files, which can
+    hold credentials and personal data, are never served as media; they are
+    only downloadable through the background_job_download view.
+    """
+    location = getattr(settings, 'JOB_FILES_ROOT', None) or os.path.join(
+        getattr(settings, 'BASE_DIR', os.getcwd()), 'private', 'jobs'
+    )
+    return FileSystemStorage(location=location, base_url=None)
+
+
+def job_result_path(instance, filename):
+    """background_jobs/YYYY/MM/<random>/<filename>: unguessable, keeps the download name"""
+    return f"background_jobs/{timezone.now():%Y/%m}/{uuid.uuid4().hex}/{os.path.basename(filename)}"
+
+
+class BackgroundJob(models.Model):
+    """
+    A unit of work run outside the HTTP request by the run_job_worker command.
+
+    The queue lives entirely in this table: views enqueue a row, workers
+    claim it with a conditional UPDATE (SELECT ... FOR UPDATE SKIP LOCKED
+    where supported), report progress on the row and store a JSON result
+    and, for exports, a result file. Pages poll the row for completion.
+    """
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+    kind = models.CharField(max_length=50, help_text="Registered handler name")
+    label = models.CharField(max_length=200, blank=True, default='', help_text="Human-readable description")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    payload = models.JSONField(default=dict, blank=True)
+
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
+    progress_message = models.CharField(max_length=255, blank=True, default='')
+
+    result = models.JSONField(null=True, blank=True)
+    result_file = models.FileField(upload_to=job_result_path, storage=job_file_storage, null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=1)
+    run_after = models.DateTimeField(help_text="Not claimed before this time")
+    worker = models.CharField(max_length=100, blank=True, default='')
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='background_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Background Job"
+        verbose_name_plural = "Background Jobs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='bg_job_claim_idx'),
+            models.Index(fields=['created_by', '-created_at'], name='bg_job_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.label or self.kind} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class EmployeeSearchToken(models.Model):
+    """
+    Normalized search tokens for an employee.
+
+    Each employee gets one row per lowercased name token, employee code, email
+    (and its local-part pieces) and mobile number digits. Searches become
+    prefix lookups (LIKE 'term%') on the indexed token column instead of
+    leading-wildcard icontains scans across several Employee columns.
+    Maintained from signals.py; rebuilt by the rebuild_search_index command.
+    """
+
+    KIND_CHOICES = [
+        ('code', 'Employee Code'),
+        ('name', 'Name'),
+        ('email', 'Email'),
+        ('mobile', 'Mobile'),
+    ]
+
+    employee = models.ForeignKey('Employee', on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+
+    class Meta:
+        verbose_name = "Employee Search Token"
+        verbose_name_plural = "Employee Search Tokens"
+        unique_together = ['employee', 'kind', 'token']
+        indexes = [
+            models.Index(fields=['token', 'employee'], name='emp_search_token_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.token} ({self.kind})"
@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class CodeSequence(models.Model):
+    """
+    A named counter for human-readable codes (EM0001, ...).
+
+    Callers reserve blocks of values with one conditional UPDATE of this row
+    (see code_allocator.py) instead of scanning the coded table for its
+    latest value, so concurrent inserts never compute the same code.
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.PositiveBigIntegerField(default=1, help_text="First value not yet handed out")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Code Sequence"
+        verbose_name_plural = "Code Sequences"
+
+    def __str__(self):
+        return f"{self.name} (next {self.next_value})"
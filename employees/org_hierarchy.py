@@ -0,0 +1,249 @@
+# Org Hierarchy Service
+# Maintains the ReportingLine closure table and answers team queries from it.
+#
+# Direct reporting lines are derived from two sources: a department head
+# manages every other employee of the department, and an evaluation's
+# assigned manager (through their user profile) manages the evaluated
+# employee. The closure table expands those lines into every
+# (manager, report) pair with its depth, so "all reports under X" and the
+# whole org chart are single queries.
+#
+# The signals keep the table current inside the transaction that changes a
+# line: refresh_subtree() rewrites only the rows of the employees whose
+# managers changed and of everyone under them. rebuild() recreates the whole
+# table and is left to the rebuild_org_hierarchy command and to bulk loads
+# that bypass the signals.
+
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional
+from django.db import transaction
+from django.db.models import Q
+from .models import Employee, ReportingLine
+from .models_performance import PerformanceEvaluation
+
+
+class OrgHierarchyService:
+    """
+    Service class for the materialized reporting hierarchy
+    """
+
+    # ========================================================================
+    # MAINTENANCE
+    # ========================================================================
+
+    @staticmethod
+    def _lines(employees: Q, evaluations: Q) -> List[tuple]:
+        """(manager_id, report_id, source) direct lines from the matching rows, department heads first"""
+        department_rows = Employee.objects.filter(employees, department__head__isnull=False).order_by().values_list(
+            'department__head_id', 'pk'
+        )
+        evaluation_rows = PerformanceEvaluation.objects.filter(
+            evaluations, assigned_manager__profile__employee__isnull=False
+        ).order_by().values_list('assigned_manager__profile__employee_id', 'employee_id').distinct()
+        return (
+            [(manager_id, report_id, 'department') for manager_id, report_id in department_rows if manager_id != report_id]
+            + [(manager_id, report_id, 'evaluation') for manager_id, report_id in evaluation_rows if manager_id != report_id]
+        )
+
+    @staticmethod
+    def direct_lines() -> Dict[int, Dict[int, str]]:
+        """{manager_id: {report_id: source}} from department heads and evaluation managers"""
+        lines = defaultdict(dict)
+        for manager_id, report_id, source in OrgHierarchyService._lines(Q(), Q()):
+            lines[manager_id].setdefault(report_id, source)
+        return lines
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(batch_size: int = 2000) -> int:
+        """
+        Recreate the closure table from the direct reporting lines.
+
+        Cycles (e.g. two heads sitting in each other's departments) are cut
+        by breadth-first search, keeping the shortest depth per pair.
+
+        Returns:
+            Number of rows written
+        """
+        lines = OrgHierarchyService.direct_lines()
+        rows = []
+        for manager_id, direct in lines.items():
+            seen = {manager_id}
+            queue = deque((report_id, 1) for report_id in direct)
+            while queue:
+                report_id, depth = queue.popleft()
+                if report_id in seen:
+                    continue
+                seen.add(report_id)
+                source = direct[report_id] if depth == 1 else 'transitive'
+                rows.append(ReportingLine(manager_id=manager_id, report_id=report_id, depth=depth, source=source))
+                for child_id in lines.get(report_id, ()):
+                    if child_id not in seen:
+                        queue.append((child_id, depth + 1))
+
+        ReportingLine.objects.all().delete()
+        ReportingLine.objects.bulk_create(rows, batch_size=batch_size)
+        return len(rows)
+
+    @staticmethod
+    @transaction.atomic
+    def refresh_subtree(employee_ids: Iterable[int]) -> int:
+        """
+        Rewrite the closure rows of employees whose direct managers changed,
+        and of everyone under them before or after the change.
+
+        Only the affected reports' rows are deleted and reinserted; their
+        managers are found by walking the direct lines upwards, one pair of
+        queries per level.
+
+        Args:
+            employee_ids: Employees whose direct managers changed
+
+        Returns:
+            Number of rows written
+        """
+        roots = {pk for pk in employee_ids if pk}
+        if not roots:
+            return 0
+
+        # Everyone under the roots, in the current table and in the changed lines
+        affected = roots | set(
+            ReportingLine.objects.filter(manager_id__in=roots).values_list('report_id', flat=True)
+        )
+        frontier = set(affected)
+        while frontier:
+            reports = {
+                report_id
+                for _, report_id, _ in OrgHierarchyService._lines(
+                    Q(department__head_id__in=frontier),
+                    Q(assigned_manager__profile__employee_id__in=frontier),
+                )
+            }
+            frontier = reports - affected
+            affected |= frontier
+
+        # Direct managers of the affected employees and of all their managers
+        parents = defaultdict(dict)
+        visited = set()
+        frontier = set(affected)
+        while frontier:
+            visited |= frontier
+            for manager_id, report_id, source in OrgHierarchyService._lines(
+                Q(pk__in=frontier), Q(employee_id__in=frontier)
+            ):
+                parents[report_id].setdefault(manager_id, source)
+            frontier = {manager_id for report_id in frontier for manager_id in parents[report_id]} - visited
+
+        rows = []
+        for report_id in affected:
+            direct = parents[report_id]
+            seen = {report_id}
+            queue = deque((manager_id, 1) for manager_id in direct)
+            while queue:
+                manager_id, depth = queue.popleft()
+                if manager_id in seen:
+                    continue
+                seen.add(manager_id)
+                source = direct[manager_id] if depth == 1 else 'transitive'
+                rows.append(ReportingLine(manager_id=manager_id, report_id=report_id, depth=depth, source=source))
+                for parent_id in parents[manager_id]:
+                    if parent_id not in seen:
+                        queue.append((parent_id, depth + 1))
+
+        ReportingLine.objects.filter(report_id__in=affected).delete()
+        ReportingLine.objects.bulk_create(rows)
+        return len(rows)
+
+    # ========================================================================
+    # TEAM QUERIES
+    # ========================================================================
+
+    @staticmethod
+    def report_ids(manager_id: Optional[int], max_depth: Optional[int] = None):
+        """
+        Reports under a manager at any depth (or up to max_depth).
+
+        Returns:
+            A values_list('report_id') queryset, usable as an __in subquery
+        """
+        if not manager_id:
+            return ReportingLine.objects.none().values_list('report_id', flat=True)
+        lines = ReportingLine.objects.filter(manager_id=manager_id)
+        if max_depth:
+            lines = lines.filter(depth__lte=max_depth)
+        return lines.values_list('report_id', flat=True)
+
+    @staticmethod
+    def team_filter(manager_id: Optional[int], field: str = 'employee', include_self: bool = False) -> Q:
+        """
+        Q object restricting a queryset to a manager's transitive team.
+
+        Args:
+            manager_id: Employee id of the manager
+            field: Path from the filtered model to Employee ('employee', 'holder', ...)
+            include_self: Also match the manager's own rows
+        """
+        condition = Q(**{f'{field}__in': OrgHierarchyService.report_ids(manager_id)})
+        if include_self and manager_id:
+            condition |= Q(**{f'{field}_id': manager_id})
+        return condition
+
+    @staticmethod
+    def reports_of(manager_id: int, max_depth: Optional[int] = None):
+        """Employees under a manager, with department and designation joined"""
+        return Employee.objects.filter(
+            pk__in=OrgHierarchyService.report_ids(manager_id, max_depth)
+        ).select_related('department', 'designation')
+
+    @staticmethod
+    def managers_of(employee_id: int) -> List[Dict]:
+        """Management chain above an employee, nearest first"""
+        return [
+            {'id': pk, 'full_name': name, 'employee_code': code, 'depth': depth}
+            for pk, name, code, depth in ReportingLine.objects.filter(report_id=employee_id).order_by('depth').values_list(
+                'manager_id', 'manager__full_name', 'manager__employee_code', 'depth'
+            )
+        ]
+
+    # ========================================================================
+    # ORG CHART
+    # ========================================================================
+
+    @staticmethod
+    def org_chart(root_id: Optional[int] = None) -> List[Dict]:
+        """
+        Nested org chart built from one query over the direct reporting lines.
+
+        Employees reachable through several managers appear under the first
+        one only. With root_id, only that employee's subtree is returned.
+        """
+        rows = ReportingLine.objects.filter(depth=1).order_by('manager__full_name', 'report__full_name').values_list(
+            'manager_id', 'manager__full_name', 'manager__employee_code', 'manager__designation__name',
+            'report_id', 'report__full_name', 'report__employee_code', 'report__designation__name',
+        )
+
+        nodes = {}
+        children = defaultdict(list)
+        has_manager = set()
+        for m_id, m_name, m_code, m_title, r_id, r_name, r_code, r_title in rows:
+            nodes.setdefault(m_id, {'id': m_id, 'full_name': m_name, 'employee_code': m_code, 'designation': m_title})
+            nodes.setdefault(r_id, {'id': r_id, 'full_name': r_name, 'employee_code': r_code, 'designation': r_title})
+            children[m_id].append(r_id)
+            has_manager.add(r_id)
+
+        placed = set()
+
+        def build(node_id):
+            placed.add(node_id)
+            node = dict(nodes[node_id])
+            node['reports'] = [build(child_id) for child_id in children[node_id] if child_id not in placed]
+            return node
+
+        if root_id is not None:
+            return [build(root_id)] if root_id in nodes else []
+
+        roots = [node_id for node_id in nodes if node_id not in has_manager]
+        chart = [build(node_id) for node_id in roots]
+        # Pure cycles have no root; attach whatever was not reached
+        chart.extend(build(node_id) for node_id in nodes if node_id not in placed and node_id in children)
+        return chart
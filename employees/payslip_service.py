@@ -0,0 +1,94 @@
+# Payslip Service
+# Renders payslip PDFs and e-mails them to employees.
+#
+# Shared by GeneratePaySlipView (direct download) and the "email_payslip"
+# background job, so rendering, storing and mailing no longer run inside the
+# HTTP request.
+
+from datetime import date
+from io import BytesIO
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import render_to_string
+
+from .models import Employee, SalarySlip
+
+
+class PayslipService:
+    """
+    Service class for payslip PDF rendering and delivery
+    """
+
+    @staticmethod
+    def render_pdf(employee: Employee, month_name: str, year: int) -> Optional[bytes]:
+        """
+        Render an employee's payslip.
+
+        Returns:
+            PDF bytes, or None when the PDF engine reports an error
+        """
+        from xhtml2pdf import pisa
+
+        context = {
+            'employee': employee,
+            'salary': employee.salary_components,
+            'month_name': month_name,
+            'year': year,
+            'current_date': date.today(),
+        }
+        html = render_to_string('employees/payslip_pdf.html', context)
+        result = BytesIO()
+        pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
+        if pdf.err:
+            return None
+        return result.getvalue()
+
+    @staticmethod
+    def email_payslip(employee: Employee, month: int, year: int, month_name: str, base_url: str) -> SalarySlip:
+        """
+        Render, store and e-mail one payslip.
+
+        Args:
+            base_url: Absolute site root used for the download link in the e-mail
+
+        Raises:
+            ValueError: When the PDF cannot be rendered
+        """
+        pdf_content = PayslipService.render_pdf(employee, month_name, year)
+        if pdf_content is None:
+            raise ValueError("Error generating PDF payslip.")
+
+        slip, _ = SalarySlip.objects.update_or_create(
+            employee=employee,
+            month=month,
+            year=year,
+            defaults={'is_emailed': True}
+        )
+        pdf_filename = f'payslip_{employee.employee_code}_{month_name}_{year}.pdf'
+        slip.pdf_file.save(pdf_filename, ContentFile(pdf_content), save=True)
+
+        email_context = {
+            'employee_name': employee.full_name,
+            'employee_code': employee.employee_code,
+            'department': employee.department.name,
+            'designation': employee.designation.name,
+            'month_name': month_name,
+            'year': year,
+            'download_url': base_url.rstrip('/') + slip.get_download_url(),
+        }
+        html_body = render_to_string('emails/payslip_email.html', email_context)
+        plain_body = render_to_string('emails/payslip_email.txt', email_context)
+
+        email = EmailMultiAlternatives(
+            f"Payslip for {month_name} {year} - {employee.full_name}",
+            plain_body,
+            settings.DEFAULT_FROM_EMAIL,
+            [employee.official_email]
+        )
+        email.attach_alternative(html_body, "text/html")
+        email.attach(f'payslip_{month_name}_{year}.pdf', pdf_content, 'application/pdf')
+        email.send()
+        return slip
@@ -0,0 +1,51 @@
+"""
+PDF text extraction worker functions.
+
+This module deliberately imports nothing from Django so it can be loaded by
+process-pool workers started with the 'spawn' method without configuring
+settings. Workers receive a file path (or raw bytes) and return plain text.
+"""
+import io
+import re
+
+WHITESPACE = re.compile(r'\s+')
+
+# Extracted text is capped so a pathological PDF cannot bloat the index
+MAX_TEXT_LENGTH = 200000
+
+
+def extract_pdf_text(source):
+    """
+    Extract the text layer of a PDF.
+
+    Args:
+        source: Filesystem path or raw PDF bytes
+
+    Returns:
+        (text, error) tuple; error is an empty string on success
+    """
+    from pypdf import PdfReader
+
+    try:
+        reader = PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+        parts = []
+        length = 0
+        for page in reader.pages:
+            text = page.extract_text() or ''
+            parts.append(text)
+            length += len(text)
+            if length >= MAX_TEXT_LENGTH:
+                break
+        return WHITESPACE.sub(' ', ' '.join(parts)).strip()[:MAX_TEXT_LENGTH], ''
+    except Exception as e:
+        return '', f'{type(e).__name__}: {e}'[:500]
+
+
+def extract_job(job):
+    """
+    Pool entry point:
+    ((application_id, document, source_name, source)) -> (application_id, document, source_name, text, error)
+    """
+    application_id, document, source_name, source = job
+    text, error = extract_pdf_text(source)
+    return application_id, document, source_name, text, error
@@ -0,0 +1,249 @@
+# On-demand Request Profiler
+# Staff-only profiling of a single production request.
+#
+# A staff user adds "?_profile=1" to a URL (or sends "X-Profile: 1") and the
+# request runs under cProfile with SQL capture; "?_profile=sample" uses
+# pyinstrument's sampling profiler when it is installed. The raw profile is
+# written under PROFILER_DIR and a ProfileCapture row keeps the summary
+# (hottest functions, slowest and repeated SQL), listed in the admin.
+#
+# Enable by adding ``employees.profiler.ProfilerMiddleware`` to MIDDLEWARE
+# after ``AuthenticationMiddleware``. Requests without the flag, or from
+# non-staff users, pass straight through. Only one request per process is
+# profiled at a time (Python allows one active profiler); a flagged request
+# arriving meanwhile is served unprofiled.
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.http import FileResponse
+
+from .query_budget import QueryRecorder, record_queries
+
+logger = logging.getLogger('employees.profiler')
+
+QUERY_FLAG = '_profile'
+HEADER = 'HTTP_X_PROFILE'
+TOP_FUNCTIONS = 30
+TOP_QUERIES = 20
+DEFAULT_KEEP = 200
+# Bytes of a streamed response generated inside the profile; the rest is
+# streamed to the client afterwards, unprofiled
+DEFAULT_STREAM_LIMIT = 8 * 1024 * 1024
+
+_profile_lock = threading.Lock()
+
+
+def get_profile_dir() -> str:
+    directory = getattr(settings, 'PROFILER_DIR', None) or os.path.join(
+        getattr(settings, 'BASE_DIR', os.getcwd()), 'profiles'
+    )
+    os.makedirs(directory, exist_ok=True)
+    return str(directory)
+
+
+def requested_mode(request) -> Optional[str]:
+    """'cprofile', 'pyinstrument' or None when the request did not ask to be profiled"""
+    flag = request.GET.get(QUERY_FLAG) or request.META.get(HEADER)
+    if not flag or flag.lower() in ('0', 'false', 'no'):
+        return None
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated or not user.is_staff:
+        return None
+    if flag.lower() == 'sample':
+        try:
+            import pyinstrument  # noqa: F401
+            return 'pyinstrument'
+        except ImportError:
+            pass
+    return 'cprofile'
+
+
+class _CProfileRunner:
+    extension = 'prof'
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def save(self, path: str) -> None:
+        self.profiler.dump_stats(path)
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> List[Dict]:
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        rows = []
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                'function': f'{name} ({os.path.basename(filename)}:{line})',
+                'calls': calls,
+                'self_ms': round(tottime * 1000, 3),
+                'total_ms': round(cumtime * 1000, 3),
+            })
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows[:limit]
+
+
+class _PyinstrumentRunner:
+    extension = 'html'
+
+    def __init__(self):
+        from pyinstrument import Profiler
+        self.profiler = Profiler()
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self):
+        self.profiler.stop()
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.profiler.output_html())
+
+    def top_functions(self, limit: int = TOP_FUNCTIONS) -> List[Dict]:
+        totals: Dict[str, Dict] = {}
+        try:
+            stack = [self.profiler.last_session.root_frame()]
+        except Exception:
+            return []
+        while stack:
+            frame = stack.pop()
+            if frame is None:
+                continue
+            key = f'{frame.function} ({os.path.basename(frame.file_path or "")}:{frame.line_no})'
+            row = totals.setdefault(key, {'function': key, 'calls': 0, 'self_ms': 0.0, 'total_ms': 0.0})
+            row['calls'] += 1
+            row['self_ms'] += frame.total_self_time * 1000
+            row['total_ms'] += frame.time * 1000
+            stack.extend(frame.children)
+        rows = sorted(totals.values(), key=lambda row: row['total_ms'], reverse=True)[:limit]
+        for row in rows:
+            row['self_ms'] = round(row['self_ms'], 3)
+            row['total_ms'] = round(row['total_ms'], 3)
+        return rows
+
+
+def _summarize_queries(recorder: QueryRecorder) -> Tuple[List[Dict], List[Dict]]:
+    slowest = sorted(recorder.queries, key=lambda item: item[1], reverse=True)[:TOP_QUERIES]
+    top = [{'sql': sql[:2000], 'ms': round(duration * 1000, 3)} for sql, duration in slowest]
+    repeated = [{'sql': fp[:2000], 'count': n} for fp, n in recorder.repeated(threshold=2)[:TOP_QUERIES]]
+    return top, repeated
+
+
+def prune_captures(keep: int = None) -> int:
+    """Delete captures (and their files) beyond the newest `keep`"""
+    from .models import ProfileCapture
+
+    keep = keep if keep is not None else getattr(settings, 'PROFILER_KEEP', DEFAULT_KEEP)
+    stale = list(ProfileCapture.objects.order_by('-created_at').values_list('pk', 'profile_file')[keep:])
+    for _, path in stale:
+        if path and os.path.exists(path):
+            os.remove(path)
+    ProfileCapture.objects.filter(pk__in=[pk for pk, _ in stale]).delete()
+    return len(stale)
+
+
+def _prefetch_stream(response, limit: int) -> None:
+    """
+    Generate up to `limit` bytes of a streamed response now, so the work of
+    streamed exports shows up in the profile. Files are left alone: reading
+    them is not what is being diagnosed.
+    """
+    if isinstance(response, FileResponse):
+        return
+    content = iter(response.streaming_content)
+    prefetched = []
+    size = 0
+    for chunk in content:
+        prefetched.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    response.streaming_content = chain(prefetched, content)
+
+
+class ProfilerMiddleware:
+    """Profile flagged requests from staff users"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.stream_limit = getattr(settings, 'PROFILER_STREAM_LIMIT', DEFAULT_STREAM_LIMIT)
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        if not _profile_lock.acquire(blocking=False):
+            logger.info('Profiler busy; serving %s unprofiled', request.path)
+            return self.get_response(request)
+        try:
+            return self._profile(request, mode)
+        finally:
+            _profile_lock.release()
+
+    def _profile(self, request, mode):
+        runner = _PyinstrumentRunner() if mode == 'pyinstrument' else _CProfileRunner()
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            try:
+                runner.start()
+            except ValueError:
+                # Another profiler (a debugger, a tracing tool) is active in this process
+                logger.warning('Could not start profiler; serving %s unprofiled', request.path)
+                return self.get_response(request)
+            try:
+                response = self.get_response(request)
+                if getattr(response, 'streaming', False):
+                    _prefetch_stream(response, self.stream_limit)
+            finally:
+                runner.stop()
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        try:
+            capture = self._save(request, response, runner, recorder, mode, duration_ms)
+            response['X-Profile-Id'] = str(capture.pk)
+        except Exception:
+            # Profiling must never break the request being diagnosed
+            logger.exception('Could not save profile for %s', request.path)
+        return response
+
+    def _save(self, request, response, runner, recorder, mode, duration_ms):
+        from .models import ProfileCapture
+
+        match = getattr(request, 'resolver_match', None)
+        top_queries, repeated = _summarize_queries(recorder)
+        capture = ProfileCapture.objects.create(
+            user=request.user,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view_name=(match.view_name if match else '')[:200],
+            status_code=response.status_code,
+            profiler=mode,
+            duration_ms=round(duration_ms, 3),
+            sql_ms=round(recorder.total_ms, 3),
+            query_count=recorder.count,
+            top_functions=runner.top_functions(),
+            top_queries=top_queries,
+            repeated_queries=repeated,
+        )
+        path = os.path.join(get_profile_dir(), f'capture_{capture.pk}.{runner.extension}')
+        runner.save(path)
+        ProfileCapture.objects.filter(pk=capture.pk).update(profile_file=path)
+        capture.profile_file = path
+        logger.info('Profiled %s %s: %.1f ms, %d queries (capture %s)',
+                    request.method, request.path, duration_ms, recorder.count, capture.pk)
+        prune_captures()
+        return capture
@@ -0,0 +1,227 @@
+# Query Budget Instrumentation
+# Per-request SQL accounting and N+1 detection.
+#
+# QueryBudgetMiddleware wraps every database connection with an execute
+# wrapper that records each statement's duration and a literal-free
+# fingerprint. A statement fingerprint seen many times in one request is the
+# signature of an N+1 loop. One compact line per request is logged to
+# "employees.queries"; requests over their budget or with N+1 suspects are
+# logged at WARNING.
+#
+# The same recorder backs assert_query_budget() / QueryBudgetTestMixin, so
+# the budgets in QUERY_BUDGETS can be enforced from a test run before deploy.
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+
+logger = logging.getLogger('employees.queries')
+
+
+# Maximum queries per request, keyed by namespaced view name (the
+# resolver_match.view_name, which is also what reverse() takes). Overridable
+# per deployment with settings.QUERY_BUDGETS.
+QUERY_BUDGETS = {
+    'employees:employee_list': 12,
+    'employees:calendar_events': 8,
+    'employees:api_employees_list': 6,
+    'employees:leave_application_add': 15,
+    'employees:system_management': 15,
+}
+
+# A fingerprint repeated at least this many times is reported as N+1
+REPEAT_THRESHOLD = 5
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() callable that records every statement.
+    """
+
+    STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+    NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+    IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+    WHITESPACE = re.compile(r'\s+')
+
+    def __init__(self):
+        self.queries: List[Tuple[str, float]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @classmethod
+    def fingerprint(cls, sql: str) -> str:
+        """Normalize a statement so that the same query with different values compares equal"""
+        sql = cls.STRING_LITERAL.sub('?', sql)
+        sql = cls.NUMBER_LITERAL.sub('?', sql)
+        sql = cls.IN_LIST.sub('IN (...)', sql)
+        return cls.WHITESPACE.sub(' ', sql).strip()
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(duration for _, duration in self.queries) * 1000
+
+    def repeated(self, threshold: int = REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+        """Fingerprints executed at least `threshold` times, most frequent first"""
+        counts = Counter(self.fingerprint(sql) for sql, _ in self.queries)
+        return [(fp, n) for fp, n in counts.most_common() if n >= threshold]
+
+    def summary(self) -> Dict:
+        return {
+            'queries': self.count,
+            'sql_ms': round(self.total_ms, 2),
+            'repeated': [{'count': n, 'sql': fp} for fp, n in self.repeated()],
+        }
+
+
+@contextmanager
+def record_queries(using=None):
+    """
+    Record the statements run inside the block on every (or one) connection.
+
+    Usage:
+        with record_queries() as recorder:
+            ...
+        recorder.count, recorder.repeated()
+    """
+    recorder = QueryRecorder()
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
+
+
+def get_budget(view_name: Optional[str]) -> Optional[int]:
+    """Query budget for a namespaced view name, settings.QUERY_BUDGETS taking precedence"""
+    if not view_name:
+        return None
+    budgets = dict(QUERY_BUDGETS)
+    budgets.update(getattr(settings, 'QUERY_BUDGETS', {}))
+    return budgets.get(view_name)
+
+
+def _shorten(sql: str, length: int = 120) -> str:
+    return sql if len(sql) <= length else sql[:length - 3] + '...'
+
+
+class QueryBudgetMiddleware:
+    """
+    Log query count, SQL time and N+1 suspects for each request.
+
+    Opt-in: add ``employees.query_budget.QueryBudgetMiddleware`` to
+    MIDDLEWARE and set ``QUERY_BUDGET_ENABLED = True``. Queries run while a
+    StreamingHttpResponse is being consumed happen after the middleware
+    returns and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'QUERY_BUDGET_ENABLED', False)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        budget = get_budget(view_name)
+        repeated = recorder.repeated()
+        over_budget = budget is not None and recorder.count > budget
+
+        line = (
+            f"{request.method} {request.path} view={view_name or '-'} status={response.status_code} "
+            f"queries={recorder.count}{f'/{budget}' if budget is not None else ''} "
+            f"sql_ms={recorder.total_ms:.1f} total_ms={elapsed_ms:.1f}"
+        )
+        if repeated:
+            line += ' n+1=' + '; '.join(f'{n}x {_shorten(fp)}' for fp, n in repeated[:3])
+
+        logger.log(logging.WARNING if over_budget or repeated else logging.INFO, line)
+        response['X-Query-Count'] = str(recorder.count)
+        return response
+
+
+# ============================================================================
+# TEST HELPERS
+# ============================================================================
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by assert_query_budget with the offending statements"""
+
+
+def assert_query_budget(client, view_name: str, budget: int = None, method: str = 'get',
+                        data=None, args=None, kwargs=None, allow_repeats: bool = False):
+    """
+    Request a named view with the test client and fail if it exceeds its budget.
+
+    Args:
+        client: django.test.Client (logged in as needed)
+        view_name: Namespaced view name ('employees:employee_list') to
+            reverse; also the key into QUERY_BUDGETS
+        budget: Explicit budget, defaults to get_budget(view_name)
+        method: Client method, 'get' or 'post'
+        data: Request data
+        args/kwargs: Passed to reverse()
+        allow_repeats: Do not fail on N+1 suspects
+
+    Returns:
+        The response, for further assertions
+    """
+    budget = budget if budget is not None else get_budget(view_name)
+    if budget is None:
+        raise ValueError(f"No query budget defined for '{view_name}'")
+
+    url = reverse(view_name, args=args, kwargs=kwargs)
+    with record_queries() as recorder:
+        response = getattr(client, method)(url, data or {})
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)  # Count queries made while streaming
+
+    problems = []
+    if recorder.count > budget:
+        problems.append(f"{recorder.count} queries, budget is {budget}")
+    repeated = recorder.repeated()
+    if repeated and not allow_repeats:
+        problems.append(f"{len(repeated)} repeated statement(s) (likely N+1)")
+    if problems:
+        details = '\n'.join(f'  {n}x {fp}' for fp, n in repeated) or '\n'.join(
+            f'  {sql}' for sql, _ in recorder.queries
+        )
+        raise QueryBudgetExceeded(f"{view_name}: {', '.join(problems)}\n{details}")
+    return response
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin exposing assertQueryBudget().
+
+    Usage:
+        class BudgetTests(QueryBudgetTestMixin, TestCase):
+            def test_employee_list(self):
+                self.client.force_login(self.admin)
+                self.assertQueryBudget('employees:employee_list')
+    """
+
+    def assertQueryBudget(self, view_name, budget=None, **kwargs):
+        return assert_query_budget(self.client, view_name, budget=budget, **kwargs)
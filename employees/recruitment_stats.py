@@ -0,0 +1,128 @@
+# Recruitment Funnel Service
+# Candidate tracker statistics: per-status and per-designation application
+# counts from one GROUP BY, plus average time-to-stage from the stage history.
+#
+# The snapshot is cached and dropped from signals.py whenever an application
+# is created, changes status or is deleted, so the tracker's auto-refresh
+# reads the cache instead of re-counting the applications table.
+
+from typing import Dict, List
+from django.core.cache import cache
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F
+from .models_job import JobApplication, JobApplicationStageEvent
+
+
+class RecruitmentFunnelService:
+    """
+    Service class for candidate tracker funnel statistics
+    """
+
+    CACHE_KEY = 'employees:stats:recruitment_funnel'
+    CACHE_TIMEOUT = 60 * 60  # Signals invalidate on change; TTL is only a safety net
+
+    # Statuses shown on the candidate tracker
+    ACTIVE_STATUSES = ('received', 'under_review', 'shortlisted', 'interview_scheduled', 'interviewed', 'offer_extended')
+
+    # Tracker cards -> statuses they add up
+    STATUS_BUCKETS = {
+        'received_count': ('received',),
+        'under_review_count': ('under_review',),
+        'shortlisted_count': ('shortlisted',),
+        'interview_count': ('interview_scheduled', 'interviewed'),
+        'offered_count': ('offer_extended',),
+    }
+
+    # ========================================================================
+    # SNAPSHOT
+    # ========================================================================
+
+    @staticmethod
+    def compute_counts() -> Dict:
+        """
+        Compute status and designation counts in one query.
+
+        Returns:
+            Dict with total_candidates, the tracker card counts, status_counts
+            for every status, and designations with active candidates as
+            [{'id', 'name', 'active_applications_count'}] ordered by name
+        """
+        rows = JobApplication.objects.order_by().values(
+            'status', 'job__designation_id', 'job__designation__name'
+        ).annotate(count=Count('id'))
+
+        status_counts = {code: 0 for code, _ in JobApplication.STATUS_CHOICES}
+        designations = {}
+        for row in rows:
+            status_counts[row['status']] = status_counts.get(row['status'], 0) + row['count']
+            if row['status'] in RecruitmentFunnelService.ACTIVE_STATUSES and row['job__designation_id']:
+                designation = designations.setdefault(row['job__designation_id'], {
+                    'id': row['job__designation_id'],
+                    'name': row['job__designation__name'],
+                    'active_applications_count': 0,
+                })
+                designation['active_applications_count'] += row['count']
+
+        counts = {
+            'total_candidates': sum(status_counts[s] for s in RecruitmentFunnelService.ACTIVE_STATUSES),
+            'status_counts': status_counts,
+            'designations': sorted(designations.values(), key=lambda d: d['name']),
+        }
+        for name, statuses in RecruitmentFunnelService.STATUS_BUCKETS.items():
+            counts[name] = sum(status_counts[s] for s in statuses)
+        return counts
+
+    @staticmethod
+    def compute_stage_metrics() -> List[Dict]:
+        """
+        Average time from application to entering each status.
+
+        Returns:
+            [{'status', 'label', 'applications', 'avg_days'}] in pipeline order,
+            only for statuses that have been reached at least once
+        """
+        elapsed = ExpressionWrapper(F('entered_at') - F('application__created_at'), output_field=DurationField())
+        rows = {
+            row['status']: row
+            for row in JobApplicationStageEvent.objects.order_by().values('status').annotate(
+                applications=Count('application_id', distinct=True), avg_elapsed=Avg(elapsed)
+            )
+        }
+
+        metrics = []
+        for code, label in JobApplication.STATUS_CHOICES:
+            row = rows.get(code)
+            if not row:
+                continue
+            avg_elapsed = row['avg_elapsed']
+            metrics.append({
+                'status': code,
+                'label': label,
+                'applications': row['applications'],
+                'avg_days': round(avg_elapsed.total_seconds() / 86400, 1) if avg_elapsed is not None else None,
+            })
+        return metrics
+
+    @staticmethod
+    def get_snapshot() -> Dict:
+        """Return the cached funnel snapshot, computing it on a miss"""
+        snapshot = cache.get(RecruitmentFunnelService.CACHE_KEY)
+        if snapshot is None:
+            snapshot = RecruitmentFunnelService.compute_counts()
+            snapshot['stage_metrics'] = RecruitmentFunnelService.compute_stage_metrics()
+            cache.set(RecruitmentFunnelService.CACHE_KEY, snapshot, RecruitmentFunnelService.CACHE_TIMEOUT)
+        return snapshot
+
+    # ========================================================================
+    # STAGE HISTORY
+    # ========================================================================
+
+    @staticmethod
+    def record_stage(application: JobApplication) -> None:
+        """Record that an application entered its current status"""
+        JobApplicationStageEvent.objects.create(application=application, status=application.status)
+        application._loaded_status = application.status
+
+    @staticmethod
+    def invalidate() -> None:
+        """Drop the cached funnel snapshot"""
+        cache.delete(RecruitmentFunnelService.CACHE_KEY)
@@ -0,0 +1,298 @@
+# Resume Index Service
+# Extracts the text of uploaded resumes and cover letters and indexes it for
+# skill search across candidates.
+#
+# PDF parsing is CPU-bound, so it runs in a process pool (pdf_text.py holds the
+# Django-free worker functions). Uploads are queued after the transaction
+# commits and stored when the worker finishes; the backfill command pushes the
+# existing documents through the same pool in parallel. Extracted words are
+# stored in ApplicationSearchToken, and a search is one GROUP BY over indexed
+# prefix matches, like the employee search index.
+
+import logging
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from .models_job import JobApplication, ApplicationDocumentText, ApplicationSearchToken
+from .pdf_text import extract_job
+
+logger = logging.getLogger(__name__)
+
+
+class ResumeIndexService:
+    """
+    Service class for extracting, indexing and searching application documents
+    """
+
+    DOCUMENT_FIELDS = ('resume', 'cover_letter')
+
+    TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]')
+    TOKEN_MIN_LENGTH = 2
+    TOKEN_MAX_LENGTH = 50
+    MAX_TOKENS_PER_DOCUMENT = 5000
+    MAX_QUERY_TERMS = 6
+
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    # ========================================================================
+    # PROCESS POOL
+    # ========================================================================
+
+    @staticmethod
+    def worker_count() -> int:
+        return getattr(settings, 'RESUME_INDEX_WORKERS', 2)
+
+    @classmethod
+    def get_executor(cls, workers: Optional[int] = None) -> ProcessPoolExecutor:
+        """Shared pool for upload-time extraction; workers are spawned, not forked"""
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=workers or cls.worker_count(),
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return cls._executor
+
+    # ========================================================================
+    # TOKENIZATION
+    # ========================================================================
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """Distinct lowercased words of a document, in first-seen order"""
+        tokens = {}
+        for match in ResumeIndexService.TOKEN_PATTERN.finditer((text or '').lower()):
+            token = match.group(0)
+            if ResumeIndexService.TOKEN_MIN_LENGTH <= len(token) <= ResumeIndexService.TOKEN_MAX_LENGTH:
+                tokens.setdefault(token, None)
+                if len(tokens) >= ResumeIndexService.MAX_TOKENS_PER_DOCUMENT:
+                    break
+        return list(tokens)
+
+    # ========================================================================
+    # EXTRACTION JOBS
+    # ========================================================================
+
+    @staticmethod
+    def _job_source(field_file):
+        """Path for local storage, bytes for remote storage backends"""
+        try:
+            return field_file.path
+        except NotImplementedError:
+            with field_file.open('rb') as f:
+                return f.read()
+
+    @staticmethod
+    def build_jobs(application: JobApplication, documents: Iterable[str] = DOCUMENT_FIELDS) -> List[Tuple]:
+        """
+        Extraction jobs for an application's documents.
+
+        Non-PDF uploads are recorded as unsupported immediately; missing
+        documents have their text and tokens removed.
+        """
+        jobs = []
+        for document in documents:
+            field_file = getattr(application, document)
+            if not field_file:
+                ResumeIndexService.clear(application.pk, document)
+            elif not field_file.name.lower().endswith('.pdf'):
+                ResumeIndexService.store(application.pk, document, field_file.name, '', 'unsupported')
+            else:
+                jobs.append((application.pk, document, field_file.name, ResumeIndexService._job_source(field_file)))
+        return jobs
+
+    @staticmethod
+    def schedule(application: JobApplication, documents: Iterable[str] = DOCUMENT_FIELDS) -> None:
+        """Queue extraction for an application once the current transaction commits"""
+        documents = list(documents)
+        transaction.on_commit(lambda: ResumeIndexService._submit(application, documents))
+
+    @staticmethod
+    def _submit(application: JobApplication, documents: List[str]) -> None:
+        try:
+            jobs = ResumeIndexService.build_jobs(application, documents)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read documents of application %s: %s", application.pk, e)
+            return
+
+        if not ResumeIndexService.worker_count():
+            for job in jobs:
+                ResumeIndexService.store_result(*extract_job(job))
+            return
+
+        executor = ResumeIndexService.get_executor()
+        for job in jobs:
+            future = executor.submit(extract_job, job)
+            future.add_done_callback(partial(ResumeIndexService._store_future, threading.get_ident()))
+
+    @staticmethod
+    def _store_future(submitter: int, future) -> None:
+        """
+        Usually runs on the pool's result thread, which has its own DB
+        connection to close afterwards; a future that finished before the
+        callback was added runs it on the submitting (request) thread, whose
+        connection Django manages.
+        """
+        try:
+            ResumeIndexService.store_result(*future.result())
+        except Exception:
+            logger.exception("Failed to store extracted resume text")
+        finally:
+            if threading.get_ident() != submitter:
+                connection.close()
+
+    # ========================================================================
+    # STORAGE
+    # ========================================================================
+
+    @staticmethod
+    def store_result(application_id: int, document: str, source_name: str, text: str, error: str) -> None:
+        """Persist a worker result, unless the document was replaced (or removed) meanwhile"""
+        current_name = JobApplication.objects.filter(pk=application_id).values_list(document, flat=True).first()
+        if not current_name or current_name != source_name:
+            return
+        if error:
+            status = 'failed'
+        elif not text:
+            status = 'empty'
+        else:
+            status = 'extracted'
+        ResumeIndexService.store(application_id, document, source_name, text, status, error)
+
+    @staticmethod
+    @transaction.atomic
+    def store(application_id: int, document: str, source_name: str, text: str,
+              status: str, error: str = '') -> None:
+        """Replace the stored text and search tokens of one document"""
+        ApplicationDocumentText.objects.update_or_create(
+            application_id=application_id,
+            document=document,
+            defaults={'source_name': source_name, 'text': text, 'status': status, 'error': error},
+        )
+        ApplicationSearchToken.objects.filter(application_id=application_id, document=document).delete()
+        ApplicationSearchToken.objects.bulk_create([
+            ApplicationSearchToken(application_id=application_id, document=document, token=token)
+            for token in ResumeIndexService.tokenize(text)
+        ], batch_size=1000)
+
+    @staticmethod
+    def clear(application_id: int, document: str) -> None:
+        """Forget the text of a removed document"""
+        ApplicationDocumentText.objects.filter(application_id=application_id, document=document).delete()
+        ApplicationSearchToken.objects.filter(application_id=application_id, document=document).delete()
+
+    # ========================================================================
+    # BACKFILL
+    # ========================================================================
+
+    @staticmethod
+    def _present(document: str) -> Q:
+        return ~Q(**{document: ''}) & Q(**{f'{document}__isnull': False})
+
+    @staticmethod
+    def pending_applications(reindex: bool = False):
+        """
+        Applications with a document whose text is missing or stale (stored
+        for another file), annotated with <document>_indexed per document
+        """
+        queryset = JobApplication.objects.all()
+        pending = Q(pk__in=[])
+        for document in ResumeIndexService.DOCUMENT_FIELDS:
+            present = ResumeIndexService._present(document)
+            if reindex:
+                pending |= present
+                continue
+            queryset = queryset.annotate(**{f'{document}_indexed': Exists(ApplicationDocumentText.objects.filter(
+                application_id=OuterRef('pk'), document=document, source_name=OuterRef(document),
+            ))})
+            pending |= present & Q(**{f'{document}_indexed': False})
+        return queryset.filter(pending).order_by('pk')
+
+    @staticmethod
+    def pending_documents(application: JobApplication) -> List[str]:
+        """Documents of a pending_applications() row that need extracting"""
+        return [
+            document for document in ResumeIndexService.DOCUMENT_FIELDS
+            if getattr(application, document) and not getattr(application, f'{document}_indexed', False)
+        ]
+
+    @staticmethod
+    def backfill(workers: Optional[int] = None, batch_size: int = 200, reindex: bool = False) -> Iterator[Tuple[int, int]]:
+        """
+        Extract text for existing applications in parallel.
+
+        Documents are read in batches and fanned out over a dedicated process
+        pool; results are stored from this process as they arrive. Only
+        documents without up-to-date text are extracted, unless reindex.
+
+        Yields:
+            (documents_processed, documents_failed) after each batch
+        """
+        processed = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=workers or ResumeIndexService.worker_count() or 1,
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as executor:
+            applications = ResumeIndexService.pending_applications(reindex).only('pk', 'resume', 'cover_letter')
+            batch = []
+            for application in applications.iterator(chunk_size=batch_size):
+                try:
+                    batch.extend(ResumeIndexService.build_jobs(
+                        application, ResumeIndexService.pending_documents(application)
+                    ))
+                except (OSError, ValueError) as e:
+                    logger.warning("Could not read documents of application %s: %s", application.pk, e)
+                if len(batch) >= batch_size:
+                    processed, failed = ResumeIndexService._run_batch(executor, batch, processed, failed)
+                    batch = []
+                    yield processed, failed
+            if batch:
+                processed, failed = ResumeIndexService._run_batch(executor, batch, processed, failed)
+                yield processed, failed
+
+    @staticmethod
+    def _run_batch(executor, jobs, processed, failed):
+        for application_id, document, source_name, text, error in executor.map(extract_job, jobs, chunksize=8):
+            ResumeIndexService.store_result(application_id, document, source_name, text, error)
+            processed += 1
+            failed += bool(error)
+        return processed, failed
+
+    # ========================================================================
+    # QUERYING
+    # ========================================================================
+
+    @staticmethod
+    def matching_application_ids(query: str):
+        """
+        Applications whose documents contain every query term (as a word prefix).
+
+        Returns:
+            A values('application_id') queryset, usable as a pk__in subquery
+        """
+        terms = [
+            term for term in ResumeIndexService.tokenize(query)
+        ][:ResumeIndexService.MAX_QUERY_TERMS]
+        if not terms:
+            return ApplicationSearchToken.objects.none().values('application_id')
+
+        any_term = Q()
+        hits = {}
+        for i, term in enumerate(terms):
+            any_term |= Q(token__startswith=term)
+            hits[f'term_{i}'] = Count('id', filter=Q(token__startswith=term))
+
+        return (
+            ApplicationSearchToken.objects.filter(any_term)
+            .values('application_id')
+            .annotate(**hits)
+            .filter(**{f'{name}__gt': 0 for name in hits})
+            .values('application_id')
+        )
@@ -0,0 +1,223 @@
+# Employee Search Service
+# Indexed, ranked employee search shared by the employee list, the JSON API,
+# EmployeeManager.search_employees and SearchMixin.
+#
+# Employees are tokenized into EmployeeSearchToken rows (lowercased name words,
+# code, email and its local-part pieces, mobile digits). A search is a single
+# GROUP BY over prefix matches on the indexed token column: every query term
+# must match at least one token, and rows are ranked by how strongly they match
+# (exact beats prefix; code > email > mobile > name). Filtering uses the
+# unsliced match subquery; only the ranking is capped at MAX_RESULTS.
+
+import re
+from typing import Iterable, List, Set, Tuple
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Q, Sum, Value, When
+from .models import Employee, EmployeeSearchToken
+
+
+class EmployeeSearchService:
+    """
+    Service class for building and querying the employee search index
+    """
+
+    MAX_RESULTS = 500
+    TOKEN_MAX_LENGTH = 100
+
+    # Relevance weight per token kind; exact matches score double
+    KIND_WEIGHTS = {
+        'code': 8,
+        'email': 6,
+        'mobile': 4,
+        'name': 2,
+    }
+
+    # Columns needed to tokenize an employee
+    SOURCE_FIELDS = ('id', 'full_name', 'employee_code', 'official_email', 'personal_email', 'mobile_number')
+
+    WORD_SPLIT = re.compile(r'[^\w]+')
+    EMAIL_PART_SPLIT = re.compile(r'[._+\-]+')
+    NON_DIGIT = re.compile(r'\D+')
+    PHONE_QUERY = re.compile(r'^\+?[\d\s\-()]+$')
+
+    # ========================================================================
+    # TOKENIZATION
+    # ========================================================================
+
+    @staticmethod
+    def tokenize(full_name: str = '', employee_code: str = '', official_email: str = '',
+                 personal_email: str = '', mobile_number: str = '') -> Set[Tuple[str, str]]:
+        """
+        Build the (kind, token) pairs indexed for one employee.
+        """
+        tokens = set()
+        limit = EmployeeSearchService.TOKEN_MAX_LENGTH
+
+        for word in EmployeeSearchService.WORD_SPLIT.split((full_name or '').lower()):
+            if word:
+                tokens.add(('name', word[:limit]))
+
+        if employee_code:
+            tokens.add(('code', employee_code.strip().lower()[:limit]))
+
+        for email in (official_email, personal_email):
+            if not email:
+                continue
+            email = email.strip().lower()
+            tokens.add(('email', email[:limit]))
+            local_part = email.split('@', 1)[0]
+            tokens.add(('email', local_part[:limit]))
+            for piece in EmployeeSearchService.EMAIL_PART_SPLIT.split(local_part):
+                if piece:
+                    tokens.add(('email', piece[:limit]))
+
+        digits = EmployeeSearchService.NON_DIGIT.sub('', mobile_number or '')
+        if digits:
+            tokens.add(('mobile', digits))
+            if len(digits) > 10:
+                tokens.add(('mobile', digits[-10:]))  # Without country code
+
+        return tokens
+
+    @staticmethod
+    def tokenize_query(query: str) -> List[str]:
+        """Split a search string into normalized prefix terms"""
+        query = (query or '').strip().lower()
+        if not query:
+            return []
+        if EmployeeSearchService.PHONE_QUERY.match(query):
+            digits = EmployeeSearchService.NON_DIGIT.sub('', query)
+            return [digits] if digits else []
+        terms = [term for term in re.split(r'[\s,]+', query) if term]
+        # De-duplicate while keeping order, and cap the number of terms
+        return list(dict.fromkeys(terms))[:6]
+
+    # ========================================================================
+    # INDEX MAINTENANCE
+    # ========================================================================
+
+    @staticmethod
+    def _build_rows(employee_id: int, tokens: Iterable[Tuple[str, str]]) -> List[EmployeeSearchToken]:
+        return [EmployeeSearchToken(employee_id=employee_id, kind=kind, token=token) for kind, token in tokens]
+
+    @staticmethod
+    @transaction.atomic
+    def index_employee(employee: Employee) -> None:
+        """Replace the search tokens of one employee"""
+        tokens = EmployeeSearchService.tokenize(
+            employee.full_name, employee.employee_code, employee.official_email,
+            employee.personal_email, employee.mobile_number,
+        )
+        EmployeeSearchToken.objects.filter(employee_id=employee.pk).delete()
+        EmployeeSearchToken.objects.bulk_create(EmployeeSearchService._build_rows(employee.pk, tokens))
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(batch_size: int = 1000) -> int:
+        """
+        Rebuild the whole search index.
+
+        Returns:
+            Number of employees indexed
+        """
+        EmployeeSearchToken.objects.all().delete()
+        count = 0
+        pending = []
+        rows = Employee.objects.order_by().values_list(*EmployeeSearchService.SOURCE_FIELDS)
+        for pk, *fields in rows.iterator(chunk_size=batch_size):
+            pending.extend(EmployeeSearchService._build_rows(pk, EmployeeSearchService.tokenize(*fields)))
+            count += 1
+            if len(pending) >= batch_size:
+                EmployeeSearchToken.objects.bulk_create(pending, batch_size=batch_size)
+                pending = []
+        if pending:
+            EmployeeSearchToken.objects.bulk_create(pending, batch_size=batch_size)
+        return count
+
+    # ========================================================================
+    # QUERYING
+    # ========================================================================
+
+    @staticmethod
+    def _grouped_matches(terms: List[str], **annotations):
+        """Token rows grouped per employee, keeping employees that match every term"""
+        any_term = Q()
+        term_hits = {}
+        for i, term in enumerate(terms):
+            any_term |= Q(token__startswith=term)
+            term_hits[f'term_{i}'] = Max(Case(
+                When(token__startswith=term, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField(),
+            ))
+        return (
+            EmployeeSearchToken.objects.filter(any_term)
+            .values('employee_id')
+            .annotate(**annotations, **term_hits)
+            .filter(**{name: 1 for name in term_hits})
+        )
+
+    @staticmethod
+    def matches(query: str):
+        """
+        Subquery of the ids of every employee matching all terms, unsliced,
+        for pk__in filters; None for an empty query.
+        """
+        terms = EmployeeSearchService.tokenize_query(query)
+        if not terms:
+            return None
+        return EmployeeSearchService._grouped_matches(terms).values('employee_id')
+
+    @staticmethod
+    def rank(query: str, limit: int = None) -> List[Tuple[int, int]]:
+        """
+        Rank employees matching every term of the query.
+
+        Returns:
+            List of (employee_id, score), best match first, at most limit
+            (MAX_RESULTS by default) long
+        """
+        terms = EmployeeSearchService.tokenize_query(query)
+        if not terms:
+            return []
+
+        score_cases = []
+        for term in terms:
+            for kind, weight in EmployeeSearchService.KIND_WEIGHTS.items():
+                score_cases.append(When(kind=kind, token=term, then=Value(weight * 2)))
+            for kind, weight in EmployeeSearchService.KIND_WEIGHTS.items():
+                score_cases.append(When(kind=kind, token__startswith=term, then=Value(weight)))
+
+        rows = EmployeeSearchService._grouped_matches(
+            terms, score=Sum(Case(*score_cases, default=Value(0), output_field=IntegerField()))
+        ).order_by('-score', 'employee_id')[:limit or EmployeeSearchService.MAX_RESULTS]
+
+        return [(row['employee_id'], row['score']) for row in rows]
+
+    @staticmethod
+    def restrict(queryset, query: str):
+        """Restrict an Employee queryset to every search match, without ranking"""
+        matches = EmployeeSearchService.matches(query)
+        if matches is None:
+            return queryset.none()
+        return queryset.filter(pk__in=matches)
+
+    @staticmethod
+    def apply(queryset, query: str):
+        """
+        Restrict an Employee queryset to search matches, ordered by relevance.
+
+        Every match is kept; only the ordering is capped: the best
+        MAX_RESULTS come first by score, the rest follow by id. Callers can
+        chain further filters; chaining order_by() replaces the relevance
+        ordering.
+        """
+        ids = [pk for pk, _ in EmployeeSearchService.rank(query)]
+        if not ids:
+            return queryset.none()
+        position = Case(
+            *[When(pk=pk, then=Value(i)) for i, pk in enumerate(ids)],
+            default=Value(len(ids)),
+            output_field=IntegerField(),
+        )
+        return EmployeeSearchService.restrict(queryset, query).annotate(search_rank=position).order_by('search_rank', 'pk')
@@ -1,54 +1,207 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from .models import Employee
-from .models_performance import PerformanceEvaluation, EvaluationAuditLog
-from datetime import timedelta, date
-import calendar
-
-def add_months(sourcedate, months):
-    month = sourcedate.month - 1 + months
-    year = sourcedate.year + month // 12
-    month = month % 12 + 1
-    day = min(sourcedate.day, calendar.monthrange(year, month)[1])
-    return date(year, month, day)
+from .models import (
+    Employee, Department, PublicHoliday, UserProfile, ReportingLine, SystemDetail, Device, DeviceAllocation,
+    CPUDevice, ScreenDevice, KeyboardDevice, MouseDevice, HeadphoneDevice, ExtenderDevice,
+)
+from .models_job import InterviewSchedule, JobApplication
+from .stats_service import EmployeeStatsService
+from .inventory_stats import InventoryStatsService
+from .inventory_index import InventoryIndexService
+from .search_service import EmployeeSearchService
+from .recruitment_stats import RecruitmentFunnelService
+from .resume_index import ResumeIndexService
+from .evaluation_service import EvaluationCycleService
+from .evaluation_scheduler import EvaluationSchedulerService
+from .lifecycle_service import EmployeeLifecycleService
+from .thumbnails import ProfileThumbnailService
+from .org_hierarchy import OrgHierarchyService
+from .identity import invalidate_identity, link_employee_by_email
+from .models_performance import PerformanceEvaluation
+from django.db import transaction
 
 @receiver(post_save, sender=Employee)
-def handle_performance_evaluations(sender, instance, **kwargs):
+def handle_performance_evaluations(sender, instance, created, **kwargs):
     """
     Auto-create performance evaluations based on employee period type.
     Trainee/Intern: 3 cycles after every 2 months.
     Probation: 3 cycles, every month for 3 months.
+
+    Cycles are only recomputed when the employee is new or period_type /
+    joining_date changed since it was loaded (see Employee.from_db), so
+    saves touching other fields cost no extra queries.
+    """
+    snapshot = EvaluationCycleService.snapshot(instance)
+    if not created and getattr(instance, '_loaded_evaluation_fields', None) == snapshot:
+        return
+    instance._loaded_evaluation_fields = snapshot
+    EvaluationCycleService.sync([EvaluationCycleService.subject_for(instance)])
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_headcount_stats(sender, **kwargs):
+    """Drop the cached headcount snapshot when employees or departments change."""
+    EmployeeStatsService.invalidate_headcount()
+
+@receiver(post_save, sender=InterviewSchedule)
+@receiver(post_delete, sender=InterviewSchedule)
+@receiver(post_save, sender=PublicHoliday)
+@receiver(post_delete, sender=PublicHoliday)
+def invalidate_dashboard_stats(sender, **kwargs):
+    """Drop today's cached dashboard widgets when interviews or holidays change."""
+    EmployeeStatsService.invalidate_dashboard()
+
+INVENTORY_MODELS = (SystemDetail, CPUDevice, ScreenDevice, KeyboardDevice, MouseDevice, HeadphoneDevice, ExtenderDevice)
+
+def invalidate_inventory_stats(sender, **kwargs):
+    """Drop the cached inventory snapshot when a system or peripheral row changes."""
+    InventoryStatsService.invalidate()
+
+for inventory_model in INVENTORY_MODELS:
+    post_save.connect(invalidate_inventory_stats, sender=inventory_model, dispatch_uid=f'inventory_stats_save_{inventory_model.__name__}')
+    post_delete.connect(invalidate_inventory_stats, sender=inventory_model, dispatch_uid=f'inventory_stats_delete_{inventory_model.__name__}')
+
+def sync_peripheral_index(sender, instance, **kwargs):
+    """Keep the unified inventory index in step with peripheral inventory rows."""
+    InventoryIndexService.sync_peripheral(instance)
+
+def remove_peripheral_index(sender, instance, **kwargs):
+    InventoryIndexService.remove_peripheral(instance)
+
+for peripheral_model in InventoryIndexService.PERIPHERAL_TYPES:
+    post_save.connect(sync_peripheral_index, sender=peripheral_model, dispatch_uid=f'inventory_index_save_{peripheral_model.__name__}')
+    post_delete.connect(remove_peripheral_index, sender=peripheral_model, dispatch_uid=f'inventory_index_delete_{peripheral_model.__name__}')
+
+@receiver(post_save, sender=Device)
+def sync_device_index(sender, instance, **kwargs):
+    InventoryIndexService.sync_device(instance)
+
+@receiver(post_delete, sender=Device)
+def remove_device_index(sender, instance, **kwargs):
+    InventoryIndexService.remove_device(instance)
+
+@receiver(post_save, sender=DeviceAllocation)
+@receiver(post_delete, sender=DeviceAllocation)
+def sync_allocation_index(sender, instance, **kwargs):
+    InventoryIndexService.sync_allocation(instance)
+
+@receiver(post_save, sender=SystemDetail)
+def sync_system_index(sender, instance, **kwargs):
+    InventoryIndexService.sync_system(instance)
+
+@receiver(post_delete, sender=SystemDetail)
+def remove_system_index(sender, instance, **kwargs):
+    InventoryIndexService.remove_system(instance)
+
+@receiver(post_save, sender=Employee)
+def index_employee_search(sender, instance, **kwargs):
+    """Refresh the employee's search tokens."""
+    EmployeeSearchService.index_employee(instance)
+
+@receiver(post_save, sender=JobApplication)
+def track_application_stage(sender, instance, created, **kwargs):
+    """Record stage entry on creation or status change and refresh the funnel snapshot"""
+    if created or getattr(instance, '_loaded_status', None) != instance.status:
+        RecruitmentFunnelService.record_stage(instance)
+    RecruitmentFunnelService.invalidate()
+
+@receiver(post_delete, sender=JobApplication)
+def invalidate_recruitment_funnel(sender, **kwargs):
+    RecruitmentFunnelService.invalidate()
+
+@receiver(post_save, sender=JobApplication)
+def index_application_documents(sender, instance, created, **kwargs):
+    """Queue text extraction for newly uploaded or replaced resumes and cover letters"""
+    loaded = getattr(instance, '_loaded_documents', {})
+    changed = [
+        name for name in ResumeIndexService.DOCUMENT_FIELDS
+        if created or loaded.get(name, getattr(instance, name).name) != getattr(instance, name).name
+    ]
+    if changed:
+        ResumeIndexService.schedule(instance, changed)
+        instance._loaded_documents = {name: getattr(instance, name).name for name in ResumeIndexService.DOCUMENT_FIELDS}
+
+@receiver(post_save, sender=PerformanceEvaluation)
+@receiver(post_delete, sender=PerformanceEvaluation)
+def refresh_evaluation_buckets(sender, instance, **kwargs):
+    """
+    Recompute the due buckets of the evaluation's current and previous manager,
+    and the employee's reporting lines when the assigned manager changed.
     """
-    if instance.period_type in ['trainee', 'intern']:
-        create_evaluation_cycles(instance, 'trainee_intern', interval_months=2)
-    elif instance.period_type == 'probation':
-        create_evaluation_cycles(instance, 'probation', interval_months=1)
-
-def create_evaluation_cycles(employee, category, interval_months):
-    start_date = employee.joining_date
-    if not start_date:
+    manager_ids = {instance.assigned_manager_id, getattr(instance, '_loaded_manager_id', instance.assigned_manager_id)}
+    deleted = kwargs.get('signal') is post_delete
+    if len(manager_ids) > 1 or ((kwargs.get('created') or deleted) and instance.assigned_manager_id):
+        OrgHierarchyService.refresh_subtree([instance.employee_id])
+    instance._loaded_manager_id = instance.assigned_manager_id
+    transaction.on_commit(lambda: EvaluationSchedulerService.refresh_buckets(manager_ids=manager_ids))
+
+@receiver(post_save, sender=Department)
+def track_department_head(sender, instance, created, **kwargs):
+    """Rewrite the department members' reporting lines when its head changes"""
+    if created or getattr(instance, '_loaded_head_id', None) != instance.head_id:
+        OrgHierarchyService.refresh_subtree(instance.employees.values_list('pk', flat=True))
+    instance._loaded_head_id = instance.head_id
+
+@receiver(post_save, sender=Employee)
+def track_employee_department(sender, instance, created, **kwargs):
+    """Rewrite the employee's reporting lines when they join or move department"""
+    if created or getattr(instance, '_loaded_department_id', None) != instance.department_id:
+        OrgHierarchyService.refresh_subtree([instance.pk])
+    instance._loaded_department_id = instance.department_id
+
+@receiver(post_save, sender=Employee)
+def sync_lifecycle_timeline(sender, instance, created, **kwargs):
+    """Re-plan the employee's phase timeline when its dates or period type change"""
+    snapshot = EmployeeLifecycleService.snapshot(instance)
+    if not created and getattr(instance, '_loaded_lifecycle_fields', None) == snapshot:
         return
-        
-    for i in range(1, 4):
-        p_start = add_months(start_date, interval_months * (i-1))
-        p_end = add_months(start_date, interval_months * i)
-        d_date = p_end + timedelta(days=7) # Due date logic: 1 week after period ends
-        
-        eval_obj, created = PerformanceEvaluation.objects.get_or_create(
-            employee=employee,
-            category=category,
-            cycle_number=i,
-            defaults={
-                'period_start': p_start,
-                'period_end': p_end,
-                'due_date': d_date,
-                'status': 'pending'
-            }
-        )
-        
-        if created:
-            EvaluationAuditLog.objects.create(
-                evaluation=eval_obj,
-                action='Created',
-                details=f'Auto-created evaluation for cycle {i} based on {employee.get_period_type_display()}.'
-            )
+    instance._loaded_lifecycle_fields = snapshot
+    instance.__dict__.pop('_phase_cache', None)
+    EmployeeLifecycleService.sync([EmployeeLifecycleService.subject_for(instance)])
+
+@receiver(post_save, sender=Employee)
+def render_profile_thumbnails(sender, instance, created, **kwargs):
+    """Render thumbnails of a newly uploaded profile picture"""
+    name = instance.profile_picture.name or ''
+    previous = getattr(instance, '_loaded_profile_picture', '')
+    if name == previous and not (created and name):
+        return
+    instance._loaded_profile_picture = name
+    ProfileThumbnailService.schedule(instance, previous_name=previous or None)
+
+@receiver(post_delete, sender=Employee)
+def remove_profile_thumbnails(sender, instance, **kwargs):
+    if instance.profile_picture:
+        name = instance.profile_picture.name
+        transaction.on_commit(lambda: ProfileThumbnailService.delete(name))
+
+@receiver(pre_delete, sender=Employee)
+def collect_hierarchy_reports(sender, instance, **kwargs):
+    # The cascade removes the lines through the employee; their reports are rewritten after it
+    instance._hierarchy_report_ids = list(
+        ReportingLine.objects.filter(manager=instance, depth=1).values_list('report_id', flat=True)
+    )
+
+@receiver(post_delete, sender=Employee)
+def refresh_org_hierarchy(sender, instance, **kwargs):
+    OrgHierarchyService.refresh_subtree(getattr(instance, '_hierarchy_report_ids', []))
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_request_identity(sender, instance, **kwargs):
+    """Make the user's sessions re-read role and employee link"""
+    invalidate_identity(instance.user_id)
+
+@receiver(user_logged_in)
+def link_employee_on_login(sender, user, **kwargs):
+    """Link an unlinked profile to the employee with the user's email"""
+    link_employee_by_email(user)
+
+@receiver(pre_delete, sender=Employee)
+def invalidate_linked_identity(sender, instance, **kwargs):
+    # The profile link is nulled with a bulk UPDATE, which sends no post_save
+    for user_id in UserProfile.objects.filter(employee=instance).values_list('user_id', flat=True):
+        invalidate_identity(user_id)
@@ -0,0 +1,266 @@
+# Employee Statistics Service
+# Computes the headcount facets shown on the dashboard and returned by
+# api_employee_stats from a single grouped query, and caches the snapshot.
+#
+# The cache is invalidated from signals.py whenever an Employee or Department
+# row changes, so readers never see stale counts after a save.
+#
+# The employee list's filter chips are served from the same service: one
+# GROUP BY over the searched queryset, cached briefly per search term.
+
+import hashlib
+from typing import Dict, List, Optional
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+from .models import Employee, Department, PublicHoliday
+from .models_job import InterviewSchedule
+
+
+class EmployeeStatsService:
+    """
+    Service class for dashboard and API headcount statistics
+
+    All facets (total, active, per department, per employment status and per
+    period type) are folded out of one GROUP BY over departments LEFT JOIN
+    employees, so empty departments still appear with a zero count.
+    """
+
+    HEADCOUNT_CACHE_KEY = 'employees:stats:headcount'
+    DASHBOARD_CACHE_KEY = 'employees:stats:dashboard:{date}'
+    CACHE_TIMEOUT = 60 * 60  # Signals invalidate on change; TTL is only a safety net
+
+    FACET_CACHE_KEY = 'employees:stats:facets:{version}:{search}'
+    FACET_VERSION_KEY = 'employees:stats:facets:version'
+    FACET_CACHE_TIMEOUT = 60
+
+    # Filter parameter -> grouped column, in chip display order
+    FACET_FIELDS = {
+        'employment_status': 'employment_status',
+        'department': 'department_id',
+        'designation': 'designation_id',
+        'period_type': 'period_type',
+    }
+
+    # ========================================================================
+    # HEADCOUNT FACETS
+    # ========================================================================
+
+    @staticmethod
+    def compute_headcount() -> Dict:
+        """
+        Compute every headcount facet in one query.
+
+        Returns:
+            Dict with totals plus department, status and period type breakdowns
+        """
+        rows = Department.objects.values(
+            'id', 'name', 'employees__employment_status', 'employees__period_type'
+        ).annotate(count=Count('employees')).order_by('name', 'id')
+
+        status_counts = {code: 0 for code, _ in Employee.EMPLOYMENT_STATUS_CHOICES}
+        period_counts = {code: 0 for code, _ in Employee.PERIOD_TYPE_CHOICES}
+        departments = {}
+
+        for row in rows:
+            dept = departments.setdefault(row['id'], {'department': row['name'], 'employee_count': 0})
+            count = row['count']
+            if not count:
+                continue
+            dept['employee_count'] += count
+            status = row['employees__employment_status']
+            period = row['employees__period_type']
+            status_counts[status] = status_counts.get(status, 0) + count
+            period_counts[period] = period_counts.get(period, 0) + count
+
+        total = sum(status_counts.values())
+        active = status_counts.get('active', 0)
+
+        return {
+            'total_employees': total,
+            'active_employees': active,
+            'inactive_employees': total - active,
+            'total_departments': len(departments),
+            'department_breakdown': list(departments.values()),
+            'status_breakdown': [
+                {'employment_status': code, 'count': count}
+                for code, count in sorted(status_counts.items()) if count
+            ],
+            'period_type_breakdown': [
+                {'period_type': code, 'count': count}
+                for code, count in sorted(period_counts.items()) if count
+            ],
+        }
+
+    @staticmethod
+    def get_headcount() -> Dict:
+        """Return the cached headcount snapshot, computing it on a miss"""
+        stats = cache.get(EmployeeStatsService.HEADCOUNT_CACHE_KEY)
+        if stats is None:
+            stats = EmployeeStatsService.compute_headcount()
+            cache.set(EmployeeStatsService.HEADCOUNT_CACHE_KEY, stats, EmployeeStatsService.CACHE_TIMEOUT)
+        return stats
+
+    # ========================================================================
+    # EMPLOYEE LIST FACETS
+    # ========================================================================
+
+    @staticmethod
+    def clean_facet_filters(params) -> Dict[str, str]:
+        """
+        Extract the valid facet filters from request parameters.
+
+        Unknown status / period codes and non-numeric ids are dropped rather
+        than turned into empty result sets.
+        """
+        valid_codes = {
+            'employment_status': {code for code, _ in Employee.EMPLOYMENT_STATUS_CHOICES},
+            'period_type': {code for code, _ in Employee.PERIOD_TYPE_CHOICES},
+        }
+        filters = {}
+        for name in EmployeeStatsService.FACET_FIELDS:
+            value = (params.get(name) or '').strip()
+            if not value:
+                continue
+            if name in valid_codes:
+                if value in valid_codes[name]:
+                    filters[name] = value
+            elif value.isdigit():
+                filters[name] = value
+        return filters
+
+    @staticmethod
+    def apply_facet_filters(queryset, filters: Dict[str, str]):
+        """Restrict an Employee queryset to the selected facet values"""
+        return queryset.filter(**{
+            EmployeeStatsService.FACET_FIELDS[name]: value for name, value in filters.items()
+        })
+
+    @staticmethod
+    def _facet_rows(queryset, search: str) -> List[Dict]:
+        """
+        Grouped counts over every facet combination for one search term.
+
+        Cached for FACET_CACHE_TIMEOUT seconds; the version key is bumped by
+        invalidate_headcount() so edits show up on the next request.
+        """
+        version = cache.get(EmployeeStatsService.FACET_VERSION_KEY, 0)
+        digest = hashlib.md5(search.strip().lower().encode('utf-8')).hexdigest()
+        key = EmployeeStatsService.FACET_CACHE_KEY.format(version=version, search=digest)
+        rows = cache.get(key)
+        if rows is None:
+            rows = list(
+                queryset.order_by().values(
+                    'employment_status', 'department_id', 'department__name',
+                    'designation_id', 'designation__name', 'period_type',
+                ).annotate(count=Count('id'))
+            )
+            cache.set(key, rows, EmployeeStatsService.FACET_CACHE_TIMEOUT)
+        return rows
+
+    @staticmethod
+    def get_list_facets(queryset, search: str = '', filters: Optional[Dict[str, str]] = None) -> Dict:
+        """
+        Compute the employee list filter chips from one grouped query.
+
+        Args:
+            queryset: Searched (but not facet-filtered) Employee queryset
+            search: Search term the queryset was built from (cache key)
+            filters: Selected facet values from clean_facet_filters()
+
+        Returns:
+            Dict with 'total' (rows matching every selected filter),
+            'active' (active rows among them) and 'facets': for each facet a
+            list of {'value', 'label', 'count', 'selected'} chips. A facet's
+            counts apply every selected filter except its own, so chips stay
+            useful for switching between values.
+        """
+        filters = filters or {}
+        fields = EmployeeStatsService.FACET_FIELDS
+        labels = {
+            'employment_status': dict(Employee.EMPLOYMENT_STATUS_CHOICES),
+            'period_type': dict(Employee.PERIOD_TYPE_CHOICES),
+        }
+        label_columns = {'department': 'department__name', 'designation': 'designation__name'}
+
+        def matches(row, skip=None):
+            return all(
+                str(row[fields[name]]) == value
+                for name, value in filters.items() if name != skip
+            )
+
+        total = active = 0
+        chips = {name: {} for name in fields}
+        for row in EmployeeStatsService._facet_rows(queryset, search):
+            count = row['count']
+            if matches(row):
+                total += count
+                if row['employment_status'] == 'active':
+                    active += count
+            for name, column in fields.items():
+                if not matches(row, skip=name):
+                    continue
+                value = str(row[column])
+                chip = chips[name].get(value)
+                if chip is None:
+                    label = row[label_columns[name]] if name in label_columns else labels[name].get(row[column], value)
+                    chip = chips[name][value] = {
+                        'value': value, 'label': label, 'count': 0, 'selected': filters.get(name) == value,
+                    }
+                chip['count'] += count
+
+        return {
+            'total': total,
+            'active': active,
+            'facets': {
+                name: sorted(values.values(), key=lambda chip: (-chip['count'], str(chip['label'])))
+                for name, values in chips.items()
+            },
+        }
+
+    # ========================================================================
+    # DASHBOARD SNAPSHOT
+    # ========================================================================
+
+    @staticmethod
+    def get_dashboard_stats() -> Dict:
+        """
+        Return headcount plus the day-specific dashboard widgets.
+
+        Interviews today and upcoming holidays are cached per calendar day and
+        dropped by the InterviewSchedule / PublicHoliday signals.
+        """
+        today = timezone.now().date()
+        key = EmployeeStatsService.DASHBOARD_CACHE_KEY.format(date=today.isoformat())
+        extras = cache.get(key)
+        if extras is None:
+            extras = {
+                'interviews_today': InterviewSchedule.objects.filter(scheduled_date=today).count(),
+                'upcoming_holidays': list(
+                    PublicHoliday.objects.filter(date__gte=today, is_active=True).order_by('date')[:5]
+                ),
+            }
+            cache.set(key, extras, EmployeeStatsService.CACHE_TIMEOUT)
+
+        stats = dict(EmployeeStatsService.get_headcount())
+        stats.update(extras)
+        return stats
+
+    # ========================================================================
+    # INVALIDATION
+    # ========================================================================
+
+    @staticmethod
+    def invalidate_headcount() -> None:
+        """Drop the cached headcount snapshot and retire cached list facets"""
+        cache.delete(EmployeeStatsService.HEADCOUNT_CACHE_KEY)
+        try:
+            cache.incr(EmployeeStatsService.FACET_VERSION_KEY)
+        except ValueError:
+            cache.set(EmployeeStatsService.FACET_VERSION_KEY, 1, None)
+
+    @staticmethod
+    def invalidate_dashboard() -> None:
+        """Drop today's cached dashboard widgets"""
+        today = timezone.now().date()
+        cache.delete(EmployeeStatsService.DASHBOARD_CACHE_KEY.format(date=today.isoformat()))
@@ -0,0 +1,71 @@
+"""
+Streaming response helpers for large exports.
+
+Rows are produced by generators (typically over ``queryset.values_list(...).iterator()``)
+and written to the client as they are generated, so report size no longer
+bounds memory use.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename, header, rows):
+    """
+    Stream an iterable of rows as a CSV attachment.
+
+    Args:
+        filename: Download filename
+        header: List of column titles
+        rows: Iterable of row sequences (consumed lazily)
+    """
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_json_list(key, items, extra=None, chunk_size=200):
+    """
+    Stream ``{"success": true, <key>: [...items]}`` without materializing the list.
+
+    Args:
+        key: Name of the list property
+        items: Iterable of JSON-serializable dicts (consumed lazily)
+        extra: Optional dict of additional top-level properties
+        chunk_size: Items serialized per yielded chunk
+    """
+    encoder = DjangoJSONEncoder()
+    head = {'success': True}
+    head.update(extra or {})
+
+    def generate():
+        yield encoder.encode(head)[:-1] + f', {json.dumps(key)}: ['
+        chunk = []
+        first = True
+        for item in items:
+            chunk.append(encoder.encode(item))
+            if len(chunk) >= chunk_size:
+                yield ('' if first else ',') + ','.join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield ('' if first else ',') + ','.join(chunk)
+        yield ']}'
+
+    return StreamingHttpResponse(generate(), content_type='application/json')
@@ -0,0 +1,59 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .models import Department, Designation, Employee, UserProfile
+from .query_budget import QUERY_BUDGETS, QueryBudgetTestMixin
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """The views listed in QUERY_BUDGETS stay within their query budgets"""
+
+    EMPLOYEE_COUNT = 15
+
+    @classmethod
+    def setUpTestData(cls):
+        department = Department.objects.create(name='Engineering')
+        designation = Designation.objects.create(name='Developer', department=department)
+        employees = [
+            Employee.objects.create(
+                full_name=f'Employee {i}',
+                department=department,
+                designation=designation,
+                joining_date=date(2024, 1, 1),
+                mobile_number=f'98765{i:05d}',
+                official_email=f'employee{i}@example.com',
+                date_of_birth=date(1990, 1 + i % 12, 1 + i),
+                marital_status='single',
+                highest_qualification='B.Com',
+                aadhar_card_number=f'{i:012d}',
+                pan_card_number=f'ABCDE{i:04d}F',
+            )
+            for i in range(1, cls.EMPLOYEE_COUNT + 1)
+        ]
+        cls.admin = User.objects.create_superuser('admin', 'employee1@example.com', 'password')
+        UserProfile.objects.create(user=cls.admin, role='admin', employee=employees[0])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_every_budget_has_a_test(self):
+        tested = {name[len('test_'):] for name in dir(self) if name.startswith('test_')}
+        for view_name in QUERY_BUDGETS:
+            self.assertIn(view_name.split(':')[-1], tested)
+
+    def test_employee_list(self):
+        self.assertQueryBudget('employees:employee_list')
+
+    def test_calendar_events(self):
+        self.assertQueryBudget('employees:calendar_events', data={'start': '2025-01-01', 'end': '2025-02-01'})
+
+    def test_api_employees_list(self):
+        self.assertQueryBudget('employees:api_employees_list')
+
+    def test_leave_application_add(self):
+        self.assertQueryBudget('employees:leave_application_add')
+
+    def test_system_management(self):
+        self.assertQueryBudget('employees:system_management')
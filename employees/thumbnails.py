@@ -0,0 +1,192 @@
+# Profile Thumbnail Service
+# Generates fixed-size derivatives of Employee.profile_picture so lists,
+# dashboards and the API do not send the original upload for a 40px avatar.
+#
+# Derivatives live under thumbnails/<size>/, named after the original file
+# (extension included, so photo.jpg and photo.png do not share them).
+# Employee.profile_thumbnails_for records which picture they were rendered
+# from; until it matches the current picture (not rendered yet, or
+# rendering failed) the original is served instead, so the URL never needs
+# a file check. New uploads are rendered once the saving transaction
+# commits; the generate_profile_thumbnails command renders existing
+# pictures in a process pool (image_thumbs.py holds the Django-free worker
+# functions).
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+
+from .image_thumbs import render_thumbnails, thumbnail_job
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileThumbnailService:
+    """
+    Service class for profile picture thumbnails
+    """
+
+    # Square edge lengths in pixels: small for list avatars and the navbar
+    # (2x the 40-48px they are shown at), medium for profile headers and cards
+    SIZES = {'small': 96, 'medium': 256, 'large': 512}
+    ROOT = 'thumbnails'
+
+    # ========================================================================
+    # NAMING
+    # ========================================================================
+
+    @staticmethod
+    def storage():
+        from .models import Employee
+        return Employee._meta.get_field('profile_picture').storage
+
+    @staticmethod
+    def thumbnail_name(name: str, size: str) -> str:
+        """thumbnails/small/employee_profiles/2025/03/photo.png.jpg for employee_profiles/2025/03/photo.png"""
+        return f"{ProfileThumbnailService.ROOT}/{size}/{name}.jpg"
+
+    @staticmethod
+    def url(employee, size: str = 'small') -> Optional[str]:
+        """URL of a derivative, the original while none is ready, or None without a picture"""
+        field_file = employee.profile_picture
+        if not field_file:
+            return None
+        if employee.profile_thumbnails_for != field_file.name:
+            return field_file.url
+        return ProfileThumbnailService.storage().url(
+            ProfileThumbnailService.thumbnail_name(field_file.name, size)
+        )
+
+    # ========================================================================
+    # WRITING
+    # ========================================================================
+
+    @staticmethod
+    def store(employee_id: int, name: str, thumbnails: Dict[str, bytes]) -> None:
+        """
+        Write rendered derivatives, replacing earlier renders of the same
+        picture, and mark them ready if the employee still has that picture
+        """
+        from .models import Employee
+
+        storage = ProfileThumbnailService.storage()
+        for size, data in thumbnails.items():
+            thumbnail = ProfileThumbnailService.thumbnail_name(name, size)
+            if storage.exists(thumbnail):
+                storage.delete(thumbnail)
+            storage.save(thumbnail, ContentFile(data))
+        # update() sends no post_save, so this does not re-trigger rendering
+        Employee.objects.filter(pk=employee_id, profile_picture=name).update(profile_thumbnails_for=name)
+
+    @staticmethod
+    def delete(name: str) -> None:
+        """Remove the derivatives of a picture that was replaced or cleared"""
+        storage = ProfileThumbnailService.storage()
+        for size in ProfileThumbnailService.SIZES:
+            thumbnail = ProfileThumbnailService.thumbnail_name(name, size)
+            if storage.exists(thumbnail):
+                storage.delete(thumbnail)
+
+    @staticmethod
+    def _job_source(field_file):
+        """Path for local storage, bytes for remote storage backends"""
+        try:
+            return field_file.path
+        except NotImplementedError:
+            with field_file.open('rb') as f:
+                return f.read()
+
+    @staticmethod
+    def generate(employee_id: int, field_file) -> bool:
+        """Render and store the derivatives of one picture in this process"""
+        try:
+            thumbnails, error = render_thumbnails(
+                ProfileThumbnailService._job_source(field_file), ProfileThumbnailService.SIZES
+            )
+        except OSError as e:
+            thumbnails, error = {}, str(e)
+        if error:
+            logger.warning("Could not render thumbnails of %s: %s", field_file.name, error)
+            return False
+        ProfileThumbnailService.store(employee_id, field_file.name, thumbnails)
+        return True
+
+    @staticmethod
+    def schedule(employee, previous_name: Optional[str] = None) -> None:
+        """Render a new upload (and drop the old picture's derivatives) after commit"""
+        field_file = employee.profile_picture
+        employee_id = employee.pk
+
+        def run():
+            if previous_name:
+                ProfileThumbnailService.delete(previous_name)
+            if field_file:
+                ProfileThumbnailService.generate(employee_id, field_file)
+
+        transaction.on_commit(run)
+
+    # ========================================================================
+    # BACKFILL
+    # ========================================================================
+
+    @staticmethod
+    def worker_count() -> int:
+        return getattr(settings, 'THUMBNAIL_WORKERS', 2)
+
+    @staticmethod
+    def backfill(workers: Optional[int] = None, batch_size: int = 50, force: bool = False) -> Iterator[Tuple[int, int]]:
+        """
+        Render the derivatives of existing profile pictures in parallel.
+
+        Pictures are read in batches and fanned out over a dedicated process
+        pool; results are written from this process as they arrive. Pictures
+        whose derivatives are marked ready are skipped unless force is set.
+
+        Yields:
+            (pictures_processed, pictures_failed) after each batch
+        """
+        from .models import Employee
+
+        processed = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=workers or ProfileThumbnailService.worker_count() or 1,
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as executor:
+            employees = Employee.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+            if not force:
+                employees = employees.exclude(profile_thumbnails_for=F('profile_picture'))
+            batch = []
+            for employee in employees.only('pk', 'profile_picture').order_by('pk').iterator(chunk_size=batch_size):
+                field_file = employee.profile_picture
+                try:
+                    source = ProfileThumbnailService._job_source(field_file)
+                except OSError as e:
+                    logger.warning("Could not read profile picture of employee %s: %s", employee.pk, e)
+                    processed += 1
+                    failed += 1
+                    continue
+                batch.append((employee.pk, field_file.name, source, ProfileThumbnailService.SIZES))
+                if len(batch) >= batch_size:
+                    processed, failed = ProfileThumbnailService._run_batch(executor, batch, processed, failed)
+                    batch = []
+                    yield processed, failed
+            if batch:
+                processed, failed = ProfileThumbnailService._run_batch(executor, batch, processed, failed)
+            yield processed, failed
+
+    @staticmethod
+    def _run_batch(executor, jobs, processed, failed):
+        for employee_id, name, thumbnails, error in executor.map(thumbnail_job, jobs, chunksize=4):
+            if error:
+                logger.warning("Could not render thumbnails for employee %s: %s", employee_id, error)
+                failed += 1
+            else:
+                ProfileThumbnailService.store(employee_id, name, thumbnails)
+            processed += 1
+        return processed, failed
@@ -14,6 +14,7 @@ from . import views_assignment
 from . import views_account_management
 from . import views_system_management
 from . import views_validation
+from . import views_background
 app_name = 'employees'
 urlpatterns = [
     # Performance Evaluation
@@ -59,8 +60,16 @@ urlpatterns = [
     path('update-document-status/<int:document_id>/',
          views.update_document_status_by_id, name='update_document_status_by_id'),
 
+    # Background jobs
+    path('background-jobs/', views_background.background_job_list, name='background_job_list'),
+    path('background-jobs/<int:pk>/', views_background.background_job_detail, name='background_job_detail'),
+    path('background-jobs/<int:pk>/status/', views_background.background_job_status, name='background_job_status'),
+    path('background-jobs/<int:pk>/download/', views_background.background_job_download, name='background_job_download'),
+    path('background-jobs/<int:pk>/cancel/', views_background.background_job_cancel, name='background_job_cancel'),
+
     # Employee CSV Import/Export
     path('employees/export-csv/', views_csv.export_employees_csv, name='export_employees_csv'),
+    path('employees/export-dossiers/', views_csv.export_employee_dossiers, name='export_employee_dossiers'),
     path('employees/import-csv/', views_csv.import_employees_csv, name='import_employees_csv'),
     path('employees/sample-csv/', views_csv.download_employee_sample_csv, name='download_employee_sample_csv'),
 
@@ -81,6 +90,7 @@ urlpatterns = [
     path('device-request/<int:request_id>/reject/', views.reject_device_request, name='reject_device_request'),
     path('device-request/<int:request_id>/available-devices/', views.get_available_devices, name='get_available_devices'),
     path('device-request/<int:request_id>/allocate/', views.allocate_device_to_request, name='allocate_device_to_request'),
+    path('devices/allocate-batch/', views.allocate_devices_batch, name='allocate_devices_batch'),
     path('device-request/<int:request_id>/request-return/', views.request_device_return, name='request_device_return'),
     path('device-request/<int:request_id>/approve-return/', views.approve_device_return, name='approve_device_return'),
 
@@ -91,6 +101,8 @@ urlpatterns = [
     path('api/departments/', views_api.api_departments, name='api_departments'),
     path('api/designations/', views_api.api_designations, name='api_designations'),
     path('api/employees/stats/', views_api.api_employee_stats, name='api_employee_stats'),
+    path('api/employees/<int:employee_id>/reports/', views_api.api_employee_reports, name='api_employee_reports'),
+    path('api/org-chart/', views_api.api_org_chart, name='api_org_chart'),
 
     # Leave & Holiday Management
 
@@ -144,9 +156,11 @@ urlpatterns = [
     path('candidates/', views_job.JobApplicationListView.as_view(), name='candidate_list'),
     path('candidates/<int:pk>/', views_job.JobApplicationDetailView.as_view(), name='candidate_detail'),
     path('candidates/tracker/', views_job.CandidateTrackerView.as_view(), name='candidate_tracker'),
+    path('candidates/tracker/stats/', views_job.candidate_tracker_stats, name='candidate_tracker_stats'),
 
     # Interview Management
     path('candidates/<int:application_id>/interview/add/', views_job.add_interview, name='add_interview'),
+    path('interviews/free-slots/', views_job.interviewer_free_slots, name='interviewer_free_slots'),
     path('interview/<int:interview_id>/edit/', views_job.edit_interview, name='edit_interview'),
     path('interview/<int:interview_id>/delete/', views_job.delete_interview, name='delete_interview'),
     path('candidates/interview/', views_job.InterviewScheduleView.as_view(), name='interview_schedule'),
@@ -183,6 +197,7 @@ urlpatterns = [
 
     # System Management Dashboard
     path('system-management/', views_system_management.system_management, name='system_management'),
+    path('api/system-management/stats/', views_system_management.system_management_stats, name='api_system_management_stats'),
     path('api/system-details/', views_system_management.get_system_details, name='api_system_details'),
     path('api/employees-for-assignment/', views_system_management.get_employees_for_assignment, name='api_employees_for_assignment'),
     path('api/assign-system/', views_system_management.assign_system, name='api_assign_system'),
@@ -210,6 +225,7 @@ urlpatterns = [
     path('api/get-mouse-systems/', views_system_management.get_mouse_systems, name='get_mouse_systems'),
     path('api/get-headphone-systems/', views_system_management.get_headphone_systems, name='get_headphone_systems'),
     path('api/get-extender-systems/', views_system_management.get_extender_systems, name='get_extender_systems'),
+    path('api/inventory/search/', views_system_management.inventory_search, name='api_inventory_search'),
 
     # Form Validation Endpoints
     path('validate/employee/', views_validation.validate_employee_form, name='validate_employee'),
@@ -17,6 +17,11 @@ from django.contrib.auth.models import User
 from django.db import transaction
 from .models import Employee, Department, Designation, EmergencyContact, EmployeeDocument, Device, DeviceAllocation, DeviceRequest, PublicHoliday, LeaveType, LeaveApplication, UserProfile
 from .models_job import InterviewSchedule
+from .stats_service import EmployeeStatsService
+from .allocation_service import DeviceAllocationService
+from .search_service import EmployeeSearchService
+from .org_hierarchy import OrgHierarchyService
+from .identity import get_identity
 from .forms import EmployeeForm, EmergencyContactForm, EmployeeSearchForm, LeaveTypeForm, LeaveApplicationForm, PublicHolidayForm, EmployeeRegistrationForm, DeviceForm, DeviceUpdateForm
 
 
@@ -32,18 +37,16 @@ class DashboardView(LoginRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        total_employees = Employee.objects.count()
-        active_employees = Employee.objects.filter(employment_status='active').count()
-        inactive_count = total_employees - active_employees
+        stats = EmployeeStatsService.get_dashboard_stats()
         context.update({
-            'total_employees': total_employees,
-            'active_employees': active_employees,
-            'inactive_count': inactive_count,
+            'total_employees': stats['total_employees'],
+            'active_employees': stats['active_employees'],
+            'inactive_count': stats['inactive_employees'],
             'recent_employees': self.get_queryset(),
             'departments': Department.objects.all(),
-            'total_departments': Department.objects.count(),
-            'interviews_today': InterviewSchedule.objects.filter(scheduled_date=timezone.now().date()).count(),
-            'upcoming_holidays': PublicHoliday.objects.filter(date__gte=timezone.now().date(), is_active=True).order_by('date')[:5],
+            'total_departments': stats['total_departments'],
+            'interviews_today': stats['interviews_today'],
+            'upcoming_holidays': stats['upcoming_holidays'],
         })
         return context
 
@@ -232,21 +235,59 @@ class EmployeeListView(LoginRequiredMixin, ListView):
     context_object_name = 'employees'
     paginate_by = 20
 
-    def get_queryset(self):
-        queryset = Employee.objects.select_related('department', 'designation').all()
-        search_term = self.request.GET.get('search', '')
-        if search_term:
-            queryset = queryset.filter(
-                Q(full_name__icontains=search_term) |
-                Q(employee_code__icontains=search_term)
+    def get_search_queryset(self):
+        """
+        Searched queryset before facet filters; facet counts are grouped over
+        it. Built once per request, since ranking a search costs a query.
+        """
+        if not hasattr(self, '_search_queryset'):
+            queryset = Employee.objects.select_related('department', 'designation').all()
+            search_term = self.request.GET.get('search', '')
+            if search_term:
+                queryset = EmployeeSearchService.apply(queryset, search_term)
+            else:
+                queryset = queryset.order_by('-created_at')
+            self._search_queryset = queryset
+        return self._search_queryset
+
+    def get_facets(self):
+        if not hasattr(self, '_facets'):
+            self.facet_filters = EmployeeStatsService.clean_facet_filters(self.request.GET)
+            self._facets = EmployeeStatsService.get_list_facets(
+                self.get_search_queryset(), self.request.GET.get('search', ''), self.facet_filters
             )
-        return queryset.order_by('-created_at')
+        return self._facets
+
+    def get_queryset(self):
+        self.get_facets()
+        return EmployeeStatsService.apply_facet_filters(self.get_search_queryset(), self.facet_filters)
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        # The facet query already counted the filtered rows (every search
+        # match, not just the ranked ones); skip Paginator's COUNT(*)
+        paginator.count = self.get_facets()['total']
+        return paginator
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        facets = self.get_facets()
+        filter_params = self.request.GET.copy()
+        filter_params.pop('page', None)
         context['search_form'] = EmployeeSearchForm(self.request.GET)
-        context['active_employees_count'] = self.get_queryset().filter(employment_status='active').count()
-        context['is_paginated'] = self.get_queryset().count() > self.paginate_by
+        context['active_employees_count'] = facets['active']
+        context['total_employees_count'] = facets['total']
+        for name, chips in facets['facets'].items():
+            for chip in chips:
+                params = filter_params.copy()
+                if chip['selected']:
+                    params.pop(name, None)
+                else:
+                    params[name] = chip['value']
+                chip['querystring'] = params.urlencode()
+        context['facets'] = facets['facets']
+        context['facet_filters'] = self.facet_filters
+        context['filter_querystring'] = filter_params.urlencode()
         return context
 
 
@@ -1325,11 +1366,10 @@ def allocate_device(request, pk):
         employee_id = request.POST.get('employee_id')
         employee = get_object_or_404(Employee, pk=employee_id)
 
-        DeviceAllocation.objects.create(
-            device=device,
-            assigned_to=employee,
-            assigned_by=request.user
-        )
+        result = DeviceAllocationService.allocate_device(device, employee, request.user)
+        if not result.success:
+            messages.error(request, f'Device {device.device_name} is no longer available.')
+            return redirect('employees:device_visibility')
 
         messages.success(request, f'Device {device.device_name} allocated to {employee.full_name}')
         return redirect('employees:device_visibility')
@@ -1543,22 +1583,15 @@ class LeaveApplicationListView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         if self.request.user.is_superuser:
             return LeaveApplication.objects.all()
-        else:
-            try:
-                user_profile = self.request.user.profile
-                if user_profile.employee:
-                    return LeaveApplication.objects.filter(employee=user_profile.employee)
-                else:
-                    from employees.models import Employee
-                    employee = Employee.objects.filter(official_email=self.request.user.email).first()
-                    if employee:
-                        user_profile.employee = employee
-                        user_profile.save()
-                        return LeaveApplication.objects.filter(employee=employee)
-                    else:
-                        return LeaveApplication.objects.none()
-            except AttributeError:
-                return LeaveApplication.objects.none()
+        identity = get_identity(self.request)
+        if not identity.employee_id:
+            return LeaveApplication.objects.none()
+        if identity.role == 'manager':
+            # Managers also see the leave of everyone reporting to them
+            return LeaveApplication.objects.filter(
+                OrgHierarchyService.team_filter(identity.employee_id, include_self=True)
+            )
+        return LeaveApplication.objects.filter(employee_id=identity.employee_id)
 
 
 class LeaveApplicationDetailView(LoginRequiredMixin, DetailView):
@@ -1569,15 +1602,14 @@ class LeaveApplicationDetailView(LoginRequiredMixin, DetailView):
     def get_queryset(self):
         if self.request.user.is_superuser:
             return LeaveApplication.objects.all()
-        else:
-            try:
-                user_profile = self.request.user.profile
-                if user_profile.employee:
-                    return LeaveApplication.objects.filter(employee=user_profile.employee)
-                else:
-                    return LeaveApplication.objects.none()
-            except AttributeError:
-                return LeaveApplication.objects.none()
+        identity = get_identity(self.request)
+        if not identity.employee_id:
+            return LeaveApplication.objects.none()
+        if identity.role == 'manager':
+            return LeaveApplication.objects.filter(
+                OrgHierarchyService.team_filter(identity.employee_id, include_self=True)
+            )
+        return LeaveApplication.objects.filter(employee_id=identity.employee_id)
 
 
 class LeaveApplicationCreateView(LoginRequiredMixin, CreateView):
@@ -1588,12 +1620,9 @@ class LeaveApplicationCreateView(LoginRequiredMixin, CreateView):
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
-        try:
-            user_profile = self.request.user.profile
-            if user_profile.employee:
-                kwargs['employee'] = user_profile.employee
-        except AttributeError:
-            pass
+        employee = get_identity(self.request).employee
+        if employee:
+            kwargs['employee'] = employee
         return kwargs
 
     def form_valid(self, form):
@@ -1601,24 +1630,13 @@ class LeaveApplicationCreateView(LoginRequiredMixin, CreateView):
         from decimal import Decimal
         from datetime import timedelta
 
-        try:
-            user_profile = self.request.user.profile
-            if not user_profile.employee:
-                from employees.models import Employee
-                employee = Employee.objects.filter(official_email=self.request.user.email).first()
-                if employee:
-                    user_profile.employee = employee
-                    user_profile.save()
-                    form.instance.employee = employee
-                else:
-                    raise AttributeError("No employee found for this user")
-            else:
-                form.instance.employee = user_profile.employee
-        except AttributeError:
+        # The identity context links the profile to an employee by official email when needed
+        employee = get_identity(self.request).employee
+        if employee is None:
             messages.error(self.request, 'You need to have an employee profile to apply for leave.')
             return self.form_invalid(form)
+        form.instance.employee = employee
 
-        employee = form.instance.employee
         leave_type = form.cleaned_data['leave_type']
         start_date = form.cleaned_data['start_date']
         end_date = form.cleaned_data['end_date']
@@ -1684,39 +1702,21 @@ class LeaveApplicationCreateView(LoginRequiredMixin, CreateView):
         context = super().get_context_data(**kwargs)
         context['leave_types'] = LeaveType.objects.filter(is_active=True)
 
-        try:
-            user_profile = self.request.user.profile
-            if user_profile.employee:
-                from .leave_service import LeaveManagementService
-                employee = user_profile.employee
-
-                context['leave_balances'] = {
-                    'casual': LeaveManagementService.get_leave_balance(employee, 'casual'),
-                    'emergency': LeaveManagementService.get_leave_balance(employee, 'emergency'),
-                    'birthday': LeaveManagementService.get_leave_balance(employee, 'birthday'),
-                    'marriage_anniversary': LeaveManagementService.get_leave_balance(employee, 'marriage_anniversary'),
-                }
+        employee = get_identity(self.request).employee
+        if employee:
+            from .leave_service import LeaveManagementService
 
-                context['casual_leave_info'] = LeaveManagementService.get_casual_leave_accrual_info(employee)
-                context['employee_type'] = LeaveManagementService.identify_employee_type(employee)
-            else:
-                from employees.models import Employee
-                employee = Employee.objects.filter(official_email=self.request.user.email).first()
-                if employee:
-                    user_profile.employee = employee
-                    user_profile.save()
-
-                    from .leave_service import LeaveManagementService
-                    context['leave_balances'] = {
-                        'casual': LeaveManagementService.get_leave_balance(employee, 'casual'),
-                        'emergency': LeaveManagementService.get_leave_balance(employee, 'emergency'),
-                        'birthday': LeaveManagementService.get_leave_balance(employee, 'birthday'),
-                        'marriage_anniversary': LeaveManagementService.get_leave_balance(employee, 'marriage_anniversary'),
-                    }
-
-                    context['casual_leave_info'] = LeaveManagementService.get_casual_leave_accrual_info(employee)
-                    context['employee_type'] = LeaveManagementService.identify_employee_type(employee)
-        except AttributeError:
+            # One grouped query serves every balance shown on the form
+            approved_days = LeaveManagementService.get_approved_days(employee)
+            context['leave_balances'] = LeaveManagementService.get_leave_balances(
+                employee, ['casual', 'emergency', 'birthday', 'marriage_anniversary'], approved_days=approved_days
+            )
+
+            context['casual_leave_info'] = LeaveManagementService.get_casual_leave_accrual_info(
+                employee, approved_days=approved_days
+            )
+            context['employee_type'] = LeaveManagementService.identify_employee_type(employee)
+        else:
             context['leave_balances'] = None
             context['casual_leave_info'] = None
             context['employee_type'] = None
@@ -2054,10 +2054,9 @@ def allocate_device_to_request(request, request_id):
 
         device = get_object_or_404(Device, id=device_id)
 
-        if device.status != 'available':
-            return JsonResponse({'error': 'Device is not available'}, status=400)
-
-        device_request.allocate_device(request.user, device)
+        result = DeviceAllocationService.allocate_to_request(device_request, device, request.user)
+        if not result.success:
+            return JsonResponse({'error': result.message}, status=409)
 
         Notification.objects.create(
             title='Device Allocated',
@@ -2071,6 +2070,39 @@ def allocate_device_to_request(request, request_id):
         return JsonResponse({'error': str(e)}, status=400)
 
 
+@require_POST
+@login_required
+def allocate_devices_batch(request):
+    """
+    Allocate devices to several joiners in one transaction.
+
+    JSON body, either explicit pairs:
+        {"assignments": [{"device_id": 1, "employee_id": 7}, ...]}
+    or any free device of a type per employee:
+        {"device_type": "laptop", "employee_ids": [7, 8, 9]}
+    Nothing is allocated if any device is already taken.
+    """
+    if not request.user.is_superuser and not request.user.is_staff:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        if data.get('device_type'):
+            result = DeviceAllocationService.allocate_next_available(
+                data['device_type'], [int(pk) for pk in data.get('employee_ids', [])], request.user
+            )
+        else:
+            assignments = [
+                (int(item['device_id']), int(item['employee_id']))
+                for item in data.get('assignments', [])
+            ]
+            result = DeviceAllocationService.allocate_batch(assignments, request.user)
+    except (ValueError, KeyError, TypeError) as e:
+        return JsonResponse({'error': f'Invalid request: {e}'}, status=400)
+
+    return JsonResponse(DeviceAllocationService.summarize(result), status=200 if result.success else 409)
+
+
 @login_required
 def request_device_return(request, request_id):
     device_request = get_object_or_404(DeviceRequest, id=request_id)
@@ -4,10 +4,12 @@ from django.contrib.auth.decorators import login_required
 from django.db.models import Q
 from django.core.paginator import Paginator
 from django.http import HttpResponse
+from django.urls import reverse
 import csv
-import io
 from .models import AccountManagement
 from .forms import AccountManagementForm
+from .bulk_import import IMPORT_EXTENSIONS
+from .views_background import enqueue_upload
 
 
 @login_required
@@ -141,9 +143,9 @@ def account_import_csv(request):
                 messages.error(request, 'Please select a CSV file.')
                 return redirect('employees:account_management')
             
-            # Check if file is CSV
-            if not csv_file.name.endswith('.csv'):
-                messages.error(request, 'Please upload a CSV file.')
+            # Check if file is CSV or Excel
+            if not csv_file.name.lower().endswith(IMPORT_EXTENSIONS):
+                messages.error(request, 'Please upload a CSV or Excel (.xlsx) file.')
                 return redirect('employees:account_management')
             
             # Check file size (10MB limit)
@@ -151,54 +153,13 @@ def account_import_csv(request):
                 messages.error(request, 'File size must be less than 10MB.')
                 return redirect('employees:account_management')
             
-            # Read and process CSV
-            data_set = csv_file.read().decode('UTF-8')
-            io_string = io.StringIO(data_set)
-            next(io_string)  # Skip header row
-            
-            skip_duplicates = request.POST.get('skip_duplicates') == 'on'
-            imported_count = 0
-            skipped_count = 0
-            
-            for column in csv.reader(io_string):
-                if len(column) >= 9:  # Ensure we have at least 9 columns
-                    name = column[0].strip()
-                    email = column[1].strip()
-                    email_password = column[2].strip()
-                    teams = column[3].strip() if column[3].strip() else ''
-                    teams_password = column[4].strip() if column[4].strip() else ''
-                    basecamp_password = column[5].strip() if column[5].strip() else ''
-                    system_password = column[6].strip()
-                    github = column[7].strip() if column[7].strip() else ''
-                    github_password = column[8].strip() if column[8].strip() else ''
-                    apple_store_id = column[9].strip() if column[9].strip() else ''
-                    apple_password = column[10].strip() if column[10].strip() else ''
-                    notes = column[11].strip() if len(column) > 11 and column[11].strip() else ''
-                    
-                    # Check for duplicates if requested
-                    if skip_duplicates:
-                        if AccountManagement.objects.filter(email=email).exists():
-                            skipped_count += 1
-                            continue
-                    
-                    # Create account
-                    AccountManagement.objects.create(
-                        name=name,
-                        email=email,
-                        email_password=email_password,
-                        teams=teams,
-                        teams_password=teams_password,
-                        basecamp_password=basecamp_password,
-                        system_password=system_password,
-                        github=github,
-                        github_password=github_password,
-                        apple_store_id=apple_store_id,
-                        apple_password=apple_password,
-                        is_active=True
-                    )
-                    imported_count += 1
-            
-            messages.success(request, f'Successfully imported {imported_count} accounts. {skipped_count} accounts were skipped.')
+            # Rows are processed by the job worker; the job page polls for progress
+            job = enqueue_upload(
+                request, 'import_accounts_csv', csv_file, 'Account import',
+                reverse('employees:account_management'),
+                skip_duplicates=request.POST.get('skip_duplicates') == 'on',
+            )
+            return redirect('employees:background_job_detail', pk=job.pk)
             
         except Exception as e:
             messages.error(request, f'Error importing CSV: {str(e)}')
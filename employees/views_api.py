@@ -6,6 +6,10 @@ from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from .models import Employee, Department, Designation, EmergencyContact, EmployeeDocument, Device, UserProfile
 from django.contrib.auth.models import User
+from .stats_service import EmployeeStatsService
+from .search_service import EmployeeSearchService
+from .org_hierarchy import OrgHierarchyService
+from .identity import get_identity
 
 
 @login_required
@@ -50,12 +54,7 @@ def api_employees_list(request):
         
         # Apply filters
         if search:
-            queryset = queryset.filter(
-                Q(full_name__icontains=search) |
-                Q(employee_code__icontains=search) |
-                Q(official_email__icontains=search) |
-                Q(mobile_number__icontains=search)
-            )
+            queryset = EmployeeSearchService.apply(queryset, search)
         
         if department:
             queryset = queryset.filter(department__name__icontains=department)
@@ -74,7 +73,7 @@ def api_employees_list(request):
                 'id': emp.id,
                 'employee_code': emp.employee_code,
                 'full_name': emp.full_name,
-                'profile_picture': emp.profile_picture.url if emp.profile_picture else None,
+                'profile_picture': emp.profile_thumbnail_url,
                 'department': {
                     'id': emp.department.id,
                     'name': emp.department.name
@@ -135,13 +134,12 @@ def api_employees_list(request):
 def api_employee_detail(request, employee_id):
     """API endpoint to get detailed information for a specific employee"""
     # Check permissions
-    user_profile = getattr(request.user, 'profile', None)
-    if not user_profile:
+    identity = get_identity(request)
+    if not identity.has_profile:
         return JsonResponse({'error': 'Permission denied'}, status=403)
     
     # Allow viewing own profile or if user can view all employees
-    can_view = (user_profile.can_view_all_employees or 
-                (user_profile.employee and user_profile.employee.id == employee_id))
+    can_view = identity.can_view_all_employees or identity.employee_id == employee_id
     
     if not can_view:
         return JsonResponse({'error': 'Permission denied'}, status=403)
@@ -232,6 +230,7 @@ def api_employee_detail(request, employee_id):
             'employee_code': employee.employee_code,
             'full_name': employee.full_name,
             'profile_picture': employee.profile_picture.url if employee.profile_picture else None,
+            'profile_thumbnail': employee.profile_thumbnail_medium_url,
             'department': {
                 'id': employee.department.id,
                 'name': employee.department.name,
@@ -374,39 +373,66 @@ def api_employee_stats(request):
         return JsonResponse({'error': 'Permission denied'}, status=403)
     
     try:
-        total_employees = Employee.objects.count()
-        active_employees = Employee.objects.filter(employment_status='active').count()
-        inactive_employees = total_employees - active_employees
-        
-        # Department-wise counts
-        dept_stats = []
-        departments = Department.objects.annotate(employee_count=Count('employees'))
-        for dept in departments:
-            dept_stats.append({
-                'department': dept.name,
-                'employee_count': dept.employee_count
-            })
-        
-        # Employment status breakdown
-        status_stats = Employee.objects.values('employment_status').annotate(
-            count=Count('id')
-        ).order_by('employment_status')
-        
-        # Period type breakdown
-        period_stats = Employee.objects.values('period_type').annotate(
-            count=Count('id')
-        ).order_by('period_type')
-        
+        headcount = EmployeeStatsService.get_headcount()
         stats_data = {
-            'total_employees': total_employees,
-            'active_employees': active_employees,
-            'inactive_employees': inactive_employees,
-            'department_breakdown': dept_stats,
-            'status_breakdown': list(status_stats),
-            'period_type_breakdown': list(period_stats)
+            'total_employees': headcount['total_employees'],
+            'active_employees': headcount['active_employees'],
+            'inactive_employees': headcount['inactive_employees'],
+            'department_breakdown': headcount['department_breakdown'],
+            'status_breakdown': headcount['status_breakdown'],
+            'period_type_breakdown': headcount['period_type_breakdown']
         }
         
         return JsonResponse(stats_data)
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+
+@login_required
+def api_org_chart(request):
+    """
+    API endpoint for the org chart built from the reporting hierarchy.
+    Optional ?root=<employee_id> returns only that employee's subtree.
+    """
+    if not (request.user.is_superuser or request.user.is_staff or get_identity(request).can_manage_employees):
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    try:
+        root = request.GET.get('root')
+        return JsonResponse({'org_chart': OrgHierarchyService.org_chart(int(root) if root else None)})
+    except ValueError:
+        return JsonResponse({'error': 'Invalid root'}, status=400)
+
+
+@login_required
+def api_employee_reports(request, employee_id):
+    """
+    API endpoint listing everyone reporting to an employee at any depth.
+    Optional ?depth=<n> limits how many levels down to go.
+    """
+    identity = get_identity(request)
+    is_self = identity.employee_id == employee_id
+    if not (is_self or request.user.is_superuser or request.user.is_staff or identity.can_manage_employees):
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    try:
+        depth = request.GET.get('depth')
+        reports = OrgHierarchyService.reports_of(employee_id, int(depth) if depth else None)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid depth'}, status=400)
+
+    return JsonResponse({
+        'employee_id': employee_id,
+        'managers': OrgHierarchyService.managers_of(employee_id),
+        'reports': [
+            {
+                'id': employee.id,
+                'full_name': employee.full_name,
+                'employee_code': employee.employee_code,
+                'department': employee.department.name if employee.department else None,
+                'designation': employee.designation.name if employee.designation else None,
+            }
+            for employee in reports.order_by('full_name')
+        ],
+    })
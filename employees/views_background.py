@@ -0,0 +1,73 @@
+"""
+Background job pages: progress polling, results and result downloads.
+"""
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
+
+from .job_queue import JobQueueService
+from .models import BackgroundJob
+
+
+def enqueue_upload(request, kind, upload, label, return_url, **payload):
+    """Store an uploaded file and queue the job that processes it"""
+    payload.update({'upload': JobQueueService.store_upload(upload), 'filename': upload.name, 'return_url': return_url})
+    job = JobQueueService.enqueue(kind, payload, user=request.user, label=label)
+    messages.info(request, f'{label} queued. This page updates as the file is processed.')
+    return job
+
+
+def _get_job(request, pk):
+    """Users see their own jobs; staff see everyone's"""
+    queryset = BackgroundJob.objects.all()
+    if not request.user.is_staff and not request.user.is_superuser:
+        queryset = queryset.filter(created_by=request.user)
+    return get_object_or_404(queryset, pk=pk)
+
+
+@login_required
+def background_job_list(request):
+    """Recent jobs of the current user (all jobs for staff)"""
+    jobs = BackgroundJob.objects.select_related('created_by')
+    if not request.user.is_staff and not request.user.is_superuser:
+        jobs = jobs.filter(created_by=request.user)
+    return render(request, 'employees/background_job_list.html', {'jobs': jobs[:100]})
+
+
+@login_required
+def background_job_detail(request, pk):
+    job = _get_job(request, pk)
+    return render(request, 'employees/background_job_detail.html', {
+        'job': job,
+        'summary': JobQueueService.summarize(job),
+        'return_url': (job.payload or {}).get('return_url'),
+    })
+
+
+@login_required
+def background_job_status(request, pk):
+    """Progress-polling endpoint"""
+    job = _get_job(request, pk)
+    return JsonResponse({'success': True, **JobQueueService.summarize(job)})
+
+
+@login_required
+def background_job_download(request, pk):
+    job = _get_job(request, pk)
+    if not job.result_file:
+        raise Http404("This job has no result file")
+    return FileResponse(job.result_file.open('rb'), as_attachment=True,
+                        filename=job.result_file.name.rsplit('/', 1)[-1])
+
+
+@login_required
+@require_POST
+def background_job_cancel(request, pk):
+    job = _get_job(request, pk)
+    if JobQueueService.cancel(job):
+        messages.success(request, 'Job cancelled.')
+    else:
+        messages.warning(request, 'The job has already finished.')
+    return redirect('employees:background_job_detail', pk=job.pk)
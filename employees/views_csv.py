@@ -2,49 +2,43 @@
 CSV Import/Export Views for Employees, Public Holidays, and Job Descriptions
 """
 import csv
-from io import TextIOWrapper
 from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db import transaction
-from datetime import datetime
-from decimal import Decimal
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
-
-from .models import Employee, Department, Designation, PublicHoliday
+from django.urls import reverse
+
+from .bulk_import import IMPORT_EXTENSIONS
+from .dossier_export import DossierExportService
+from .models import Employee
 from .models_job import JobDescription
+from .exports import build_public_holidays_workbook, stream_xlsx, wants_xlsx, xlsx_response
+from .job_queue import JobQueueService
+from .search_service import EmployeeSearchService
+from .stats_service import EmployeeStatsService
+from .views_background import enqueue_upload
 
 #     ====== EMPLOYEE CSV EXPORT/IMPORT     ======
 
-@login_required
-def export_employees_csv(request):
-    """Export all employees to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="employees_export.csv"'
-
-    writer = csv.writer(response)
-
-    # Write header
-    writer.writerow([
-        'Employee Code', 'Full Name', 'Department', 'Designation',
-        'Joining Date', 'Relieving Date', 'Employment Status',
-        'Mobile Number', 'Official Email', 'Personal Email',
-        'Local Address', 'Permanent Address',
-        'Date of Birth', 'Marital Status', 'Anniversary Date',
-        'Highest Qualification', 'Total Experience Years', 'Total Experience Months',
-        'Probation Status', 'Aadhar Card Number', 'PAN Card Number',
-        'Emergency Contact Name', 'Emergency Contact Mobile',
-        'Emergency Contact Email', 'Emergency Contact Address',
-        'Emergency Contact Relationship'
-    ])
-
-    # Write data
+EMPLOYEE_EXPORT_HEADER = [
+    'Employee Code', 'Full Name', 'Department', 'Designation',
+    'Joining Date', 'Relieving Date', 'Employment Status',
+    'Mobile Number', 'Official Email', 'Personal Email',
+    'Local Address', 'Permanent Address',
+    'Date of Birth', 'Marital Status', 'Anniversary Date',
+    'Highest Qualification', 'Total Experience Years', 'Total Experience Months',
+    'Probation Status', 'Aadhar Card Number', 'PAN Card Number',
+    'Emergency Contact Name', 'Emergency Contact Mobile',
+    'Emergency Contact Email', 'Emergency Contact Address',
+    'Emergency Contact Relationship'
+]
+
+
+def _employee_export_rows():
+    """Lazily yield one export row per employee"""
     employees = Employee.objects.select_related('department', 'designation').all()
-    for emp in employees:
-        writer.writerow([
+    for emp in employees.iterator(chunk_size=2000):
+        yield [
             emp.employee_code,
             emp.full_name,
             emp.department.name,
@@ -71,7 +65,21 @@ def export_employees_csv(request):
             emp.emergency_contact_email or '',
             emp.emergency_contact_address or '',
             emp.emergency_contact_relationship or '',
-        ])
+        ]
+
+
+@login_required
+def export_employees_csv(request):
+    """Export all employees to CSV (or to Excel with ?format=xlsx)"""
+    if wants_xlsx(request):
+        return stream_xlsx('employees_export.xlsx', EMPLOYEE_EXPORT_HEADER, _employee_export_rows(), sheet_title='Employees')
+
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="employees_export.csv"'
+
+    writer = csv.writer(response)
+    writer.writerow(EMPLOYEE_EXPORT_HEADER)
+    writer.writerows(_employee_export_rows())
 
     return response
 
@@ -121,206 +129,61 @@ def import_employees_csv(request):
             messages.error(request, 'Please upload a valid CSV file.')
             return redirect('employees:employee_list')
 
-        try:
-            # Read CSV file
-            file_data = TextIOWrapper(csv_file.file, encoding='utf-8')
-            csv_reader = csv.DictReader(file_data)
-
-            success_count = 0
-            error_count = 0
-            errors = []
-
-            with transaction.atomic():
-                for row_num, row in enumerate(csv_reader, start=2):
-                    try:
-                        # Get or create department
-                        dept_name = row.get('Department', '').strip()
-                        if not dept_name:
-                            raise ValueError("Department is required")
-
-                        department, _ = Department.objects.get_or_create(
-                            name=dept_name,
-                            defaults={'description': f'{dept_name} Department'}
-                        )
-
-                        # Get or create designation
-                        desig_name = row.get('Designation', '').strip()
-                        if not desig_name:
-                            raise ValueError("Designation is required")
-
-                        designation, _ = Designation.objects.get_or_create(
-                            name=desig_name,
-                            department=department,
-                            defaults={'description': f'{desig_name} Position'}
-                        )
-
-                        # Parse dates
-                        joining_date = datetime.strptime(row.get('Joining Date', '').strip(), '%Y-%m-%d').date() if row.get('Joining Date', '').strip() else None
-                        relieving_date = datetime.strptime(row.get('Relieving Date', '').strip(), '%Y-%m-%d').date() if row.get('Relieving Date', '').strip() else None
-                        date_of_birth = datetime.strptime(row.get('Date of Birth', '').strip(), '%Y-%m-%d').date() if row.get('Date of Birth', '').strip() else None
-                        anniversary_date = datetime.strptime(row.get('Anniversary Date', '').strip(), '%Y-%m-%d').date() if row.get('Anniversary Date', '').strip() else None
-
-                        # Create or update employee
-                        employee_code = row.get('Employee Code', '').strip()
-                        official_email = row.get('Official Email', '').strip()
-
-                        if not official_email:
-                            raise ValueError("Official Email is required")
-
-                        employee, created = Employee.objects.update_or_create(
-                            official_email=official_email,
-                            defaults={
-                                'employee_code': employee_code,
-                                'full_name': row.get('Full Name', '').strip(),
-                                'department': department,
-                                'designation': designation,
-                                'joining_date': joining_date,
-                                'relieving_date': relieving_date,
-                                'employment_status': row.get('Employment Status', 'active').strip(),
-                                'mobile_number': row.get('Mobile Number', '').strip(),
-                                'personal_email': row.get('Personal Email', '').strip() or None,
-                                'local_address': row.get('Local Address', '').strip(),
-                                'permanent_address': row.get('Permanent Address', '').strip(),
-                                'date_of_birth': date_of_birth,
-                                'marital_status': row.get('Marital Status', 'single').strip(),
-                                'anniversary_date': anniversary_date,
-                                'highest_qualification': row.get('Highest Qualification', '').strip(),
-                                'total_experience_years': int(row.get('Total Experience Years', 0) or 0),
-                                'total_experience_months': int(row.get('Total Experience Months', 0) or 0),
-                                'period_type': row.get('Period Type', 'confirmed').strip(),
-                                'aadhar_card_number': row.get('Aadhar Card Number', '').strip(),
-                                'pan_card_number': row.get('PAN Card Number', '').strip().upper(),
-                                'emergency_contact_name': row.get('Emergency Contact Name', '').strip(),
-                                'emergency_contact_mobile': row.get('Emergency Contact Mobile', '').strip(),
-                                'emergency_contact_email': row.get('Emergency Contact Email', '').strip(),
-                                'emergency_contact_address': row.get('Emergency Contact Address', '').strip(),
-                                'emergency_contact_relationship': row.get('Emergency Contact Relationship', '').strip(),
-                            }
-                        )
-
-                        success_count += 1
-
-                    except Exception as e:
-                        error_count += 1
-                        errors.append(f"Row {row_num}: {str(e)}")
-
-            # Show results
-            if success_count > 0:
-                messages.success(request, f'Successfully imported {success_count} employee(s).')
-
-            if error_count > 0:
-                error_msg = f'Failed to import {error_count} employee(s). Errors: ' + '; '.join(errors[:5])
-                if len(errors) > 5:
-                    error_msg += f' ... and {len(errors) - 5} more errors.'
-                messages.error(request, error_msg)
-
-        except Exception as e:
-            messages.error(request, f'Error processing CSV file: {str(e)}')
+        # Rows are processed by the job worker; the job page polls for progress
+        job = enqueue_upload(request, 'import_employees_csv', csv_file, 'Employee import', reverse('employees:employee_list'))
+        return redirect('employees:background_job_detail', pk=job.pk)
 
+    return render(request, 'employees/import_csv.html', {'model_name': 'Employee'})
+
+#     ====== EMPLOYEE DOCUMENT DOSSIERS     ======
+
+@login_required
+def export_employee_dossiers(request):
+    """
+    Stream a ZIP of the submitted documents of the selected employees.
+
+    Employees are picked with ?employee=<id> (repeatable); without it the
+    employee list's current search and filters select them.
+    """
+    if not request.user.is_superuser and not request.user.is_staff:
+        messages.error(request, 'You do not have permission to export employee documents.')
         return redirect('employees:employee_list')
 
-    return render(request, 'employees/import_csv.html', {'model_name': 'Employee'})
+    selected = [value for value in request.GET.getlist('employee') if value.isdigit()]
+    if selected:
+        employees = Employee.objects.filter(pk__in=selected)
+    else:
+        employees = Employee.objects.all()
+        search_term = request.GET.get('search', '')
+        if search_term:
+            # Every match goes into the archive; relevance order does not matter here
+            employees = EmployeeSearchService.restrict(employees, search_term)
+        employees = EmployeeStatsService.apply_facet_filters(
+            employees, EmployeeStatsService.clean_facet_filters(request.GET)
+        )
+
+    filename = None
+    if len(selected) == 1:
+        code = employees.values_list('employee_code', flat=True).first()
+        filename = f"{code or 'employee'}_documents.zip"
+    return DossierExportService.stream_response(employees.order_by().values('pk'), filename=filename)
 
 #     ====== PUBLIC HOLIDAY CSV EXPORT/IMPORT     ======
 
 @login_required
 def export_public_holidays_csv(request):
     """Export public holidays to Excel with separate sheets for each country"""
-    from django.utils import timezone
-    
-    # Create a new Excel workbook
-    wb = openpyxl.Workbook()
-    
-    # Remove default sheet
-    if 'Sheet' in wb.sheetnames:
-        wb.remove(wb['Sheet'])
-    
-    # Define styles
-    header_font = Font(bold=True, color='FFFFFF')
-    header_fill = PatternFill(start_color='332666', end_color='332666', fill_type='solid')
-    header_alignment = Alignment(horizontal='center', vertical='center')
-    
-    # Get all countries from the model choices
-    countries = PublicHoliday.COUNTRY_CHOICES
-    
-    # Calculate year range from all holidays
-    all_holidays = PublicHoliday.objects.all()
-    if all_holidays.exists():
-        years = sorted(set(holiday.year for holiday in all_holidays))
-        year_range = f"{years[0]}-{years[-1]}" if len(years) > 1 else str(years[0])
-    else:
-        year_range = str(timezone.now().year)
-    
-    for country_code, country_name in countries:
-        # Create sheet for each country
-        sheet_name = f"{country_name} Holidays"
-        ws = wb.create_sheet(title=sheet_name)
-        
-        # Write headers
-        headers = ['Holiday Name', 'Date', 'Day', 'Year', 'Description', 'Is Optional', 'Is Active']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        # Get holidays for this country
-        holidays = PublicHoliday.objects.filter(country=country_code).order_by('date')
-        
-        # Write data
-        for row_num, holiday in enumerate(holidays, 2):
-            ws.cell(row=row_num, column=1, value=holiday.name)
-            ws.cell(row=row_num, column=2, value=holiday.date.strftime('%Y-%m-%d'))
-            ws.cell(row=row_num, column=3, value=holiday.day)
-            ws.cell(row=row_num, column=4, value=holiday.year)
-            ws.cell(row=row_num, column=5, value=holiday.description or '')
-            ws.cell(row=row_num, column=6, value='Yes' if holiday.is_optional else 'No')
-            ws.cell(row=row_num, column=7, value='Yes' if holiday.is_active else 'No')
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Add summary at the top if there are holidays
-        if holidays.count() > 0:
-            # Calculate year range for this country
-            country_years = sorted(set(holiday.year for holiday in holidays))
-            country_year_range = f"{country_years[0]}-{country_years[-1]}" if len(country_years) > 1 else str(country_years[0])
-            
-            # Insert title row
-            ws.insert_rows(1)
-            ws.cell(row=1, column=1, value=f"{country_name} Public Holidays - {country_year_range}")
-            ws.cell(row=1, column=1).font = Font(bold=True, size=14)
-            ws.merge_cells(f'A1:{get_column_letter(len(headers))}1')
-            ws.cell(row=1, column=1).alignment = Alignment(horizontal='center')
-            
-            # Insert total count row
-            ws.insert_rows(2)
-            ws.cell(row=2, column=1, value=f"Total Holidays: {holidays.count()}")
-            ws.cell(row=2, column=1).font = Font(bold=True)
-            ws.merge_cells(f'A2:{get_column_letter(len(headers))}2')
-    
-    # Create response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    filename = f'public_holidays_all_countries_{year_range}.xlsx'
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    # Save workbook to response
-    wb.save(response)
-    
-    return response
+    if request.GET.get('background'):
+        job = JobQueueService.enqueue(
+            'export_public_holidays',
+            {'return_url': reverse('employees:public_holidays')},
+            user=request.user,
+            label='Public holiday export',
+        )
+        return redirect('employees:background_job_detail', pk=job.pk)
+
+    wb, filename = build_public_holidays_workbook()
+    return xlsx_response(wb, filename)
 
 @login_required
 def download_public_holiday_sample_csv(request):
@@ -348,69 +211,15 @@ def import_public_holidays_csv(request):
     if request.method == 'POST' and request.FILES.get('csv_file'):
         csv_file = request.FILES['csv_file']
 
-        if not csv_file.name.endswith('.csv'):
-            messages.error(request, 'Please upload a valid CSV file.')
+        if not csv_file.name.lower().endswith(IMPORT_EXTENSIONS):
+            messages.error(request, 'Please upload a valid CSV or Excel (.xlsx) file.')
             return redirect('employees:public_holidays')
 
-        try:
-            # Read CSV file
-            file_data = TextIOWrapper(csv_file.file, encoding='utf-8')
-            csv_reader = csv.DictReader(file_data)
-
-            success_count = 0
-            error_count = 0
-            errors = []
+        # Rows are processed by the job worker; the job page polls for progress
+        job = enqueue_upload(request, 'import_public_holidays_csv', csv_file, 'Public holiday import', reverse('employees:public_holidays'))
+        return redirect('employees:background_job_detail', pk=job.pk)
 
-            with transaction.atomic():
-                for row_num, row in enumerate(csv_reader, start=2):
-                    try:
-                        # Parse date
-                        date_str = row.get('Date', '').strip()
-                        if not date_str:
-                            raise ValueError("Date is required")
-
-                        holiday_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-
-                        # Get day name from date
-                        day_name = holiday_date.strftime('%A')
-
-                        # Parse is_active
-                        is_active_str = row.get('Is Active', 'Yes').strip().lower()
-                        is_active = is_active_str in ['yes', 'true', '1', 'active']
-
-                        # Create or update holiday
-                        holiday, created = PublicHoliday.objects.update_or_create(
-                            date=holiday_date,
-                            defaults={
-                                'name': row.get('Name', '').strip(),
-                                'day': day_name,
-                                'year': int(row.get('Year', holiday_date.year)),
-                                'is_active': is_active
-                            }
-                        )
-
-                        success_count += 1
-
-                    except Exception as e:
-                        error_count += 1
-                        errors.append(f"Row {row_num}: {str(e)}")
-
-            # Show results
-            if success_count > 0:
-                messages.success(request, f'Successfully imported {success_count} public holiday(s).')
-
-            if error_count > 0:
-                error_msg = f'Failed to import {error_count} holiday(s). Errors: ' + '; '.join(errors[:5])
-                if len(errors) > 5:
-                    error_msg += f' ... and {len(errors) - 5} more errors.'
-                messages.error(request, error_msg)
-
-        except Exception as e:
-            messages.error(request, f'Error processing CSV file: {str(e)}')
-
-        return redirect('employees:public_holidays')
-
-    return render(request, 'employees/import_csv.html', {'model_name': 'Public Holiday'})
+    return render(request, 'employees/import_csv.html', {'model_name': 'Public Holiday', 'accept': ','.join(IMPORT_EXTENSIONS)})
 
 #     ====== JOB DESCRIPTION CSV EXPORT/IMPORT     ======
 
@@ -496,98 +305,12 @@ def import_job_descriptions_csv(request):
     if request.method == 'POST' and request.FILES.get('csv_file'):
         csv_file = request.FILES['csv_file']
 
-        if not csv_file.name.endswith('.csv'):
-            messages.error(request, 'Please upload a valid CSV file.')
+        if not csv_file.name.lower().endswith(IMPORT_EXTENSIONS):
+            messages.error(request, 'Please upload a valid CSV or Excel (.xlsx) file.')
             return redirect('employees:job_list')
 
-        try:
-            # Read CSV file
-            file_data = TextIOWrapper(csv_file.file, encoding='utf-8')
-            csv_reader = csv.DictReader(file_data)
-
-            success_count = 0
-            error_count = 0
-            errors = []
-
-            with transaction.atomic():
-                for row_num, row in enumerate(csv_reader, start=2):
-                    try:
-                        # Get or create department
-                        dept_name = row.get('Department', '').strip()
-                        if not dept_name:
-                            raise ValueError("Department is required")
-
-                        department, _ = Department.objects.get_or_create(
-                            name=dept_name,
-                            defaults={'description': f'{dept_name} Department'}
-                        )
-
-                        # Get or create designation
-                        desig_name = row.get('Designation', '').strip()
-                        if not desig_name:
-                            raise ValueError("Designation is required")
-
-                        designation, _ = Designation.objects.get_or_create(
-                            name=desig_name,
-                            department=department,
-                            defaults={'description': f'{desig_name} Position'}
-                        )
-
-                        # Parse dates
-                        application_deadline = None
-                        deadline_str = row.get('Application Deadline', '').strip()
-                        if deadline_str:
-                            application_deadline = datetime.strptime(deadline_str, '%Y-%m-%d').date()
-
-                        # Parse boolean fields
-
-                        # Parse salary
-                        min_salary = None
-                        max_salary = None
-                        if row.get('Min Salary', '').strip():
-                            min_salary = Decimal(row.get('Min Salary', '').strip())
-                        if row.get('Max Salary', '').strip():
-                            max_salary = Decimal(row.get('Max Salary', '').strip())
-
-                        # Create job description
-                        job = JobDescription.objects.create(
-                            title=row.get('Title', '').strip(),
-                            department=department,
-                            designation=designation,
-                            employment_type=row.get('Employment Type', 'full_time').strip(),
-                            experience_level=row.get('Experience Level', 'fresher').strip(),
-                            required_qualifications=row.get('Required Qualifications', '').strip(),
-                            skills_requirements=row.get('Skills & Requirements', '').strip(),
-                            min_salary=min_salary,
-                            max_salary=max_salary,
-                            currency=row.get('Currency', 'INR').strip(),
-                            location=row.get('Location', '').strip(),
-                            work_mode=row.get('Work Mode', 'Office').strip(),
-                            number_of_vacancies=int(row.get('Number of Vacancies', 1) or 1),
-                            application_deadline=application_deadline,
-                            status=row.get('Status', 'draft').strip(),
-                            posted_by=request.user
-                        )
-
-                        success_count += 1
-
-                    except Exception as e:
-                        error_count += 1
-                        errors.append(f"Row {row_num}: {str(e)}")
-
-            # Show results
-            if success_count > 0:
-                messages.success(request, f'Successfully imported {success_count} job description(s).')
-
-            if error_count > 0:
-                error_msg = f'Failed to import {error_count} job(s). Errors: ' + '; '.join(errors[:5])
-                if len(errors) > 5:
-                    error_msg += f' ... and {len(errors) - 5} more errors.'
-                messages.error(request, error_msg)
-
-        except Exception as e:
-            messages.error(request, f'Error processing CSV file: {str(e)}')
-
-        return redirect('employees:job_list')
-
-    return render(request, 'employees/import_csv.html', {'model_name': 'Job Description'})
+        # Rows are processed by the job worker; the job page polls for progress
+        job = enqueue_upload(request, 'import_job_descriptions_csv', csv_file, 'Job description import', reverse('employees:job_list'))
+        return redirect('employees:background_job_detail', pk=job.pk)
+
+    return render(request, 'employees/import_csv.html', {'model_name': 'Job Description', 'accept': ','.join(IMPORT_EXTENSIONS)})
@@ -8,10 +8,14 @@ from django.core.paginator import Paginator
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.utils import timezone
+from datetime import datetime, timedelta
 from django.contrib import messages
 from .models_job import JobDescription, JobApplication, InterviewSchedule
 from .models import Department, Designation, Employee
 from .forms_job import JobDescriptionForm, JobApplicationForm, InterviewScheduleForm, JobSearchForm, CandidateSearchForm
+from .recruitment_stats import RecruitmentFunnelService
+from .resume_index import ResumeIndexService
+from .interview_availability import InterviewAvailabilityService, InterviewConflict
 
 class JobDescriptionListView(LoginRequiredMixin, ListView):
     model = JobDescription
@@ -144,7 +148,8 @@ class JobApplicationListView(LoginRequiredMixin, ListView):
             queryset = queryset.filter(
                 Q(candidate_name__icontains=search) |
                 Q(email__icontains=search) |
-                Q(current_organization__icontains=search)
+                Q(current_organization__icontains=search) |
+                Q(pk__in=ResumeIndexService.matching_application_ids(search))
             )
 
         # Filter by status
@@ -273,7 +278,8 @@ class CandidateTrackerView(LoginRequiredMixin, ListView):
                 Q(candidate_name__icontains=search) |
                 Q(email__icontains=search) |
                 Q(phone_number__icontains=search) |
-                Q(current_organization__icontains=search)
+                Q(current_organization__icontains=search) |
+                Q(pk__in=ResumeIndexService.matching_application_ids(search))
             )
 
         return queryset.order_by('-created_at')
@@ -281,44 +287,31 @@ class CandidateTrackerView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        # Get all designations with active job applications count
-        designations = Designation.objects.annotate(
-            active_applications_count=Count(
-                'job_descriptions__applications',
-                filter=Q(
-                    job_descriptions__applications__status__in=[
-                        'received', 'under_review', 'shortlisted',
-                        'interview_scheduled', 'interviewed', 'offer_extended'
-                    ]
-                )
-            )
-        ).filter(active_applications_count__gt=0).order_by('name')
-
-        context['designations'] = designations
+        funnel = RecruitmentFunnelService.get_snapshot()
+        context['designations'] = funnel['designations']
         context['selected_designation_id'] = self.request.GET.get('designation', '')
 
         # Get selected designation details
         if context['selected_designation_id']:
             try:
                 context['selected_designation'] = Designation.objects.get(id=context['selected_designation_id'])
-            except Designation.DoesNotExist:
+            except (Designation.DoesNotExist, ValueError):
                 context['selected_designation'] = None
 
         # Statistics
-        context['total_candidates'] = JobApplication.objects.filter(
-            status__in=['received', 'under_review', 'shortlisted', 'interview_scheduled', 'interviewed', 'offer_extended']
-        ).count()
-
-        context['received_count'] = JobApplication.objects.filter(status='received').count()
-        context['under_review_count'] = JobApplication.objects.filter(status='under_review').count()
-        context['shortlisted_count'] = JobApplication.objects.filter(status='shortlisted').count()
-        context['interview_count'] = JobApplication.objects.filter(
-            status__in=['interview_scheduled', 'interviewed']
-        ).count()
-        context['offered_count'] = JobApplication.objects.filter(status='offer_extended').count()
+        context['total_candidates'] = funnel['total_candidates']
+        for name in RecruitmentFunnelService.STATUS_BUCKETS:
+            context[name] = funnel[name]
+        context['stage_metrics'] = funnel['stage_metrics']
 
         return context
 
+@login_required
+def candidate_tracker_stats(request):
+    """Funnel counts and time-to-stage metrics for the tracker's auto-refresh"""
+    funnel = RecruitmentFunnelService.get_snapshot()
+    return JsonResponse({'success': True, **funnel})
+
 class CurrentOpeningsView(LoginRequiredMixin, ListView):
     """Active job openings listing"""
     model = JobDescription
@@ -370,9 +363,13 @@ def add_interview(request, application_id):
         if form.is_valid():
             interview = form.save(commit=False)
             interview.application = application
-            interview.save()
-            messages.success(request, f'Interview round added successfully for {application.candidate_name}.')
-            return redirect('employees:candidate_detail', pk=application_id)
+            try:
+                InterviewAvailabilityService.save_interview(interview)
+            except InterviewConflict as e:
+                form.add_error(None, str(e))
+            else:
+                messages.success(request, f'Interview round added successfully for {application.candidate_name}.')
+                return redirect('employees:candidate_detail', pk=application_id)
     else:
         form = InterviewScheduleForm(initial={'application': application})
 
@@ -396,9 +393,13 @@ def edit_interview(request, interview_id):
     if request.method == 'POST':
         form = InterviewScheduleForm(request.POST, instance=interview)
         if form.is_valid():
-            form.save()
-            messages.success(request, 'Interview round updated successfully.')
-            return redirect('employees:candidate_detail', pk=interview.application.pk)
+            try:
+                InterviewAvailabilityService.save_interview(form.save(commit=False))
+            except InterviewConflict as e:
+                form.add_error(None, str(e))
+            else:
+                messages.success(request, 'Interview round updated successfully.')
+                return redirect('employees:candidate_detail', pk=interview.application.pk)
     else:
         form = InterviewScheduleForm(instance=interview)
 
@@ -410,6 +411,42 @@ def edit_interview(request, interview_id):
     }
     return render(request, 'jobs/interview_form.html', context)
 
+@login_required
+def interviewer_free_slots(request):
+    """
+    Free interview slots for one or more interviewers.
+
+    Query params: interviewers (comma-separated employee ids), start and end
+    (YYYY-MM-DD, default today and a week later), duration (minutes), step
+    (minutes) and weekends=1 to include Saturdays and Sundays.
+    """
+    if not request.user.is_superuser and not request.user.is_staff:
+        return JsonResponse({'success': False, 'message': 'Permission denied'}, status=403)
+
+    try:
+        employee_ids = [int(pk) for pk in request.GET.get('interviewers', '').split(',') if pk.strip()]
+        today = timezone.localdate()
+        start = request.GET.get('start')
+        end = request.GET.get('end')
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else today
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else start_date + timedelta(days=7)
+        duration = int(request.GET.get('duration') or InterviewAvailabilityService.DEFAULT_DURATION)
+        step = int(request.GET.get('step') or 30)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid parameters'}, status=400)
+
+    if not employee_ids:
+        return JsonResponse({'success': False, 'message': 'No interviewers given'}, status=400)
+    if end_date < start_date or not (15 <= duration <= 8 * 60) or not (5 <= step <= 120):
+        return JsonResponse({'success': False, 'message': 'Invalid date range, duration or step'}, status=400)
+
+    slots = InterviewAvailabilityService.free_slots(
+        employee_ids, start_date, end_date,
+        duration_minutes=duration, step_minutes=step,
+        include_weekends=request.GET.get('weekends') == '1',
+    )
+    return JsonResponse({'success': True, 'duration': duration, **slots})
+
 @login_required
 def delete_interview(request, interview_id):
     """Delete interview round"""
@@ -10,12 +10,37 @@ from django.utils import timezone
 
 from .models_performance import PerformanceEvaluation, EvaluationAuditLog
 
+from .evaluation_scheduler import EvaluationSchedulerService
+
+from .org_hierarchy import OrgHierarchyService
+
+from .identity import get_identity
+
 from .models import Department
 
 from django.db.models import Q
 
 
 
+def evaluation_scope(request):
+    """
+    Q restricting evaluations to what the user may see on the dashboards,
+    or None for unrestricted roles. Memoized on the request, since the list
+    and its bucket counts both use it.
+    """
+    if not hasattr(request, '_evaluation_scope'):
+        identity = get_identity(request)
+        scope = None
+        if identity.has_profile:
+            if identity.role == 'employee':
+                scope = Q(employee_id=identity.employee_id)
+            elif identity.role == 'manager':
+                # Evaluations for their team or where they are assigned manager
+                scope = Q(assigned_manager=request.user) | OrgHierarchyService.team_filter(identity.employee_id)
+        request._evaluation_scope = scope
+    return request._evaluation_scope
+
+
 class TraineeInternEvaluationDashboardView(LoginRequiredMixin, ListView):
     model = PerformanceEvaluation
     template_name = 'performance/trainee_intern_dashboard.html'
@@ -39,7 +64,7 @@ class TraineeInternEvaluationDashboardView(LoginRequiredMixin, ListView):
             queryset = queryset.filter(employee__department_id=department_id)
         if status:
             if status == 'overdue':
-                queryset = queryset.filter(status='pending', due_date__lt=timezone.now().date())
+                queryset = queryset.filter(EvaluationSchedulerService.overdue_filter())
             else:
                 queryset = queryset.filter(status=status)
         if cycle:
@@ -50,13 +75,9 @@ class TraineeInternEvaluationDashboardView(LoginRequiredMixin, ListView):
             queryset = queryset.filter(period_end__lte=date_to)
 
         # Role-based access control
-        user = self.request.user
-        if hasattr(user, 'profile'):
-            if user.profile.role == 'employee':
-                queryset = queryset.filter(employee=user.profile.employee)
-            elif user.profile.role == 'manager':
-                # Show evaluations for their team or where they are assigned manager
-                queryset = queryset.filter(Q(assigned_manager=user) | Q(employee__department__head=user.profile.employee))
+        scope = evaluation_scope(self.request)
+        if scope is not None:
+            queryset = queryset.filter(scope)
         
         return queryset
 
@@ -64,6 +85,9 @@ class TraineeInternEvaluationDashboardView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['departments'] = Department.objects.all()
         context['status_choices'] = PerformanceEvaluation.STATUS_CHOICES
+        context['due_buckets'] = EvaluationSchedulerService.get_buckets(
+            category='trainee_intern', scope=evaluation_scope(self.request)
+        )
         context['evaluation_type'] = 'Trainee/Intern'
         return context
 
@@ -91,7 +115,7 @@ class ProbationEvaluationDashboardView(LoginRequiredMixin, ListView):
             queryset = queryset.filter(employee__department_id=department_id)
         if status:
             if status == 'overdue':
-                queryset = queryset.filter(status='pending', due_date__lt=timezone.now().date())
+                queryset = queryset.filter(EvaluationSchedulerService.overdue_filter())
             else:
                 queryset = queryset.filter(status=status)
         if cycle:
@@ -102,13 +126,9 @@ class ProbationEvaluationDashboardView(LoginRequiredMixin, ListView):
             queryset = queryset.filter(period_end__lte=date_to)
 
         # Role-based access control
-        user = self.request.user
-        if hasattr(user, 'profile'):
-            if user.profile.role == 'employee':
-                queryset = queryset.filter(employee=user.profile.employee)
-            elif user.profile.role == 'manager':
-                # Show evaluations for their team or where they are assigned manager
-                queryset = queryset.filter(Q(assigned_manager=user) | Q(employee__department__head=user.profile.employee))
+        scope = evaluation_scope(self.request)
+        if scope is not None:
+            queryset = queryset.filter(scope)
         
         return queryset
 
@@ -116,6 +136,9 @@ class ProbationEvaluationDashboardView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['departments'] = Department.objects.all()
         context['status_choices'] = PerformanceEvaluation.STATUS_CHOICES
+        context['due_buckets'] = EvaluationSchedulerService.get_buckets(
+            category='probation', scope=evaluation_scope(self.request)
+        )
         context['evaluation_type'] = 'Probation'
         return context
 
@@ -166,7 +189,7 @@ class EvaluationDashboardView(LoginRequiredMixin, ListView):
 
             if status == 'overdue':
 
-                queryset = queryset.filter(status='pending', due_date__lt=timezone.now().date())
+                queryset = queryset.filter(EvaluationSchedulerService.overdue_filter())
 
             else:
 
@@ -188,19 +211,11 @@ class EvaluationDashboardView(LoginRequiredMixin, ListView):
 
         # Role-based access control
 
-        user = self.request.user
-
-        if hasattr(user, 'profile'):
-
-            if user.profile.role == 'employee':
+        scope = evaluation_scope(self.request)
 
-                queryset = queryset.filter(employee=user.profile.employee)
+        if scope is not None:
 
-            elif user.profile.role == 'manager':
-
-                # Show evaluations for their team or where they are assigned manager
-
-                queryset = queryset.filter(Q(assigned_manager=user) | Q(employee__department__head=user.profile.employee))
+            queryset = queryset.filter(scope)
 
         
 
@@ -215,6 +230,7 @@ class EvaluationDashboardView(LoginRequiredMixin, ListView):
         context['departments'] = Department.objects.all()
 
         context['status_choices'] = PerformanceEvaluation.STATUS_CHOICES
+        context['due_buckets'] = EvaluationSchedulerService.get_buckets(scope=evaluation_scope(self.request))
 
         return context
 
@@ -246,13 +262,15 @@ class EvaluationDetailView(LoginRequiredMixin, DetailView):
 
         if eval_obj.status in ['pending', 'rejected']:
 
-            if hasattr(user, 'profile'):
+            identity = get_identity(self.request)
 
-                if user.profile.role in ['admin', 'hr', 'director']:
+            if identity.has_profile:
+
+                if identity.role in ['admin', 'hr', 'director']:
 
                     can_edit = True
 
-                elif user.profile.role == 'manager' and eval_obj.assigned_manager == user:
+                elif identity.role == 'manager' and eval_obj.assigned_manager == user:
 
                     can_edit = True
 
@@ -278,13 +296,15 @@ def submit_evaluation(request, pk):
 
         user = request.user
 
-        if hasattr(user, 'profile'):
+        identity = get_identity(request)
+
+        if identity.has_profile:
 
-            if user.profile.role == 'manager':
+            if identity.role == 'manager':
 
                 evaluation.status = 'submitted_manager'
 
-            elif user.profile.role in ['hr', 'admin']:
+            elif identity.role in ['hr', 'admin']:
 
                 evaluation.status = 'submitted_hr'
 
@@ -328,7 +348,7 @@ def approve_evaluation(request, pk):
 
     user = request.user
 
-    if not (hasattr(user, 'profile') and user.profile.role in ['admin', 'hr', 'director']):
+    if get_identity(request).role not in ['admin', 'hr', 'director']:
 
         messages.error(request, "Only HR or Admin can approve evaluations.")
 
@@ -370,7 +390,7 @@ def reject_evaluation(request, pk):
 
     user = request.user
 
-    if not (hasattr(user, 'profile') and user.profile.role in ['admin', 'hr', 'director']):
+    if get_identity(request).role not in ['admin', 'hr', 'director']:
 
         messages.error(request, "Only HR or Admin can reject evaluations.")
 
@@ -4,15 +4,12 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.views.generic import DetailView, ListView, FormView
 from django.http import HttpResponse, HttpResponseForbidden, FileResponse
-from django.template.loader import render_to_string
-from django.core.mail import EmailMultiAlternatives
-from django.conf import settings
+from django.urls import reverse
 from .models import Employee, EmployeeIncrement, SalarySlip
 from .forms import PaySlipGenerationForm
-import os
+from .job_queue import JobQueueService
+from .payslip_service import PayslipService
 from datetime import date
-from xhtml2pdf import pisa
-from io import BytesIO
 
 class SalaryDetailsView(LoginRequiredMixin, DetailView):
     model = Employee
@@ -94,79 +91,33 @@ class GeneratePaySlipView(LoginRequiredMixin, FormView):
             # Get context for PDF rendering
             month_name = dict(form.fields['month'].choices).get(int(month))
 
-            context = {
-                'employee': employee,
-                'salary': employee.salary_components,
-                'month_name': month_name,
-                'year': year,
-                'current_date': date.today(),
-            }
-
-            html = render_to_string('employees/payslip_pdf.html', context)
-            result = BytesIO()
-            pdf = pisa.pisaDocument(BytesIO(html.encode("UTF-8")), result)
-
-            if not pdf.err:
-                pdf_content = result.getvalue()
-
-                action = request.POST.get('action', 'email')
-
-                if action == 'download':
-                    response = HttpResponse(pdf_content, content_type='application/pdf')
-                    response['Content-Disposition'] = f'attachment; filename="payslip_{month_name}_{year}.pdf"'
-                    return response
-
-                try:
-                    # Generate email with HTML and plain text versions
-                    subject = f"Payslip for {month_name} {year} - {employee.full_name}"
-                    
-                    # Email context
-                    email_context = {
-                        'employee_name': employee.full_name,
-                        'employee_code': employee.employee_code,
-                        'department': employee.department.name,
-                        'designation': employee.designation.name,
-                        'month_name': month_name,
-                        'year': year,
-                    }
-                    
-                    # Save PDF to database and get download URL
-                    from django.core.files.base import ContentFile
-                    slip, created = SalarySlip.objects.update_or_create(
-                        employee=employee,
-                        month=month,
-                        year=year,
-                        defaults={'is_emailed': True}
-                    )
-                    
-                    # Save PDF file
-                    pdf_filename = f'payslip_{employee.employee_code}_{month_name}_{year}.pdf'
-                    slip.pdf_file.save(pdf_filename, ContentFile(pdf_content), save=True)
-                    
-                    # Add download URL to email context
-                    download_url = request.build_absolute_uri(slip.get_download_url())
-                    email_context['download_url'] = download_url
-                    
-                    # Render both HTML and plain text versions
-                    html_body = render_to_string('emails/payslip_email.html', email_context)
-                    plain_body = render_to_string('emails/payslip_email.txt', email_context)
-
-                    # Create email with both versions
-                    email = EmailMultiAlternatives(
-                        subject,
-                        plain_body,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [employee.official_email]
-                    )
-                    email.attach_alternative(html_body, "text/html")
-                    email.attach(f'payslip_{month_name}_{year}.pdf', pdf_content, 'application/pdf')
-                    email.send()
-
-                    messages.success(request, f"Payslip for {month_name} {year} has been sent to your email.")
-                except Exception as e:
-                    messages.error(request, f"Error sending email: {str(e)}")
-            else:
-                messages.error(request, "Error generating PDF payslip.")
+            action = request.POST.get('action', 'email')
+
+            if action == 'download':
+                pdf_content = PayslipService.render_pdf(employee, month_name, year)
+                if pdf_content is None:
+                    messages.error(request, "Error generating PDF payslip.")
+                    return redirect('employees:salary_details', pk=employee.id)
+                response = HttpResponse(pdf_content, content_type='application/pdf')
+                response['Content-Disposition'] = f'attachment; filename="payslip_{month_name}_{year}.pdf"'
+                return response
+
+            # Rendering, storing and mailing run on the job worker
+            job = JobQueueService.enqueue(
+                'email_payslip',
+                {
+                    'employee_id': employee.pk,
+                    'month': month,
+                    'year': year,
+                    'month_name': month_name,
+                    'base_url': request.build_absolute_uri('/'),
+                    'return_url': reverse('employees:salary_details', args=[employee.pk]),
+                },
+                user=request.user,
+                label=f"Payslip for {month_name} {year} - {employee.full_name}",
+            )
+            messages.info(request, f"Your payslip for {month_name} {year} is being generated and will be e-mailed shortly.")
+            return redirect('employees:background_job_detail', pk=job.pk)
         else:
             for field, errors in form.errors.items():
                 for error in errors:
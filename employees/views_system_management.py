@@ -8,14 +8,24 @@ from django.views.decorators.http import require_POST
 
 from django.db.models import Count, Q
 
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse
 
 from django.utils import timezone
 
 from .models import SystemDetail, Employee, CPUDevice, ScreenDevice, KeyboardDevice, MouseDevice, HeadphoneDevice, ExtenderDevice
 
+from .inventory_stats import InventoryStatsService
+
+from .inventory_index import InventoryIndexService
+
+from .allocation_service import DeviceAllocationService
+
 import csv
 import json
+from datetime import datetime
+
+from .exports import stream_xlsx, wants_xlsx
+from .streaming import stream_csv, stream_json_list
 
 
 
@@ -27,110 +37,8 @@ def system_management(request):
         messages.error(request, 'You do not have permission to access system management.')
         return redirect('employees:dashboard')
     
-    # Get system statistics from SystemDetail
-    total_systems = SystemDetail.objects.count()
-    available_systems = SystemDetail.objects.filter(employee__isnull=True).count()
-    allocated_systems = SystemDetail.objects.filter(employee__isnull=False, is_active=True).count()
-    inactive_systems = SystemDetail.objects.filter(is_active=False).count()
-    
-    # System type statistics
-    windows_systems = SystemDetail.objects.filter(system_type='windows').count()
-    mac_systems = SystemDetail.objects.filter(system_type='mac').count()
-    
-    # MAC Address statistics (only for MAC systems)
-    total_mac_addresses = SystemDetail.objects.filter(
-        system_type='mac',
-        macaddress__isnull=False
-    ).exclude(macaddress='').count()
-    
-    allocated_mac_addresses = SystemDetail.objects.filter(
-        system_type='mac',
-        macaddress__isnull=False, 
-        employee__isnull=False,
-        is_active=True
-    ).exclude(macaddress='').count()
-    
-    available_mac_addresses = SystemDetail.objects.filter(
-        system_type='mac',
-        employee__isnull=False,
-        is_active=False
-    ).count()
-    
-    # Windows systems allocation statistics
-    allocated_windows_systems = SystemDetail.objects.filter(
-        system_type='windows',
-        employee__isnull=False,
-        is_active=True
-    ).count()
-    available_windows_systems = SystemDetail.objects.filter(
-        system_type='windows',
-        employee__isnull=False,
-        is_active=False
-    ).count()
-    
-    # Device inventory statistics
-    total_cpus = CPUDevice.objects.count()
-    allocated_cpus = CPUDevice.objects.filter(status='allocated').count()
-    available_cpus = CPUDevice.objects.filter(status='available').count()
-    
-    total_screens = ScreenDevice.objects.count()
-    allocated_screens = ScreenDevice.objects.filter(status='allocated').count()
-    available_screens = ScreenDevice.objects.filter(status='available').count()
-    
-    total_keyboards = KeyboardDevice.objects.count()
-    allocated_keyboards = KeyboardDevice.objects.filter(status='allocated').count()
-    available_keyboards = KeyboardDevice.objects.filter(status='available').count()
-    
-    total_mice = MouseDevice.objects.count()
-    allocated_mice = MouseDevice.objects.filter(status='allocated').count()
-    available_mice = MouseDevice.objects.filter(status='available').count()
-    
-    total_headphones = HeadphoneDevice.objects.count()
-    allocated_headphones = HeadphoneDevice.objects.filter(status='allocated').count()
-    available_headphones = HeadphoneDevice.objects.filter(status='available').count()
-    
-    total_extenders = ExtenderDevice.objects.count()
-    allocated_extenders = ExtenderDevice.objects.filter(status='allocated').count()
-    available_extenders = ExtenderDevice.objects.filter(status='available').count()
-    
-    context = {
-        'total_systems': total_systems,
-        'available_systems': available_systems,
-        'allocated_systems': allocated_systems,
-        'inactive_systems': inactive_systems,
-        'windows_systems': windows_systems,
-        'mac_systems': mac_systems,
-        'total_mac_addresses': total_mac_addresses,
-        'allocated_mac_addresses': allocated_mac_addresses,
-        'available_mac_addresses': available_mac_addresses,
-        'allocated_windows_systems': allocated_windows_systems,
-        'available_windows_systems': available_windows_systems,
-        
-        # Device inventory statistics
-        'total_cpus': total_cpus,
-        'allocated_cpus': allocated_cpus,
-        'available_cpus': available_cpus,
-        
-        'total_screens': total_screens,
-        'allocated_screens': allocated_screens,
-        'available_screens': available_screens,
-        
-        'total_keyboards': total_keyboards,
-        'allocated_keyboards': allocated_keyboards,
-        'available_keyboards': available_keyboards,
-        
-        'total_mice': total_mice,
-        'allocated_mice': allocated_mice,
-        'available_mice': available_mice,
-        
-        'total_headphones': total_headphones,
-        'allocated_headphones': allocated_headphones,
-        'available_headphones': available_headphones,
-        
-        'total_extenders': total_extenders,
-        'allocated_extenders': allocated_extenders,
-        'available_extenders': available_extenders,
-    }
+    # Counters come from a cached two-query snapshot (see inventory_stats.py)
+    context = dict(InventoryStatsService.get_snapshot())
     
     return render(request, 'employees/system_management.html', context)
 
@@ -138,6 +46,21 @@ def system_management(request):
 
 
 
+@login_required
+def system_management_stats(request):
+    """
+    API returning the inventory statistics snapshot used to auto-refresh the
+    system management page counters
+    """
+    if not request.user.is_staff and not request.user.is_superuser:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    return JsonResponse({'success': True, 'stats': InventoryStatsService.get_snapshot()})
+
+
+
+
+
 @login_required
 
 def get_system_details(request):
@@ -214,154 +137,128 @@ def get_employees_for_assignment(request):
 
 
 
-@login_required
-
-def get_mac_systems_assignments(request):
-
+def _filter_systems(queryset, params):
     """
+    Apply the optional report filters shared by the system assignment
+    endpoints and exports.
 
-    API to get MAC system assignments (only system_type='mac') with employee details
-
+    Supported parameters: department (id or name of the system's
+    department), status (assigned/pending), allocated_from / allocated_to
+    (YYYY-MM-DD). Every system belongs to an employee, so there is no
+    unassigned status.
     """
+    department = params.get('department', '').strip()
+    if department:
+        if department.isdigit():
+            queryset = queryset.filter(department_id=int(department))
+        else:
+            queryset = queryset.filter(department__name__iexact=department)
+
+    status = params.get('status', '').strip()
+    if status == 'assigned':
+        queryset = queryset.filter(is_active=True)
+    elif status == 'pending':
+        queryset = queryset.filter(is_active=False)
+
+    for param, lookup in (('allocated_from', 'allocated_date__gte'), ('allocated_to', 'allocated_date__lte')):
+        value = params.get(param, '').strip()
+        if value:
+            queryset = queryset.filter(**{lookup: datetime.strptime(value, '%Y-%m-%d').date()})
+
+    return queryset
+
+
+def _mac_systems(params):
+    """MAC systems with a recorded MAC address, filtered by report params"""
+    queryset = SystemDetail.objects.filter(
+        system_type='mac',
+        macaddress__isnull=False
+    ).exclude(macaddress='')
+    return _filter_systems(queryset, params)
 
-    if not request.user.is_staff and not request.user.is_superuser:
-
-        return JsonResponse({'error': 'Permission denied'}, status=403)
-
-    
-
-    try:
-
-        # Get only MAC systems (system_type='mac')
-
-        mac_systems = SystemDetail.objects.filter(
-
-            system_type='mac',
-
-            macaddress__isnull=False
-
-        ).exclude(macaddress='').select_related('employee', 'employee__department')
-
-        
-
-        assignments_data = []
-
-        for system in mac_systems:
-
-            assignments_data.append({
-
-                'id': system.id,
-
-                'mac_address': system.macaddress,
 
-                'system_name': f"{system.cpu_company_name} - {system.cpu_label_no}",
+def _windows_systems(params):
+    """Windows systems, filtered by report params"""
+    return _filter_systems(SystemDetail.objects.filter(system_type='windows'), params)
 
-                'system_type': system.get_system_type_display(),
 
-                'employee_id': system.employee.id if system.employee else None,
+# Columns fetched for assignment reports; only these are read from the database.
+# The department is the system's own, the one _filter_systems filters on.
+ASSIGNMENT_COLUMNS = (
+    'id', 'macaddress', 'cpu_company_name', 'cpu_label_no', 'system_type', 'is_active',
+    'employee_id', 'employee__full_name', 'employee__employee_code', 'department__name',
+)
 
-                'employee_name': system.employee.full_name if system.employee else 'Unassigned',
 
-                'employee_code': system.employee.employee_code if system.employee else 'N/A',
+def _assignment_rows(queryset):
+    """Lazily yield assignment dicts keyed by ASSIGNMENT_COLUMNS"""
+    for values in queryset.values_list(*ASSIGNMENT_COLUMNS).iterator(chunk_size=2000):
+        yield dict(zip(ASSIGNMENT_COLUMNS, values))
 
-                'department': system.employee.department.name if system.employee and system.employee.department else 'N/A',
-
-                'is_active': system.is_active,
 
-            })
+SYSTEM_TYPE_LABELS = dict(SystemDetail._meta.get_field('system_type').choices)
 
-        
-
-        return JsonResponse({
-
-            'success': True,
-
-            'mac_assignments': assignments_data
-
-        })
 
+@login_required
+def get_mac_systems_assignments(request):
+    """
+    API to get MAC system assignments (only system_type='mac') with employee details.
+    Accepts the report filters described in _filter_systems and streams the result.
+    """
+    if not request.user.is_staff and not request.user.is_superuser:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
     
-
-    except Exception as e:
-
+    try:
+        mac_systems = _mac_systems(request.GET)
+    except ValueError as e:
         return JsonResponse({'error': str(e)}, status=400)
-
-
-
+    
+    assignments = (
+        {
+            'id': row['id'],
+            'mac_address': row['macaddress'],
+            'system_name': f"{row['cpu_company_name']} - {row['cpu_label_no']}",
+            'system_type': SYSTEM_TYPE_LABELS.get(row['system_type'], row['system_type']),
+            'employee_id': row['employee_id'],
+            'employee_name': row['employee__full_name'] or 'Unassigned',
+            'employee_code': row['employee__employee_code'] or 'N/A',
+            'department': row['department__name'] or 'N/A',
+            'is_active': row['is_active'],
+        }
+        for row in _assignment_rows(mac_systems)
+    )
+    return stream_json_list('mac_assignments', assignments)
 
 
 @login_required
-
 def get_windows_systems_assignments(request):
-
     """
-
-    API to get Windows system assignments with employee details
-
+    API to get Windows system assignments with employee details.
+    Accepts the report filters described in _filter_systems and streams the result.
     """
-
     if not request.user.is_staff and not request.user.is_superuser:
-
         return JsonResponse({'error': 'Permission denied'}, status=403)
-
     
-
     try:
-
-        # Filter for Windows systems
-
-        windows_systems = SystemDetail.objects.filter(
-
-            system_type='windows'
-
-        ).select_related('employee', 'employee__department')
-
-        
-
-        assignments_data = []
-
-        for system in windows_systems:
-
-            assignments_data.append({
-
-                'id': system.id,
-
-                'system_name': f"{system.cpu_company_name} - {system.cpu_label_no}",
-
-                'macaddress': system.macaddress if system.macaddress else 'N/A',
-
-                'employee_id': system.employee.id if system.employee else None,
-
-                'employee_name': system.employee.full_name if system.employee else 'Unassigned',
-
-                'employee_code': system.employee.employee_code if system.employee else 'N/A',
-
-                'department': system.employee.department.name if system.employee and system.employee.department else 'N/A',
-
-                'cpu_company_name': system.cpu_company_name,
-
-                'is_active': system.is_active,
-
-            })
-
-        
-
-        return JsonResponse({
-
-            'success': True,
-
-            'windows_assignments': assignments_data
-
-        })
-
-    
-
-    except Exception as e:
-
+        windows_systems = _windows_systems(request.GET)
+    except ValueError as e:
         return JsonResponse({'error': str(e)}, status=400)
-
-
-
+    
+    assignments = (
+        {
+            'id': row['id'],
+            'system_name': f"{row['cpu_company_name']} - {row['cpu_label_no']}",
+            'macaddress': row['macaddress'] or 'N/A',
+            'employee_id': row['employee_id'],
+            'employee_name': row['employee__full_name'] or 'Unassigned',
+            'employee_code': row['employee__employee_code'] or 'N/A',
+            'department': row['department__name'] or 'N/A',
+            'cpu_company_name': row['cpu_company_name'],
+            'is_active': row['is_active'],
+        }
+        for row in _assignment_rows(windows_systems)
+    )
+    return stream_json_list('windows_assignments', assignments)
 
 
 @login_required
@@ -394,19 +291,21 @@ def assign_system(request):
 
     try:
 
-        system = get_object_or_404(SystemDetail, pk=system_id)
-
         employee = get_object_or_404(Employee, pk=employee_id)
 
         
 
-        system.employee = employee
+        reassign = request.POST.get('reassign') == 'true'
 
-        system.is_active = True
+        
 
-        system.allocated_by = request.user
+        result = DeviceAllocationService.assign_system(system_id, employee, request.user, reassign=reassign)
 
-        system.save()
+        
+
+        if not result.success:
+
+            return JsonResponse({'error': result.message}, status=409)
 
         
 
@@ -414,7 +313,7 @@ def assign_system(request):
 
             'success': True, 
 
-            'message': f'System successfully assigned to {employee.full_name}'
+            'message': result.message
 
         })
 
@@ -429,141 +328,69 @@ def assign_system(request):
 
 
 @login_required
-
 def export_mac_systems_csv(request):
-
     """
-
-    Export MAC system assignments to CSV (only system_type='mac')
-
+    Export MAC system assignments to CSV, or Excel with ?format=xlsx (only system_type='mac').
+    Rows are streamed; accepts the report filters described in _filter_systems.
     """
-
     if not request.user.is_staff and not request.user.is_superuser:
-
         messages.error(request, 'You do not have permission to export data.')
-
         return redirect('employees:system_management')
-
     
-
-    # Create the HttpResponse object with CSV header
-
-    response = HttpResponse(content_type='text/csv')
-
-    response['Content-Disposition'] = 'attachment; filename="mac_systems_assignments.csv"'
-
-    
-
-    writer = csv.writer(response)
-
-    writer.writerow(['MAC Address', 'System Name', 'System Type', 'Employee Name', 'Employee Code', 'Department'])
-
-    
-
-    # Get only MAC systems (system_type='mac')
-
-    mac_systems = SystemDetail.objects.filter(
-
-        system_type='mac',
-
-        macaddress__isnull=False
-
-    ).exclude(macaddress='').select_related('employee', 'employee__department')
-
-    
-
-    for system in mac_systems:
-
-        writer.writerow([
-
-            system.macaddress,
-
-            f"{system.cpu_company_name} - {system.cpu_label_no}",
-
-            system.get_system_type_display(),
-
-            system.employee.full_name if system.employee else 'Unassigned',
-
-            system.employee.employee_code if system.employee else 'N/A',
-
-            system.employee.department.name if system.employee and system.employee.department else 'N/A',
-
-        ])
-
+    try:
+        mac_systems = _mac_systems(request.GET)
+    except ValueError as e:
+        messages.error(request, f'Invalid filter: {e}')
+        return redirect('employees:system_management')
     
-
-    return response
-
-
-
+    rows = (
+        [
+            row['macaddress'],
+            f"{row['cpu_company_name']} - {row['cpu_label_no']}",
+            SYSTEM_TYPE_LABELS.get(row['system_type'], row['system_type']),
+            row['employee__full_name'] or 'Unassigned',
+            row['employee__employee_code'] or 'N/A',
+            row['department__name'] or 'N/A',
+        ]
+        for row in _assignment_rows(mac_systems)
+    )
+    header = ['MAC Address', 'System Name', 'System Type', 'Employee Name', 'Employee Code', 'Department']
+    if wants_xlsx(request):
+        return stream_xlsx('mac_systems_assignments.xlsx', header, rows, sheet_title='MAC Systems')
+    return stream_csv('mac_systems_assignments.csv', header, rows)
 
 
 @login_required
-
 def export_windows_systems_csv(request):
-
     """
-
-    Export Windows system assignments to CSV
-
+    Export Windows system assignments to CSV, or Excel with ?format=xlsx.
+    Rows are streamed; accepts the report filters described in _filter_systems.
     """
-
     if not request.user.is_staff and not request.user.is_superuser:
-
         messages.error(request, 'You do not have permission to export data.')
-
         return redirect('employees:system_management')
-
     
-
-    # Create the HttpResponse object with CSV header
-
-    response = HttpResponse(content_type='text/csv')
-
-    response['Content-Disposition'] = 'attachment; filename="windows_systems_assignments.csv"'
-
-    
-
-    writer = csv.writer(response)
-
-    writer.writerow(['System Name', 'MAC Address', 'Employee Name', 'Employee Code', 'Department', 'CPU Company'])
-
-    
-
-    # Filter for Windows systems
-
-    windows_systems = SystemDetail.objects.filter(
-
-        system_type='windows'
-
-    ).select_related('employee', 'employee__department')
-
-    
-
-    for system in windows_systems:
-
-        writer.writerow([
-
-            f"{system.cpu_company_name} - {system.cpu_label_no}",
-
-            system.macaddress if system.macaddress else 'N/A',
-
-            system.employee.full_name if system.employee else 'Unassigned',
-
-            system.employee.employee_code if system.employee else 'N/A',
-
-            system.employee.department.name if system.employee and system.employee.department else 'N/A',
-
-            system.cpu_company_name,
-
-        ])
-
+    try:
+        windows_systems = _windows_systems(request.GET)
+    except ValueError as e:
+        messages.error(request, f'Invalid filter: {e}')
+        return redirect('employees:system_management')
     
-
-    return response
-
-
-
+    rows = (
+        [
+            f"{row['cpu_company_name']} - {row['cpu_label_no']}",
+            row['macaddress'] or 'N/A',
+            row['employee__full_name'] or 'Unassigned',
+            row['employee__employee_code'] or 'N/A',
+            row['department__name'] or 'N/A',
+            row['cpu_company_name'],
+        ]
+        for row in _assignment_rows(windows_systems)
+    )
+    header = ['System Name', 'MAC Address', 'Employee Name', 'Employee Code', 'Department', 'CPU Company']
+    if wants_xlsx(request):
+        return stream_xlsx('windows_systems_assignments.xlsx', header, rows, sheet_title='Windows Systems')
+    return stream_csv('windows_systems_assignments.csv', header, rows)
 
 
 @login_required
@@ -1161,3 +988,41 @@ def get_extender_systems(request):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
+
+
+@login_required
+def inventory_search(request):
+    """
+    API to search the unified inventory index across devices, systems and
+    peripherals in one query.
+
+    Query parameters: type, available (1/true), status, size, label, holder, team, q, limit
+    (team is a manager's employee id and matches assets held by their reports)
+    e.g. ?type=screen&available=1&size=27 or ?label=SCR-0042
+    """
+    if not request.user.is_staff and not request.user.is_superuser:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    
+    try:
+        size = request.GET.get('size')
+        holder = request.GET.get('holder')
+        team = request.GET.get('team')
+        assets = InventoryIndexService.search(
+            asset_type=request.GET.get('type') or None,
+            available_only=request.GET.get('available', '').lower() in ('1', 'true', 'yes'),
+            status=request.GET.get('status') or None,
+            size_inches=InventoryIndexService.parse_size(size) if size else None,
+            label_no=request.GET.get('label') or None,
+            holder_id=int(holder) if holder else None,
+            team_of=int(team) if team else None,
+            query=request.GET.get('q') or None,
+            limit=min(int(request.GET.get('limit', 100)), 500),
+        )
+        
+        return JsonResponse({
+            'success': True,
+            'assets': [InventoryIndexService.serialize(asset) for asset in assets]
+        })
+    
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)